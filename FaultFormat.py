@@ -20,14 +20,14 @@ import fault_api as f
 # Returns a title, description, and footer all as strings
 def format_matches(matches, player_id):
     # Checks for empty match record
-    if matches == []:
+    if len(matches) == 0:
         return('No matches found for that player ID')
 
-    # Gets the match out of the dictionary
+    # Gets the first MatchSummary
     match = matches[0]
 
     # Gets winning team from the dictionary
-    if match['winner'] == 0:
+    if match.winner == 0:
         winner = 'Team 1'
     else:
         winner = 'Team 2'
@@ -35,7 +35,7 @@ def format_matches(matches, player_id):
     # Creates a dict object to return and adds the title, description, and footer
     output = {}
     output['title'] = "Winners: {0}".format(winner)
-    output['description'] = "Length: {0} [ID: {1}]".format(match['timeLength'], str(match['id']))
+    output['description'] = "Length: {0} [ID: {1}]".format(match.time_length, str(match.id))
     output['footer'] = ""
 
     # Creates useful structures for holding data for iterating for each player
@@ -45,29 +45,26 @@ def format_matches(matches, player_id):
     AveELO1 = 0
     
     # Iterates through players in the match
-    for player in match['players']:
+    for player in match.players:
         # Gets the player MMR information for the player
-        player_elo = f.get_elo(player['playerId'])
+        player_elo = f.get_elo(player.player_id)
 
         # Gets hero name with unidentified checking
-        try:
-            hero_played = f.heroes[player['heroId']]
-        except KeyError as e:
-            hero_played = "Hero not in HeroStats"
+        hero_played = f.get_registry().hero_name(player.hero_id, "Hero not in HeroStats")
 
         # Conditional formatting to make the requester stand out
-        if player['playerId'] == player_id:
-            player_string = '\n - **{0} ({1}: {2} *[{3} change]* ELO, Rank {4})**'.format(hero_played, player['username'], player_elo['MMR'], player["mmrChange"], player_elo['ranking'])
+        if player.player_id == player_id:
+            player_string = '\n - **{0} ({1}: {2} *[{3} change]* ELO, Rank {4})**'.format(hero_played, player.username, player_elo.mmr, player.mmr_change, player_elo.ranking)
         else:
-            player_string = '\n - **{0}** ({1}: {2} *[{3} change]* ELO, Rank {4})'.format(hero_played, player['username'], player_elo['MMR'], player["mmrChange"], player_elo['ranking'])
+            player_string = '\n - **{0}** ({1}: {2} *[{3} change]* ELO, Rank {4})'.format(hero_played, player.username, player_elo.mmr, player.mmr_change, player_elo.ranking)
         
         # Sorts players into teams and totals ELO
-        if player['team'] == 0:
+        if player.team == 0:
             team0.append(player_string)
-            AveELO0 += player_elo['MMR']
+            AveELO0 += player_elo.mmr
         else:
             team1.append(player_string)
-            AveELO1 += player_elo['MMR']
+            AveELO1 += player_elo.mmr
     
     # Averages ELO across 5 players
     AveELO0 = int(AveELO0/5)
@@ -123,10 +120,10 @@ def format_elo(player):
         return output
 
     # Add player name
-    output += "{0}\n".format(player['username'])
+    output += "{0}\n".format(player.username)
 
     # Add MMR information
-    output += "{0} {1} (Rank {2})".format(player['MMR'], player['eloTitle'], player['ranking'])
+    output += "{0} {1} (Rank {2})".format(player.mmr, player.elo_title, player.ranking)
 
     return output
 
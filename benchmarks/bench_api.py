@@ -0,0 +1,233 @@
+"""
+End-to-end benchmarks of fault_api and the slash command paths against the mock PlayFault server.
+
+Nothing touches the real website: fault_api.API_URL is pointed at a local MockPlayFault that replays
+benchmarks/payloads with simulated latency. The static data store, image cache and rate limiter are
+turned off (use --rate-limit to keep the limiter) so only the HTTP and caching layers are measured.
+
+Run from the repository root:
+    python -m benchmarks.bench_api --save benchmarks/results/before.json
+    (make a change)
+    python -m benchmarks.bench_api --compare benchmarks/results/before.json
+
+"""
+
+# imports
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fault_api
+import fault_api.aio as aio_api
+import bot.cog_helpers as helpers
+from fault_api.cache import ResponseCache
+from fault_api.models import MatchDetail
+from benchmarks.mock_server import MockPlayFault
+
+
+FAULT_NAME = "qchrisd"
+MATCH_ID = 798209
+
+
+def summarize(latencies, wall_time):
+    """
+    Returns the latency statistics in milliseconds and the throughput of one scenario.
+    """
+
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    return {
+        "n": len(latencies),
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": p95 * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "ops_per_s": len(latencies) / wall_time if wall_time > 0 else float("inf"),
+    }
+
+
+def reset():
+    """
+    Starts a run with an empty response cache and registry so every request goes to the server.
+    """
+
+    fault_api.set_cache(ResponseCache())
+    fault_api.set_registry(None)
+
+
+## Scenarios
+# Each takes the number of operations and returns (latencies, wall time)
+def bench_sync(fn, number, cold_each=False):
+    latencies = []
+    start = time.perf_counter()
+    for i in range(number):
+        if cold_each:
+            reset()
+        op_start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - op_start)
+
+    return latencies, time.perf_counter() - start
+
+
+async def bench_async(fn, number, concurrent=False, cold_each=False):
+    latencies = []
+
+    async def timed(i):
+        op_start = time.perf_counter()
+        await fn(i)
+        latencies.append(time.perf_counter() - op_start)
+
+    start = time.perf_counter()
+    if concurrent:
+        await asyncio.gather(*[timed(i) for i in range(number)])
+    else:
+        for i in range(number):
+            if cold_each:
+                reset()
+            await timed(i)
+
+    return latencies, time.perf_counter() - start
+
+
+async def match_command(i, header_only=False):
+    """
+    The requests and formatting of /match with a fault_name.
+    With header_only it stops once the header, the first thing the user sees, is ready.
+    """
+
+    user = await aio_api.get_user(FAULT_NAME)
+    matches = await aio_api.get_recent_matches(user, 1)
+    match = await aio_api.get_match_data(matches[0].id)
+    registry = await aio_api.get_registry()
+    helpers.embed_match_header(match, registry.id_to_hero, FAULT_NAME)
+    if header_only:
+        return
+
+    await asyncio.gather(*helpers.start_team_embeds(match, registry.id_to_hero, FAULT_NAME))
+
+
+async def elo_command(i):
+    """
+    The requests and formatting of /elo with a fault_name.
+    """
+
+    user = await aio_api.get_user(FAULT_NAME)
+    elo = await aio_api.get_elo(user)
+    avatar = await aio_api.get_player_avatar(user)
+    helpers.embed_elo(user.username, elo.elo_title, elo.mmr, elo.ranking, avatar["avatarURI"])
+
+
+async def run_async_scenarios(number):
+    results = {}
+
+    reset()
+    results["aio get_match_data concurrent"] = await bench_async(
+        lambda i: aio_api.get_match_data(MATCH_ID + 1000 + i), number, concurrent=True)
+
+    results["/match cold"] = await bench_async(match_command, number, cold_each=True)
+    results["/match cold header"] = await bench_async(lambda i: match_command(i, header_only=True), number, cold_each=True)
+    results["/match warm"] = await bench_async(match_command, number)
+
+    results["/elo cold"] = await bench_async(elo_command, number, cold_each=True)
+    results["/elo warm"] = await bench_async(elo_command, number)
+
+    await aio_api.close()
+
+    return results
+
+
+def run(number, latency, jitter, rate_limit=False):
+    """
+    Runs every scenario against a fresh mock server and returns the summaries.
+    """
+
+    with MockPlayFault(latency, jitter, seed=0) as server:
+        fault_api.API_URL = aio_api.API_URL = server.url
+        fault_api.set_static_store(None)
+        fault_api.set_image_cache(None)
+        if not rate_limit:
+            fault_api.set_rate_limiter(None)
+        fault_api.configure_pool()
+
+        match = MatchDetail.from_api(json.loads(server.payloads["getMatchData"]))
+        hero_stats = json.loads(server.payloads["getStatsPerHero"])["heroes"]
+        _, id_to_hero = fault_api.get_hero_dicts(hero_stats)
+        avatar_links = [f"https://api.playfault.com/imagecdn/avatars/{i}.jpg" for i in range(len(match.players))]
+
+        results = {}
+
+        reset()
+        results["get_match_data cold"] = bench_sync(lambda i: fault_api.get_match_data(MATCH_ID + i), number)
+        results["get_match_data warm"] = bench_sync(lambda i: fault_api.get_match_data(MATCH_ID), number)
+
+        results["embed_match"] = bench_sync(lambda i: helpers.embed_match(match, id_to_hero, FAULT_NAME, avatar_links), number)
+        results["embed_elo"] = bench_sync(lambda i: helpers.embed_elo(FAULT_NAME, "Silver", 1223.1, 1129, avatar_links[0]), number)
+
+        results.update(asyncio.run(run_async_scenarios(number)))
+
+        requests = server.requests
+
+    return {"scenarios": {name: summarize(*result) for name, result in results.items()},
+            "settings": {"number": number, "latency": latency, "jitter": jitter, "rate_limit": rate_limit,
+                         "python": platform.python_version(), "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                         "server_requests": requests}}
+
+
+def print_results(results, baseline=None):
+    """
+    Prints a table of the results, with the change from a baseline run if one is given.
+    """
+
+    header = f"{'scenario':<32}{'n':>6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'ops/s':>10}"
+    if baseline != None:
+        header += f"{'mean':>10}{'p95':>10}{'ops/s':>10}"
+    print(header)
+
+    for name, stats in results["scenarios"].items():
+        line = f"{name:<32}{stats['n']:>6}{stats['mean_ms']:>10.2f}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['ops_per_s']:>10.1f}"
+
+        old = None if baseline == None else baseline["scenarios"].get(name)
+        if old != None:
+            for key in ("mean_ms", "p95_ms", "ops_per_s"):
+                change = (stats[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                line += f"{change:>+9.1f}%"
+        print(line)
+
+    print(f"\n{results['settings']['server_requests']} requests to the mock server")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=50, help="operations per scenario")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds the mock server waits before answering")
+    parser.add_argument("--jitter", type=float, default=0.005, help="random +/- seconds added to the latency")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the client side rate limiter on")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier --save to compare against")
+    args = parser.parse_args(argv)
+
+    results = run(args.number, args.latency, args.jitter, args.rate_limit)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as file:
+            baseline = json.load(file)
+
+    print_results(results, baseline)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Times the JSON decoders in fault_api.JSON_DECODERS on the recorded API payloads.
+
+Run from the repository root:
+    python -m benchmarks.bench_decode [--number 2000]
+
+Each payload is decoded from a memoryview over the raw bytes, the same way
+responses are handed to fault_api._decode_json.
+
+"""
+
+# imports
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fault_api
+from benchmarks.mock_server import load_payloads
+
+
+def bench(decoder, data, number):
+    """
+    Returns the best time in microseconds to decode data once.
+    """
+
+    view = memoryview(data)
+    best = min(timeit.repeat(lambda: decoder(view), number=number, repeat=5))
+
+    return best / number * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="decodes per timing run")
+    args = parser.parse_args(argv)
+
+    names = list(fault_api.JSON_DECODERS)
+    payloads = load_payloads()
+
+    print(f"{'payload':<18}{'bytes':>8}" + "".join(f"{name + ' us':>14}" for name in names) + f"{'speedup':>10}")
+    for payload_name, data in payloads.items():
+        times = [bench(fault_api.JSON_DECODERS[name], data, args.number) for name in names]
+        speedup = f"{times[0] / times[-1]:.1f}x" if len(times) > 1 else "-"
+        print(f"{payload_name:<18}{len(data):>8}" + "".join(f"{time:>14.1f}" for time in times) + f"{speedup:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Local stand-in for api.playfault.com that replays the recorded payloads in benchmarks/payloads.
+
+Every request is answered with the payload named after its endpoint (the first part of the path),
+so /getMatchData/798209 gets getMatchData.json. Unknown endpoints get a 404.
+Like the real website, /getMatches/<player id>/<n> only returns the first n recorded matches.
+Each response waits `latency` seconds, plus or minus a random `jitter`, to look like the real website.
+
+Run it on its own to point a bot at it:
+    python -m benchmarks.mock_server --port 8765 --latency 0.05 --jitter 0.02
+then set fault_api.API_URL (and fault_api.aio.API_URL) to http://127.0.0.1:8765.
+
+"""
+
+# imports
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+PAYLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "payloads")
+
+
+def _limit_matches(body, parts):
+    """
+    Keeps the number of matches asked for in /getMatches/<player id>/<n>.
+    """
+
+    if len(parts) < 3 or not parts[2].isdigit():
+        return body
+
+    page = json.loads(body)
+    page["matches"] = page.get("matches", [])[:int(parts[2])]
+
+    return json.dumps(page).encode("utf-8")
+
+
+# Endpoints whose response depends on the request path
+PATH_HANDLERS = {"getMatches": _limit_matches}
+
+
+def load_payloads(directory=PAYLOAD_DIR):
+    """
+    Returns a dict of endpoint name to raw response bytes for every .json file in the directory.
+    """
+
+    payloads = {}
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.endswith(".json"):
+            with open(os.path.join(directory, file_name), "rb") as file:
+                payloads[file_name[:-len(".json")]] = file.read()
+
+    return payloads
+
+
+class _Server(ThreadingHTTPServer):
+    # socketserver only queues 5 connections, so a burst of concurrent clients would wait on SYN retries
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class MockPlayFault:
+    """
+    Threaded HTTP server replaying recorded responses with simulated latency.
+    Use as a context manager or call start() and stop().
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, host="127.0.0.1", port=0, payloads=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.payloads = load_payloads() if payloads == None else payloads
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._thread = None
+
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+    def _delay(self):
+        with self._lock:
+            self.requests += 1
+            jitter = self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+
+        return max(0.0, self.latency + jitter)
+
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, which Nagle's algorithm would hold up for ~40 ms
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                time.sleep(server._delay())
+
+                parts = urlsplit(self.path).path.strip("/").split("/")
+                body = server.payloads.get(parts[0])
+                if body != None and parts[0] in PATH_HANDLERS:
+                    body = PATH_HANDLERS[parts[0]](body, parts)
+
+                if body == None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock playfault", daemon=True)
+        self._thread.start()
+        return self
+
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+    def __enter__(self):
+        return self.start()
+
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.02, help="random +/- seconds added to the latency")
+    args = parser.parse_args(argv)
+
+    server = MockPlayFault(args.latency, args.jitter, port=args.port)
+    print(f"Replaying {len(server.payloads)} recorded endpoints at {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,59 @@ Written by Chris Quartararo
 """
 
 # imports
+import asyncio
+import atexit
+import os
 import discord
 import fault_api as api
+import fault_api.aio as aio_api
+from fault_api.models import User
+from fault_api import tracing
+from fault_api.ratelimit import request_priority, BACKGROUND
+from bot.user_store import SQLiteUserStore, JSONUserStore
+from bot.rank_icons import RankIconCache
 
 # Set up logging
 import bot.logger
 log = bot.logger.setup_logger("./bot/cog_helpers.log", "cog_helpers")
 
+# Maximum number of player lookups in flight at once for a single match
+AVATAR_CONCURRENCY = 5
+
+# Most matches /match will page through
+MAX_MATCHES = 20
+
+# Registered Fault usernames.
+# The USER_STORE environment variable picks the store:
+# - "sqlite" (default) uses users.db and answers lookups from memory. users.json is only read once to move old registrations into it.
+# - "json" keeps users.json in memory and writes changes back after USERS_WRITE_DELAY seconds.
+USERS_DB_PATH = "./bot/users.db"
+USERS_JSON_PATH = "./bot/users.json"
+USERS_WRITE_DELAY = 2.0
+_user_store = None
+
+# Links to the uploaded rank icons for /elo.
+# Set RANK_ICON_BASE_URL to host the icons yourself, e.g. https://example.com/icons_rank
+RANK_ICONS_PATH = "./bot/rank_icons.json"
+_rank_icons = None
+
+# Every slash command is traced (see fault_api.tracing) and its breakdown logged.
+# Commands slower than SLOW_COMMAND_SECONDS are logged in full and kept in slow_commands.
+SLOW_COMMAND_SECONDS = 2.0
+slow_commands = tracing.SlowCommandReport(SLOW_COMMAND_SECONDS)
+
+
+def log_trace(trace):
+    """
+    Logs how long a command took in each stage, and the whole trace if it was slow.
+    """
+
+    log.info(tracing.format_breakdown(trace))
+    if slow_commands.add(trace):
+        log.warning(f"Slow command:\n{tracing.format_trace(trace)}")
+
+tracing.add_listener(log_trace)
+
 
 def read_file(path):
     """
@@ -97,14 +143,105 @@ def remove_from_dict(users_dict, guild_id, discord_name):
 def get_from_dict(users_dict, guild_id, discord_name):
     """
     Retrieves a Fault user name from the users.json dictionary.
+    The dictionary is not changed.
     """
     try:
-        user = users_dict["guild"][guild_id].pop(discord_name)
+        user = users_dict["guild"][guild_id][discord_name]
     except KeyError as e:
         user = None
     return user
 
 
+def get_user_store():
+    """
+    Returns the store of registered Fault users, opening it on first use.
+    If a new SQLite store is opened, registrations from users.json are imported into it.
+    """
+
+    global _user_store
+
+    if _user_store == None and os.getenv("USER_STORE", "sqlite") == "json":
+        _user_store = JSONUserStore(USERS_JSON_PATH, delay=USERS_WRITE_DELAY)
+        # Write any changes still waiting when the bot shuts down
+        atexit.register(_user_store.close)
+
+    elif _user_store == None:
+        _user_store = SQLiteUserStore(USERS_DB_PATH)
+        if _user_store.is_empty():
+            users_json = read_file(USERS_JSON_PATH)
+            if users_json != None:
+                count = _user_store.import_dict(decode_json(users_json))
+                log.info(f"Imported {count} registrations from {USERS_JSON_PATH}.")
+
+    return _user_store
+
+
+def lookup_user(guild_id, discord_name):
+    """
+    Retrieves the Fault user registered to a discord user.
+    Returns a User or None if there is no registration.
+    """
+
+    with tracing.span("lookup_user"):
+        user = get_user_store().get(guild_id, discord_name)
+    if user == None:
+        return None
+
+    return User.from_api(user)
+
+
+def register_user(guild_id, discord_name, fault_user):
+    """
+    Registers or changes the Fault user (a User from get_user) for a discord user.
+    """
+
+    get_user_store().set(guild_id, discord_name, fault_user.to_dict())
+
+
+def unregister_user(guild_id, discord_name):
+    """
+    Removes the Fault user registered to a discord user.
+    Returns the removed User or None if there was no registration.
+    """
+
+    user = get_user_store().remove(guild_id, discord_name)
+
+    if user == None:
+        log.error(f"No registration found for {discord_name} in {guild_id}.")
+        return None
+
+    return User.from_api(user)
+
+
+def get_rank_icons():
+    """
+    Returns the cache of rank icon links, loading it on first use.
+    """
+
+    global _rank_icons
+
+    if _rank_icons == None:
+        _rank_icons = RankIconCache(RANK_ICONS_PATH, base_url=os.getenv("RANK_ICON_BASE_URL"))
+
+    return _rank_icons
+
+
+def parse_match_id(text):
+    """
+    Reads a match id typed by a user, either the bare number or copied from an embed footer ("id:798209").
+    Returns the id as an int or None if it isn't one.
+    """
+
+    text = str(text).strip()
+    if text.lower().startswith("id:"):
+        text = text[len("id:"):].strip()
+
+    if not text.isdigit():
+        return None
+
+    return int(text)
+
+
 def match_info(ctx):
     """
     Gets match information for the given user.
@@ -147,70 +284,244 @@ def embed_elo(fault_name, elo_title, mmr, ranking, avatar_link):
     return embed
 
 
-def embed_match(match_details, id_to_hero, fault_name):
+async def get_avatar_links(players, limit=AVATAR_CONCURRENCY, semaphore=None):
     """
-    Create two embeds, one for the winning team and one for the losing team.
+    Looks up the avatar link for every player in a match concurrently.
+    Avatars are looked up by player ID so no username search is needed.
+    At most `limit` players are looked up at the same time, or as many as `semaphore` lets
+    through when lookups for several lists of players share it.
+    Returns a list of links in the same order as the players.
+    A player whose lookup fails gets None instead of a link.
     """
-    
-    colors = {"win":0x00dc04, "lose":0xef0000}
 
-    footer = {"text":f"{match_details['TimeLength']} - id:{match_details['ID']}"}
+    if semaphore == None:
+        semaphore = asyncio.Semaphore(limit)
 
-    team_win = match_details['Winner']
-    team_lose = int(not match_details['Winner'])
+    async def get_avatar_link(player):
+        async with semaphore:
+            try:
+                avatar = await aio_api.get_player_avatar(player.player_id)
+                return avatar['avatarURI']
+            except Exception as e:
+                log.error(f"Caught error {e!r}. No avatar found for {player.username}.")
+                return None
 
-    embeds_win = []
-    embeds_lose = []
+    with tracing.span("avatar lookups", players=len(players)):
+        return await asyncio.gather(*[get_avatar_link(player) for player in players])
 
-    elo_win = 0
-    elo_lose = 0
-    
-    for player in match_details['Players']:
-
-        try:
-            kda = (player['Kills']+player['Assists'])/player['Deaths']
-        except ZeroDivisionError as e:
-            kda = player['Kills']+player['Assists']
-
-        fields = []
-        fields.append({"name":"ELO", "value":f"{player['MMR']} ({player['MMRChange']})", "inline":True})
-        fields.append({"name":"K/D/A", "value":f"{player['Kills']}/{player['Deaths']}/{player['Assists']} ({kda:.1f})", "inline":True})
-        fields.append({"name":"CS", "value":f"{player['CS']}", "inline":True})
-
-        author_icon_url = api.get_player_avatar(api.get_user(player['Username']))['avatarURI']
-        author_name = f"{player['Username']}"
-        if author_name == fault_name:
-            author_name += u" U+1F3AE"
-        author = {"name":author_name, "icon_url":author_icon_url}
-
-        thumbnail = {"url":api.get_image_hero_portrait(player['HeroID'])}
-
-        title = f"{id_to_hero[player['HeroID']]} - lvl {player['HeroLevel']}"
-
-        if player['Team'] == match_details['Winner']:
-            elo_win += player['MMR']
-            embeds_win.append({
-                "color":colors['win'],
-                "author":author,
-                "thumbnail":thumbnail,
-                "title":title,
-                "fields":fields
-            })
-        else:
-            elo_lose += player['MMR']
-            embeds_lose.append({
-                "color":colors['lose'],
-                "author":author,
-                "thumbnail":thumbnail,
-                "title":title,
-                "fields":fields
-            })
-
-
-    elo_win_average = elo_win/(len(match_details['Players'])/2)
-    elo_lose_average = elo_lose/(len(match_details['Players'])/2)
-
-    embeds = embeds_win + embeds_lose
-    embeds = [discord.Embed.from_dict(x) for x in embeds]
-
-    return embeds
\ No newline at end of file
+
+MATCH_COLORS = {"win":0x00dc04, "lose":0xef0000}
+
+
+def match_footer(match_details):
+    return {"text":f"{match_details.time_length} - id:{match_details.id}"}
+
+
+def team_players(match_details, team):
+    """
+    Returns the players of one team in match order.
+    """
+
+    return [player for player in match_details.players if player.team == team]
+
+
+def embed_player(match_details, player, id_to_hero, fault_name=None, avatar_link=None):
+    """
+    Creates the embed for one player of a match.
+    A player without an avatar link is shown without an icon.
+    """
+
+    fields = []
+    fields.append({"name":"ELO", "value":f"{player.mmr} ({player.mmr_change})", "inline":True})
+    fields.append({"name":"K/D/A", "value":f"{player.kills}/{player.deaths}/{player.assists} ({player.kda:.1f})", "inline":True})
+    fields.append({"name":"CS", "value":f"{player.cs}", "inline":True})
+
+    author_name = f"{player.username}"
+    if author_name == fault_name:
+        author_name += u" U+1F3AE"
+    author = {"name":author_name}
+    if avatar_link != None:
+        author["icon_url"] = avatar_link
+
+    thumbnail = {"url":api.image_link_hero_portrait(player.hero_id)}
+
+    title = f"{id_to_hero.get(player.hero_id, 'Unknown hero')} - lvl {player.hero_level}"
+
+    color = MATCH_COLORS["win"] if player.team == match_details.winner else MATCH_COLORS["lose"]
+
+    return discord.Embed.from_dict({
+        "color":color,
+        "author":author,
+        "thumbnail":thumbnail,
+        "title":title,
+        "fields":fields,
+        "footer":match_footer(match_details)
+    })
+
+
+def embed_team(match_details, team, id_to_hero, fault_name=None, avatar_links=None):
+    """
+    Creates an embed for each player of one team.
+    avatar_links holds the avatar link for each player of the team in match order.
+    """
+
+    players = team_players(match_details, team)
+
+    if avatar_links == None:
+        avatar_links = [None] * len(players)
+
+    return [embed_player(match_details, player, id_to_hero, fault_name, avatar_link)
+            for player, avatar_link in zip(players, avatar_links)]
+
+
+@tracing.spanned("embed_match")
+def embed_match(match_details, id_to_hero, fault_name=None, avatar_links=None):
+    """
+    Create an embed for every player, winning team first.
+    match_details is a MatchDetail from get_match_data.
+    avatar_links holds the avatar link for each player in match order (see get_avatar_links).
+    Players without an avatar link are shown without an icon.
+    """
+
+    if avatar_links == None:
+        avatar_links = [None] * len(match_details.players)
+
+    team_win = match_details.winner
+    team_lose = int(not match_details.winner)
+
+    embeds = []
+    for team in (team_win, team_lose):
+        embeds += [embed_player(match_details, player, id_to_hero, fault_name, avatar_link)
+                   for player, avatar_link in zip(match_details.players, avatar_links) if player.team == team]
+
+    return embeds
+
+
+def embed_match_header(match_details, id_to_hero, fault_name=None):
+    """
+    Creates one embed summing up a match: the winner, and each team's players and average MMR.
+    It only needs getMatchData, so it can be sent before any avatars are looked up.
+    """
+
+    fields = []
+    for team in (match_details.winner, int(not match_details.winner)):
+        players = team_players(match_details, team)
+        if len(players) == 0:
+            continue
+
+        average_mmr = sum(player.mmr or 0 for player in players) / len(players)
+        result = "won" if team == match_details.winner else "lost"
+
+        lines = []
+        for player in players:
+            name = f"**{player.username}**" if player.username == fault_name else player.username
+            lines.append(f"{id_to_hero.get(player.hero_id, 'Unknown hero')} - {name} {player.kills}/{player.deaths}/{player.assists}")
+
+        fields.append({"name":f"Team {team + 1} {result} (MMR {average_mmr:.0f})", "value":"\n".join(lines), "inline":True})
+
+    return discord.Embed.from_dict({
+        "color":MATCH_COLORS["win"],
+        "title":f"Team {match_details.winner + 1} won",
+        "fields":fields,
+        "footer":match_footer(match_details)
+    })
+
+
+def start_team_embeds(match_details, id_to_hero, fault_name=None):
+    """
+    Starts looking up the avatars of both teams at once, AVATAR_CONCURRENCY players at a time.
+    Returns a task for the winning team and one for the losing team. Each finishes with that team's
+    embeds as soon as its own avatars are in.
+    """
+
+    semaphore = asyncio.Semaphore(AVATAR_CONCURRENCY)
+
+    async def build(team):
+        avatar_links = await get_avatar_links(team_players(match_details, team), semaphore=semaphore)
+        with tracing.span("embed_team", team=team):
+            return embed_team(match_details, team, id_to_hero, fault_name, avatar_links)
+
+    return (asyncio.ensure_future(build(match_details.winner)),
+            asyncio.ensure_future(build(int(not match_details.winner))))
+
+
+def embed_scoreboard(match_details, file_name):
+    """
+    Creates the embed that shows a scoreboard image attached as file_name.
+    """
+
+    dict = {
+        "color": 0x00dc04,
+        "title": f"Team {match_details.winner + 1} won",
+        "image": {"url": f"attachment://{file_name}"},
+        "footer": {"text":f"{match_details.time_length} - id:{match_details.id}"}
+    }
+
+    return discord.Embed.from_dict(dict)
+
+
+class MatchPages:
+    """
+    The pages of a multi-match /match, one match per page.
+    The match data for every match is requested concurrently as soon as the pages are created,
+    but a page's avatars and embeds are only built the first time it is shown.
+    Pages after the first are prefetched at BACKGROUND priority so they don't hold up other users' commands.
+    """
+
+    def __init__(self, matches, id_to_hero, fault_name=None):
+        self.matches = matches
+        self.id_to_hero = id_to_hero
+        self.fault_name = fault_name
+        self._details = [asyncio.ensure_future(aio_api.get_match_data(match.id)) for match in matches[:1]]
+        # Tasks keep the priority set when they are created
+        with request_priority(BACKGROUND):
+            self._details += [asyncio.ensure_future(aio_api.get_match_data(match.id)) for match in matches[1:]]
+        for task in self._details:
+            task.add_done_callback(_log_task_error)
+        self._embeds = {}
+
+
+    def __len__(self):
+        return len(self.matches)
+
+
+    def label(self, index):
+        """
+        Returns the page counter shown above the embeds.
+        """
+
+        return f"Match {index + 1} of {len(self)}"
+
+
+    async def page(self, index):
+        """
+        Returns the embeds for one page, building them the first time.
+        """
+
+        embeds = self._embeds.get(index)
+        if embeds == None:
+            with tracing.span("match page", page=index):
+                match = await self._details[index]
+                avatar_links = await get_avatar_links(match.players)
+                embeds = self._embeds[index] = embed_match(match, self.id_to_hero, self.fault_name, avatar_links)
+
+        return embeds
+
+
+    def cancel(self):
+        """
+        Stops loading match data nobody will look at.
+        """
+
+        for task in self._details:
+            task.cancel()
+
+
+def _log_task_error(task):
+    """
+    Logs a failed match data request.
+    Reading the exception also stops asyncio warning about it if the page is never shown.
+    """
+
+    if not task.cancelled() and task.exception() != None:
+        log.error(f"Caught error {task.exception()!r} while loading match data.")
@@ -3,7 +3,9 @@ This file contains the cog and commands for the bot.
 """
 
 # Import packages
+import io
 import os
+import asyncio
 from dotenv import load_dotenv  # Package titled python-dotenv
 
 # Import discord stuff
@@ -13,7 +15,11 @@ import slash_util  # Requires discord.py 2.0.0+
 # Import custom modules
 import bot.logger
 import bot.cog_helpers as helpers
-import fault_api as api
+from bot.views import MatchPageView
+from bot.rank_icons import icon_path, uploaded_url
+from bot.scoreboard import get_scoreboard
+from fault_api import tracing
+import fault_api.aio as api  # Awaitable version of fault_api so commands don't block the event loop
 
 
 # Load the environmental variables from the .env file
@@ -25,15 +31,54 @@ GUILD = os.getenv('DISCORD_GUILDID')
 log = bot.logger.setup_logger("./bot/fault_bot.log", "cogs")
 
 
+async def send_api_error(ctx, error):
+    """
+    Tells the user when the Fault website couldn't be reached instead of failing silently.
+    Returns True if the error was an API error.
+    """
+
+    original = getattr(error, "original", error)
+    if not isinstance(original, api.APIError):
+        return False
+
+    log.error(f"Fault website error in /{ctx.command.name}: {original}")
+    await ctx.send("The Fault website isn't answering right now. Please try again in a minute.")
+
+    return True
+
+
+async def send_command_error(ctx, error):
+    """
+    Logs an unexpected error in a command and tells the user it failed.
+    A deferred command would otherwise be left "thinking" with no answer.
+    """
+
+    original = getattr(error, "original", error)
+    log.error(f"Caught error {original!r} in /{ctx.command.name}.", exc_info=original)
+
+    try:
+        await ctx.send("Something went wrong with that command. Please try again later.")
+    except discord.HTTPException as e:
+        log.error(f"Caught error {e!r} while reporting an error in /{ctx.command.name}.")
+
+
 # Cog for user slash_command()s
 class UserManagement(slash_util.Cog):
 
+    async def slash_command_error(self, ctx, error):
+        """
+        Reports Fault website errors and any other error to the user and the log.
+        """
+
+        if not await send_api_error(ctx, error):
+            await send_command_error(ctx, error)
+
+
     @slash_util.slash_command(guild_id=GUILD, name="register", description="Associate or change a Fault username with your discord user.")
+    @tracing.traced("/register")
     async def register_fault_username(self, ctx: slash_util.Context, fault_name: str):
         """
-        Registers or updates a discord user's name in a JSON for persistent storage.
-        If the JSON is blank or doesn't exist it is created.
-        If the JSON exists, it is updated and rewritten.
+        Registers or updates a discord user's Fault user in the user store.
         """
 
         # Some variables for easy access
@@ -43,29 +88,24 @@ class UserManagement(slash_util.Cog):
         # Log
         log.info(f"Registering {discord_name}")
 
-        users_json = helpers.read_file("./bot/users.json")
-            
-        users_dict = helpers.decode_json(users_json)
-
-        fault_user = api.get_user(fault_name)
+        fault_user = await api.get_user(fault_name)
 
         if fault_user == None:
             await ctx.send(f"Sorry, I couldn't find **{fault_name}**. Check your spelling and try again.")
             log.error(f"Failed to find {fault_name}.")
             return
         
-        new_dict = helpers.update_dict(users_dict, guild_id, discord_name, fault_user)
-
-        helpers.write_file("./bot/users.json", new_dict)
+        helpers.register_user(guild_id, discord_name, fault_user)
 
         # Send confirmation of completion to the messenger
-        await ctx.send(f"Your Fault username has been updated to **{fault_user['username']}** (id: {fault_user['id']}). Use this command again if you would like to change it.")
+        await ctx.send(f"Your Fault username has been updated to **{fault_user.username}** (id: {fault_user.id}). Use this command again if you would like to change it.")
 
 
     @slash_util.slash_command(guild_id=GUILD, name="unregister", description="Remove all Fault usernames associated with your discord user.")
+    @tracing.traced("/unregister")
     async def unregister_fault_username(self, ctx: slash_util.Context):
         """
-        Removes all Fault usernames from the users.json file based on the discord user.
+        Removes the Fault username registered to the discord user from the user store.
         """
         # Some easy variables
         guild_id = str(ctx.guild.id)
@@ -74,19 +114,14 @@ class UserManagement(slash_util.Cog):
         # Log
         log.info(f"Unregistering {discord_name}.")
 
-        users_json = helpers.read_file("./bot/users.json")
-
-        users_dict = helpers.decode_json(users_json)
-
-        new_dict = helpers.remove_from_dict(users_dict, guild_id, discord_name)
-
-        helpers.write_file("./bot/users.json", new_dict)
+        helpers.unregister_user(guild_id, discord_name)
 
         # Send confirmation of completion to messenger
         await ctx.send(f"Your Fault user names have been forgotten. User /register to add a new Fault user name.")
 
 
     @slash_util.slash_command(guild_id=GUILD, name="show_username", description="Display the Fault username that is registered to your discord user.")
+    @tracing.traced("/show_username")
     async def show_username(self, ctx: slash_util.Context):
         """
         Sends the user name that is registered to the messenger.
@@ -99,24 +134,38 @@ class UserManagement(slash_util.Cog):
         # Log
         log.info(f"Getting Fault user for {discord_name}.")
 
-        users_json = helpers.read_file("./bot/users.json")
-
-        users_dict = helpers.decode_json(users_json)
-
-        user = helpers.get_from_dict(users_dict, guild_id, discord_name)
+        user = helpers.lookup_user(guild_id, discord_name)
 
         if user == None:
             await ctx.send("There is no Fault name registered to your discord name.")
-            log.error(f"Failed to find {user['username']} in users.json.")
+            log.error(f"Failed to find a registration for {discord_name}.")
         else:
-            await ctx.send(f"Your registered Fault user name is **{user['username']}** (id: {user['id']}).")
+            await ctx.send(f"Your registered Fault user name is **{user.username}** (id: {user.id}).")
 
 
 
 # Cog for stats commands
 class GameStats(slash_util.Cog):
 
+    def cog_unload(self):
+        """
+        Closes the shared API session when the cog is removed.
+        """
+
+        asyncio.ensure_future(api.close())
+
+
+    async def slash_command_error(self, ctx, error):
+        """
+        Reports Fault website errors and any other error to the user and the log.
+        """
+
+        if not await send_api_error(ctx, error):
+            await send_command_error(ctx, error)
+
+
     @slash_util.slash_command(guild_id=GUILD, name="elo", description="Look at your player MMR and rank.")
+    @tracing.traced("/elo")
     async def elo(self, ctx, fault_name: str=None):
         """
         Gets ELO for a player and sends an embed with the info.
@@ -126,81 +175,190 @@ class GameStats(slash_util.Cog):
             guild_id = str(ctx.guild.id)
             discord_name = f"{ctx.author.name}#{ctx.author.discriminator}"
 
-            users_json = helpers.read_file("./bot/users.json")
-
-            users_dict = helpers.decode_json(users_json)
-
-            user = helpers.get_from_dict(users_dict, guild_id, discord_name)
+            user = helpers.lookup_user(guild_id, discord_name)
 
             # Log
             log.info(f"Getting elo for {discord_name}.")
 
             if user == None:
                 await ctx.send(f"I couldn't find any registered Fault user name for {discord_name} user. Try using /register to save one.")
-                log.error(f"Failed to find user {discord_name} in users.json.")
+                log.error(f"Failed to find a registration for {discord_name}.")
                 return
         
         else:
-            user = api.get_user(fault_name)
+            user = await api.get_user(fault_name)
 
             if user == None:
                 await ctx.send(f"I couldn't find {fault_name}. Check your spelling and try again.")
                 log.error(f"Failed to get user {fault_name} from Fault website.")
                 return
 
-        user_elo = api.get_elo(user)
+        user_elo = await api.get_elo(user)
 
-        avatar_link = api.get_player_avatar(user)
+        avatar_link = await api.get_player_avatar(user)
 
-        embed_message = helpers.embed_elo(user['username'], user_elo['eloTitle'], user_elo['MMR'], user_elo['ranking'], avatar_link['avatarURI'])
+        embed_message = helpers.embed_elo(user.username, user_elo.elo_title, user_elo.mmr, user_elo.ranking, avatar_link['avatarURI'])
 
-        # Adds rank image to embed. This uploads the image every time.
-        # TODO figure out how to use a CDN to be able to pass a url and not upload images for every call
-        rank_image = discord.File(f"./assets/icons_rank/{user_elo['eloTitle']}.png", filename=f"{user_elo['eloTitle']}.png")
-        embed_message.set_thumbnail(url=f"attachment://{user_elo['eloTitle']}.png")
+        # Adds rank image to embed. The image is only uploaded when there is no saved link to it.
+        rank_icons = helpers.get_rank_icons()
+        icon_url = rank_icons.get(user_elo.elo_title)
 
-        await ctx.send(embed=embed_message, file=rank_image)
+        if icon_url != None:
+            embed_message.set_thumbnail(url=icon_url)
+            with tracing.span("discord send"):
+                await ctx.send(embed=embed_message)
+            return
+
+        rank_image = discord.File(icon_path(user_elo.elo_title), filename=f"{user_elo.elo_title}.png")
+        embed_message.set_thumbnail(url=f"attachment://{user_elo.elo_title}.png")
+
+        with tracing.span("discord send", upload=True):
+            message = await ctx.send(embed=embed_message, file=rank_image)
+
+        icon_url = uploaded_url(message)
+        if icon_url != None:
+            rank_icons.put(user_elo.elo_title, icon_url)
 
 
     @slash_util.slash_command(guild_id=GUILD, name="match", description="Get match information.")
-    async def match(self, ctx, fault_name:str = None, number:int = None, match_id:str = None):
+    @tracing.traced("/match")
+    async def match(self, ctx, fault_name:str = None, number:int = None, match_id:str = None, scoreboard:bool = False):
         """
         Gets match information for a given user or registered user.
-        Currently supports only one match.
+        With `number` the last matches (up to helpers.MAX_MATCHES) are shown one per page with buttons to page through them.
+        With `match_id` that match is shown straight away without looking up a user.
+        With `scoreboard` a single match is shown as one scoreboard image instead of an embed per player,
+        so `number` is ignored and the user is told.
         """
 
-        await ctx.send("Getting your match data...")
+        # Acknowledge the command straight away. Everything sent after this is a follow-up message.
+        await ctx.defer()
+
+        if match_id != None:
+            await self.send_match(ctx, match_id, fault_name, scoreboard)
+            return
 
         if fault_name == None:
             guild_id = str(ctx.guild.id)
             discord_name = f"{ctx.author.name}#{ctx.author.discriminator}"
 
-            users_json = helpers.read_file("./bot/users.json")
-
-            users_dict = helpers.decode_json(users_json)
-
-            user = helpers.get_from_dict(users_dict, guild_id, discord_name)
+            user = helpers.lookup_user(guild_id, discord_name)
 
             # Log
             log.info(f"Getting elo for {discord_name}.")
 
             if user == None:
                 await ctx.send(f"I couldn't find any registered Fault user name for {discord_name} user. Try using /register to save one.")
-                log.error(f"Failed to find user {discord_name} in users.json.")
+                log.error(f"Failed to find a registration for {discord_name}.")
                 return
 
         else:
-            user = api.get_user(fault_name)
+            user = await api.get_user(fault_name)
 
             if user == None:
                 await ctx.send(f"I couldn't find {fault_name}. Check your spelling and try again.")
                 log.error(f"Failed to get user {fault_name} from Fault website.")
                 return
         
-        user_match = api.get_matches(user)
-        match = api.get_match_data(user_match['id'])
-        _, id_to_hero = api.get_hero_dicts()
+        # Scoreboards aren't paged, so only the latest match is needed
+        if scoreboard and number != None and number > 1:
+            await ctx.send("Scoreboards show one match at a time, so only the latest match is shown.")
+            number = 1
+
+        # One request for the match list, the match data for every page is then fetched concurrently
+        number = max(1, min(number or 1, helpers.MAX_MATCHES))
+        matches = await api.get_recent_matches(user, number)
+
+        if len(matches) == 0:
+            await ctx.send(f"I couldn't find any matches for {user.username}.")
+            return
+
+        # A single match is streamed in as its data arrives, several get a page each
+        if len(matches) == 1 or scoreboard:
+            await self.send_match(ctx, matches[0].id, fault_name, scoreboard)
+            return
+
+        registry = await api.get_registry()
+        pages = helpers.MatchPages(matches, registry.id_to_hero, fault_name)
+
+        embeds = await pages.page(0)
+
+        with tracing.span("discord send"):
+            if len(pages) == 1:
+                await ctx.send(embeds=embeds)
+            else:
+                view = MatchPageView(pages, ctx.author.id)
+                await ctx.send(pages.label(0), embeds=embeds, view=view)
+
 
-        embeds = helpers.embed_match(match, id_to_hero, fault_name)
+    async def send_match(self, ctx, match_id, fault_name=None, scoreboard=False):
+        """
+        Sends a single match by its id.
+        Only getMatchData is requested, and nothing at all if the match is cached.
+        A scoreboard is sent as one image attachment. Without Pillow the match is sent as embeds instead.
+        Embeds are streamed in as the avatars arrive (see send_match_embeds).
+        """
+
+        parsed_id = helpers.parse_match_id(match_id)
+
+        if parsed_id == None:
+            await ctx.send(f"**{match_id}** isn't a match id. Use the number after `id:` at the bottom of a match.")
+            return
+
+        match = await api.get_match_data(parsed_id)
+
+        if len(match.players) == 0:
+            await ctx.send(f"I couldn't find match {parsed_id}.")
+            log.error(f"Failed to get match {parsed_id} from Fault website.")
+            return
+
+        registry = await api.get_registry()
+
+        if scoreboard:
+            png = await get_scoreboard(match, registry.id_to_hero)
+            if png != None:
+                file_name = f"match_{match.id}.png"
+                image = discord.File(io.BytesIO(png), filename=file_name)
+                with tracing.span("discord send", upload=True):
+                    await ctx.send(embed=helpers.embed_scoreboard(match, file_name), file=image)
+                return
+            log.error("Pillow is not installed, sending the match as embeds.")
+
+        await self.send_match_embeds(ctx, match, registry.id_to_hero, fault_name)
+
+
+    async def send_match_embeds(self, ctx, match, id_to_hero, fault_name=None):
+        """
+        Sends a match as soon as its data is in and fills in the players as their avatars arrive.
+        The header, which needs nothing but the match data, goes out first. The winning team's embeds
+        are then edited into the header message and the losing team's follow in a second message,
+        whichever team's avatar lookups finish first.
+        """
 
-        await ctx.send(embeds=embeds)
+        header = helpers.embed_match_header(match, id_to_hero, fault_name)
+
+        # The avatar lookups run while the header is being sent
+        winners, losers = helpers.start_team_embeds(match, id_to_hero, fault_name)
+
+        try:
+            with tracing.span("discord send", part="header"):
+                message = await ctx.send(embed=header)
+
+            pending = {winners, losers}
+            while len(pending) > 0:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    embeds = task.result()
+                    # A team with no players has nothing to send, and discord rejects a message without content
+                    if len(embeds) == 0:
+                        continue
+                    if task is winners:
+                        with tracing.span("discord send", part="winners"):
+                            await message.edit(embeds=[header] + embeds)
+                    else:
+                        with tracing.span("discord send", part="losers"):
+                            await ctx.send(embeds=embeds)
+        finally:
+            # Stop the lookups if sending failed
+            winners.cancel()
+            losers.cancel()
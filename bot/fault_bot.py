@@ -10,6 +10,7 @@ Written by Chris Quartararo
 
 # Import packages
 import os
+import signal
 from dotenv import load_dotenv  # Package titled python-dotenv
 
 # Import discord stuff
@@ -18,6 +19,10 @@ import slash_util  # Requires discord.py 2.0.0+
 # Import custom modules
 from bot.logger import setup_logger
 import bot.cogs as cogs
+import bot.cog_helpers as helpers
+import fault_api as api
+import fault_api.aio as aio_api
+from fault_api import metrics
 
 
 # Set up logging
@@ -28,6 +33,12 @@ load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 GUILD = os.getenv('DISCORD_GUILDID')
 
+# Request metrics in the Prometheus text format.
+# METRICS_PORT serves them at http://127.0.0.1:<port>/metrics, and SIGUSR1 writes them to METRICS_DUMP_PATH
+# and logs the slow command report.
+METRICS_PORT = os.getenv('METRICS_PORT')
+METRICS_DUMP_PATH = os.getenv('METRICS_DUMP_PATH', './bot/metrics.prom')
+
 
 # Create the discord bot
 bot = slash_util.Bot(command_prefix="/")
@@ -49,9 +60,35 @@ async def on_ready():
     Runs when the bot is fully functional and is ready to start being a bot.
     """
 
+    # Load the hero, item and aspect registry once so commands only do lookups
+    await aio_api.get_registry()
+
     log.info(f'{bot.user} is ready to recieve commands.')
 
 
+# Export request metrics
+def dump_metrics(signum=None, frame=None):
+    """
+    Writes the request metrics to METRICS_DUMP_PATH and logs the slow command report.
+    """
+
+    if api.get_metrics() != None:
+        metrics.dump(api.get_metrics(), METRICS_DUMP_PATH)
+        log.info(f'Wrote request metrics to {METRICS_DUMP_PATH}.')
+
+    log.info(helpers.slow_commands.report())
+
+if METRICS_PORT and api.get_metrics() != None:
+    metrics.start_http_server(api.get_metrics(), int(METRICS_PORT))
+    log.info(f'Serving request metrics on port {METRICS_PORT}.')
+
+if hasattr(signal, "SIGUSR1"):
+    signal.signal(signal.SIGUSR1, dump_metrics)
+
+
+# Load hero, item and aspect data saved by the last run so the first commands don't wait on the website
+api.warm_static_data()
+
 # Add the cog to the bot
 bot.add_cog(cogs.UserManagement(bot))
 bot.add_cog(cogs.GameStats(bot))
@@ -1,15 +1,233 @@
 """
 This class handles logging for fault_bot using the logging package.
 
+Log calls only put the record on a queue. A single background thread (a QueueListener) writes
+them to the log files, so logging never does disk I/O on the event loop.
+Each named logger writes to its own file, which is rotated once it reaches LOG_MAX_BYTES.
+Several loggers can share a file.
+Records from every other logger, like discord.py's, go to ROOT_LOG_FILE through the root logger.
+
+Set LOG_FORMAT=json in .env to write JSON lines instead of text.
+
 """
 
 # Imports
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+
+LOG_FORMAT = "(%(process)d) %(asctime)s [%(levelname)s] - %(name)s - %(message)s"
+LOG_LEVEL = logging.INFO
+
+# Log files are rotated at LOG_MAX_BYTES, keeping LOG_BACKUP_COUNT old files (fault_bot.log.1, ...)
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# Where loggers that weren't set up with setup_logger() write
+ROOT_LOG_FILE = "./bot/fault_bot.log"
+
+_queue = queue.SimpleQueue()
+_listener = None
+_file_handlers = {}
+_lock = threading.Lock()
+# Names of the loggers set up with setup_logger(). Replaced rather than changed so the logging thread can read it
+_claimed_names = frozenset()
+_root_handler = None
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats a record as one line of JSON.
+    """
+
+    def format(self, record):
+        line = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.process,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line["exception"] = record.exc_text
+
+        return json.dumps(line)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on the logging queue with the traceback kept apart from the message,
+    so the file's formatter decides how to write it (a JSON "exception" field or text lines).
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        # The traceback is turned into text now so the frames aren't kept alive on the queue
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+
+_traceback_formatter = logging.Formatter()
+
+
+class _LoggerFilter(logging.Filter):
+    """
+    Lets through the records of the loggers that write to one file.
+    With other_loggers it also lets through records from loggers no file was set up for.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.names = frozenset()
+        self.other_loggers = False
+
+
+    def filter(self, record):
+        if _matches(record.name, self.names):
+            return True
+
+        return self.other_loggers and not _matches(record.name, _claimed_names)
+
+
+def _matches(logger_name, names):
+    # Child loggers ("cogs.match") write to their parent's file
+    return any(logger_name == name or logger_name.startswith(name + ".") for name in names)
+
+
+def _json_lines():
+    return os.getenv("LOG_FORMAT", "text").lower() == "json"
+
+
+def _file_handler(log_file_name, json_lines):
+    """
+    Returns the rotating handler for a log file, creating it on first use.
+    Must be called while holding the lock.
+    """
+
+    path = os.path.abspath(log_file_name)
+    handler = _file_handlers.get(path)
 
+    if handler == None:
+        # The file is only opened once something is logged to it
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, delay=True)
+        handler.setFormatter(JSONFormatter() if json_lines else logging.Formatter(LOG_FORMAT))
+        handler.addFilter(_LoggerFilter())
+        _file_handlers[path] = handler
+
+    return handler
+
+
+def _start_listener():
+    """
+    (Re)starts the thread writing queued records with every file handler.
+    Must be called while holding the lock.
+    """
+
+    global _listener
+
+    if _listener != None:
+        _listener.stop()
+
+    _listener = logging.handlers.QueueListener(_queue, *_file_handlers.values(), respect_handler_level=True)
+    _listener.start()
+
+
+def setup_logger(log_file_name, logger_name, json_lines=None):
+    """
+    Sets up logging for info.
+    Returns the logger `logger_name`, which writes to `log_file_name` through the logging queue.
+    json_lines writes JSON lines instead of text, and defaults to the LOG_FORMAT environment variable.
+    The format of a file is set by the first logger that writes to it.
+    """
+
+    global _claimed_names
+
+    if json_lines == None:
+        json_lines = _json_lines()
+
+    if _root_handler == None:
+        setup_root_logger(ROOT_LOG_FILE, json_lines)
 
-def setup_logger(log_file_name, logger_name):
-    """Sets up logging for info."""
-    logging.basicConfig(filename=f"{log_file_name}", format="(%(process)d) %(asctime)s [%(levelname)s] - %(name)s - %(message)s", level=logging.INFO)
     logger = logging.getLogger(logger_name)
+
+    with _lock:
+        handler = _file_handler(log_file_name, json_lines)
+        logger_filter = handler.filters[0]
+        new_file = len(logger_filter.names) == 0 and not logger_filter.other_loggers
+        logger_filter.names = logger_filter.names | {logger_name}
+        _claimed_names = _claimed_names | {logger_name}
+
+        _add_queue_handler(logger)
+        # Records are written by our handlers only, not again by the root logger
+        logger.propagate = False
+
+        if new_file or _listener == None:
+            _start_listener()
+
     return logger
 
+
+def setup_root_logger(log_file_name, json_lines=None):
+    """
+    Writes the records of every logger that wasn't set up with setup_logger(), like discord's, to `log_file_name`.
+    setup_logger() sends them to ROOT_LOG_FILE unless this was called first.
+    """
+
+    global _root_handler
+
+    if json_lines == None:
+        json_lines = _json_lines()
+
+    with _lock:
+        handler = _file_handler(log_file_name, json_lines)
+        if _root_handler != None:
+            _root_handler.filters[0].other_loggers = False
+        handler.filters[0].other_loggers = True
+        _root_handler = handler
+
+        _add_queue_handler(logging.getLogger())
+        _start_listener()
+
+
+def _add_queue_handler(logger):
+    """
+    Sends a logger's records to the logging queue, once.
+    Must be called while holding the lock.
+    """
+
+    if not any(isinstance(queue_handler, logging.handlers.QueueHandler) for queue_handler in logger.handlers):
+        logger.addHandler(_QueueHandler(_queue))
+    logger.setLevel(LOG_LEVEL)
+
+
+def stop_logging():
+    """
+    Writes every queued record and stops the logging thread.
+    """
+
+    global _listener
+
+    with _lock:
+        if _listener != None:
+            _listener.stop()
+            _listener = None
+        for handler in _file_handlers.values():
+            handler.flush()
+
+
+atexit.register(stop_logging)
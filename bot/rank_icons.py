@@ -0,0 +1,100 @@
+"""
+Remembers where the rank icons used by /elo are hosted so they aren't uploaded with every embed.
+
+An icon is uploaded the first time it is needed. The URL discord gives the upload is saved to
+a small JSON file so a restarted bot doesn't upload it again.
+Discord attachment links expire, so saved links older than `max_age` are uploaded again.
+
+If the icons are hosted somewhere else (RANK_ICON_BASE_URL), links are built from that and nothing is uploaded.
+
+"""
+
+# imports
+import json
+import threading
+import time
+
+from fault_api.files import atomic_write
+
+
+RANK_TITLES = ("Bronze", "Silver", "Gold", "Platinum", "Diamond", "Master")
+RANK_ICON_DIR = "./assets/icons_rank"
+
+
+def icon_path(elo_title):
+    """
+    Returns the path of the icon file for a rank.
+    """
+
+    return f"{RANK_ICON_DIR}/{elo_title}.png"
+
+
+def uploaded_url(message):
+    """
+    Returns the link discord gave an icon uploaded with a message, or None if there isn't one.
+    """
+
+    if len(message.attachments) > 0:
+        return message.attachments[0].url
+
+    for embed in message.embeds:
+        if embed.thumbnail and embed.thumbnail.url:
+            return embed.thumbnail.url
+
+    return None
+
+
+class RankIconCache:
+    """
+    Links to the rank icons keyed by rank title, saved to a JSON file.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path, max_age=20 * 60 * 60, base_url=None, clock=time.time):
+        self.path = path
+        self.max_age = max_age
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._urls = self._load()
+
+
+    def _load(self):
+        """
+        Reads the saved links. A missing or broken file starts empty.
+        """
+
+        try:
+            with open(self.path, "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.decoder.JSONDecodeError) as e:
+            return {}
+
+
+    def get(self, elo_title):
+        """
+        Returns the link to a rank icon or None if it has to be uploaded.
+        """
+
+        if self.base_url != None:
+            return f"{self.base_url}/{elo_title}.png"
+
+        with self._lock:
+            entry = self._urls.get(elo_title)
+
+        if entry == None or self._clock() - entry["uploaded_at"] > self.max_age:
+            return None
+
+        return entry["url"]
+
+
+    def put(self, elo_title, url):
+        """
+        Saves the link to an uploaded rank icon.
+        """
+
+        with self._lock:
+            self._urls[elo_title] = {"url": url, "uploaded_at": self._clock()}
+            json_data = json.dumps(self._urls, indent=4)
+
+            atomic_write(self.path, json_data)
@@ -0,0 +1,244 @@
+"""
+Renders a whole match as one scoreboard image for /match.
+
+Each player gets a row with their hero portrait, name, hero and level, K/D/A, items and MMR change.
+Portraits and item images come from the on-disk image cache in fault_api, so they are only downloaded once.
+They are all loaded at the same time before rendering starts. Rendering is CPU work, so it runs in a small
+worker pool instead of on the event loop.
+Scoreboards of finished matches never change and are kept in the image cache by match id.
+
+Pillow is optional. Without it get_scoreboard() returns None and /match falls back to embeds.
+
+"""
+
+# imports
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = None
+
+import fault_api as api
+import fault_api.aio as aio_api
+from fault_api.cache import MATCH_FINISHED
+from fault_api.registry import EMPTY_SLOTS
+from fault_api.singleflight import AsyncSingleFlight
+from fault_api import tracing
+
+# Set up logging
+import bot.logger
+log = bot.logger.setup_logger("./bot/fault_bot.log", "scoreboard")
+
+
+# Number of scoreboards rendered at the same time
+SCOREBOARD_WORKERS = 2
+
+# Layout in pixels
+WIDTH = 900
+HEADER_HEIGHT = 40
+ROW_HEIGHT = 64
+PORTRAIT_SIZE = 56
+ITEM_SIZE = 40
+PADDING = 4
+
+BACKGROUND = (32, 34, 37)
+ROW_COLORS = {"win": (28, 64, 36), "lose": (72, 28, 28)}
+TEXT_COLOR = (235, 235, 235)
+PLACEHOLDER_COLOR = (70, 70, 70)
+MMR_COLORS = {"up": (120, 255, 120), "down": (255, 130, 130)}
+
+_executor = None
+_flights = AsyncSingleFlight()
+
+
+def _font(size):
+    # Older Pillow versions only have the one size of default font
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError as e:
+        return ImageFont.load_default()
+
+
+def _load_icon(data, size):
+    """
+    Opens image bytes and scales them to a square, or returns a grey square if there is no usable image.
+    """
+
+    if data != None:
+        try:
+            return Image.open(io.BytesIO(data)).convert("RGBA").resize((size, size))
+        except (OSError, ValueError) as e:
+            pass
+
+    return Image.new("RGBA", (size, size), PLACEHOLDER_COLOR)
+
+
+def scoreboard_key(match_id):
+    """
+    Returns the key a scoreboard is kept under in the image cache.
+    """
+
+    return f"scoreboard/{match_id}"
+
+
+def render_scoreboard(match, id_to_hero, portraits=None, items=None):
+    """
+    Draws a MatchDetail as a scoreboard, winners first.
+    portraits and items are the image bytes by hero ID and item ID from load_images().
+    Returns the image as PNG bytes.
+    Blocking: without portraits and items each image is read from the image cache or downloaded in turn.
+    """
+
+    if portraits == None:
+        portraits = {hero_id: api.get_image_hero_portrait(hero_id) for hero_id in {player.hero_id for player in match.players}}
+    if items == None:
+        items = {item_id: api.get_image_item(item_id) for item_id in _item_ids(match)}
+
+    players = sorted(match.players, key=lambda player: player.team != match.winner)
+    height = 2 * HEADER_HEIGHT + len(players) * ROW_HEIGHT
+    image = Image.new("RGB", (WIDTH, height), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    title_font = _font(20)
+    font = _font(16)
+
+    y = 0
+    team = None
+    for player in players:
+        # Team header before the first player of each team
+        if player.team != team:
+            team = player.team
+            result = "Victory" if team == match.winner else "Defeat"
+            draw.text((PADDING * 2, y + 10), f"Team {team + 1} - {result}", font=title_font, fill=TEXT_COLOR)
+            if y == 0:
+                draw.text((WIDTH - 220, y + 10), f"{match.time_length} - id:{match.id}", font=font, fill=TEXT_COLOR)
+            y += HEADER_HEIGHT
+
+        row_color = ROW_COLORS["win"] if player.team == match.winner else ROW_COLORS["lose"]
+        draw.rectangle((0, y, WIDTH, y + ROW_HEIGHT - 1), fill=row_color)
+
+        portrait = _load_icon(portraits.get(player.hero_id), PORTRAIT_SIZE)
+        image.paste(portrait, (PADDING, y + PADDING), portrait)
+
+        x = PORTRAIT_SIZE + 3 * PADDING
+        hero_name = id_to_hero.get(player.hero_id, "Unknown hero")
+        draw.text((x, y + 8), f"{player.username}", font=font, fill=TEXT_COLOR)
+        draw.text((x, y + 34), f"{hero_name} - lvl {player.hero_level}", font=font, fill=TEXT_COLOR)
+
+        x = 330
+        draw.text((x, y + 22), f"{player.kills}/{player.deaths}/{player.assists} ({player.kda:.1f})", font=font, fill=TEXT_COLOR)
+
+        x = 460
+        for item_id in player.items:
+            if item_id not in EMPTY_SLOTS:
+                item = _load_icon(items.get(item_id), ITEM_SIZE)
+                image.paste(item, (x, y + (ROW_HEIGHT - ITEM_SIZE) // 2), item)
+            x += ITEM_SIZE + PADDING
+
+        mmr_change = player.mmr_change or 0
+        mmr_color = MMR_COLORS["up"] if mmr_change >= 0 else MMR_COLORS["down"]
+        draw.text((WIDTH - 130, y + 22), f"{player.mmr} ({mmr_change:+})", font=font, fill=mmr_color)
+
+        y += ROW_HEIGHT
+
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=True)
+
+    return output.getvalue()
+
+
+def _item_ids(match):
+    """
+    Returns the distinct item IDs in a match, without empty slots.
+    """
+
+    return {item_id for player in match.players for item_id in player.items if item_id not in EMPTY_SLOTS}
+
+
+async def load_images(match):
+    """
+    Loads the portraits and item images of a match at the same time.
+    Returns ({hero_id: bytes or None}, {item_id: bytes or None}).
+    An image that fails to load is None and drawn as a placeholder instead of failing the scoreboard.
+    """
+
+    hero_ids = list({player.hero_id for player in match.players})
+    item_ids = list(_item_ids(match))
+
+    with tracing.span("scoreboard images", count=len(hero_ids) + len(item_ids)):
+        results = await asyncio.gather(*[aio_api.get_image_hero_portrait(hero_id) for hero_id in hero_ids],
+                                       *[aio_api.get_image_item(item_id) for item_id in item_ids],
+                                       return_exceptions=True)
+
+    images = []
+    for result in results:
+        if isinstance(result, BaseException):
+            log.error(f"Caught error {result!r} while loading a scoreboard image.")
+            result = None
+        images.append(result)
+
+    return dict(zip(hero_ids, images)), dict(zip(item_ids, images[len(hero_ids):]))
+
+
+def _cached_scoreboard(match):
+    """
+    Returns the scoreboard kept in the image cache or None.
+    """
+
+    cache = api.get_image_cache()
+    if cache == None:
+        return None
+
+    return cache.get(scoreboard_key(match.id))
+
+
+def _render_and_store(match, id_to_hero, portraits, items):
+    """
+    Renders a scoreboard and keeps it in the image cache.
+    Only finished matches are kept since a match in progress still changes.
+    """
+
+    png = render_scoreboard(match, id_to_hero, portraits, items)
+
+    cache = api.get_image_cache()
+    if cache != None and match.status == MATCH_FINISHED:
+        cache.put(scoreboard_key(match.id), png)
+
+    return png
+
+
+def _get_executor():
+    global _executor
+
+    if _executor == None:
+        _executor = ThreadPoolExecutor(max_workers=SCOREBOARD_WORKERS, thread_name_prefix="scoreboard")
+
+    return _executor
+
+
+async def get_scoreboard(match, id_to_hero):
+    """
+    Returns the scoreboard of a MatchDetail as PNG bytes, rendering it in the worker pool if it isn't cached.
+    Returns None if Pillow is not installed.
+    """
+
+    if Image == None:
+        return None
+
+    loop = asyncio.get_running_loop()
+
+    async def render():
+        png = await loop.run_in_executor(_get_executor(), _cached_scoreboard, match)
+        if png != None:
+            return png
+
+        # The worker only draws, the images are all loaded first
+        portraits, items = await load_images(match)
+
+        return await loop.run_in_executor(_get_executor(), _render_and_store, match, id_to_hero, portraits, items)
+
+    # Several people asking for the same match share one render
+    with tracing.span("scoreboard"):
+        return await _flights.do(match.id, render)
@@ -0,0 +1,256 @@
+"""
+Persistent storage for the Fault usernames registered by discord users.
+
+There are two stores with the same methods:
+- SQLiteUserStore keeps registrations in a SQLite table keyed by (guild_id, discord_name)
+  so every change writes a single row. Lookups are answered from an in-memory copy of the table.
+- JSONUserStore keeps the users.json mapping in memory and writes it back behind the commands.
+  Bursts of changes are merged into one atomic write.
+
+"""
+
+# imports
+import json
+import sqlite3
+import threading
+
+from fault_api.files import atomic_write
+
+# Set up logging
+import bot.logger
+log = bot.logger.setup_logger("./bot/fault_bot.log", "user_store")
+
+
+class SQLiteUserStore:
+    """
+    Stores the Fault user registered to each discord user in each guild.
+    The table is read into memory when the store is opened, so lookups never touch the disk.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    guild_id TEXT NOT NULL,
+                    discord_name TEXT NOT NULL,
+                    fault_user TEXT NOT NULL,
+                    PRIMARY KEY (guild_id, discord_name)
+                ) WITHOUT ROWID""")
+
+            # {(guild_id, discord_name): fault_user}
+            self._users = {(guild_id, discord_name): json.loads(fault_user) for guild_id, discord_name, fault_user
+                           in self._connection.execute("SELECT guild_id, discord_name, fault_user FROM users")}
+
+
+    def get(self, guild_id, discord_name):
+        """
+        Returns the Fault user registered to a discord user or None.
+        """
+
+        return self._users.get((str(guild_id), discord_name))
+
+
+    def set(self, guild_id, discord_name, fault_user):
+        """
+        Registers or replaces the Fault user for a discord user.
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO users (guild_id, discord_name, fault_user) VALUES (?, ?, ?)",
+                (str(guild_id), discord_name, json.dumps(fault_user)))
+            self._users[(str(guild_id), discord_name)] = fault_user
+
+
+    def remove(self, guild_id, discord_name):
+        """
+        Removes the registration for a discord user.
+        Returns the Fault user that was removed or None if there was none.
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM users WHERE guild_id = ? AND discord_name = ?",
+                (str(guild_id), discord_name))
+            return self._users.pop((str(guild_id), discord_name), None)
+
+
+    def is_empty(self):
+        """
+        Returns True if nobody is registered.
+        """
+
+        return len(self._users) == 0
+
+
+    def import_dict(self, users_dict):
+        """
+        Adds every registration from a users.json style dict in one transaction.
+        {"guild": {guild_id: {discord_name: fault_user}}}
+        """
+
+        rows = [(str(guild_id), discord_name, json.dumps(fault_user))
+                for guild_id, users in users_dict["guild"].items()
+                for discord_name, fault_user in users.items()]
+
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO users (guild_id, discord_name, fault_user) VALUES (?, ?, ?)", rows)
+            for guild_id, users in users_dict["guild"].items():
+                for discord_name, fault_user in users.items():
+                    self._users[(str(guild_id), discord_name)] = fault_user
+
+        return len(rows)
+
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+
+        with self._lock:
+            self._connection.close()
+
+
+class JSONUserStore:
+    """
+    Keeps the users.json mapping {"guild": {guild_id: {discord_name: fault_user}}} in memory.
+    Lookups never touch the disk.
+    Changes are written back after `delay` seconds so a burst of changes costs one write.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path, delay=2.0):
+        self.path = path
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer = None
+        self._dirty = False
+        self._users = self._load()
+
+
+    def _load(self):
+        """
+        Reads the users file. A missing or broken file starts an empty mapping.
+        """
+
+        try:
+            with open(self.path, "r") as file:
+                users_dict = json.load(file)
+        except (FileNotFoundError, json.decoder.JSONDecodeError) as e:
+            users_dict = {"guild":{}}
+
+        return users_dict
+
+
+    def get(self, guild_id, discord_name):
+        """
+        Returns the Fault user registered to a discord user or None.
+        """
+
+        return self._users["guild"].get(str(guild_id), {}).get(discord_name)
+
+
+    def set(self, guild_id, discord_name, fault_user):
+        """
+        Registers or replaces the Fault user for a discord user.
+        """
+
+        with self._lock:
+            self._users["guild"].setdefault(str(guild_id), {})[discord_name] = fault_user
+            self._schedule_flush()
+
+
+    def remove(self, guild_id, discord_name):
+        """
+        Removes the registration for a discord user.
+        Returns the Fault user that was removed or None if there was none.
+        """
+
+        with self._lock:
+            user = self._users["guild"].get(str(guild_id), {}).pop(discord_name, None)
+            if user != None:
+                self._schedule_flush()
+
+        return user
+
+
+    def is_empty(self):
+        """
+        Returns True if nobody is registered.
+        """
+
+        return not any(self._users["guild"].values())
+
+
+    def import_dict(self, users_dict):
+        """
+        Adds every registration from a users.json style dict.
+        """
+
+        count = 0
+        with self._lock:
+            for guild_id, users in users_dict["guild"].items():
+                self._users["guild"].setdefault(str(guild_id), {}).update(users)
+                count += len(users)
+            self._schedule_flush()
+
+        return count
+
+
+    def _schedule_flush(self):
+        """
+        Starts the write-behind timer unless one is already waiting.
+        Must be called while holding the lock.
+        """
+
+        self._dirty = True
+        if self._timer == None:
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+    def flush(self):
+        """
+        Writes the mapping to disk if it changed.
+        The file is written to a temporary file first and renamed over the old one,
+        so a crash never leaves a half written users file.
+        If the write fails the changes stay pending and another write is scheduled.
+        """
+
+        # Only one write at a time so an older snapshot can't replace a newer one
+        with self._write_lock:
+            with self._lock:
+                self._timer = None
+                if not self._dirty:
+                    return
+                json_data = json.dumps(self._users, indent=4)
+                # Changes made while writing mark the store dirty again
+                self._dirty = False
+
+            try:
+                atomic_write(self.path, json_data, fsync=True)
+            except OSError as e:
+                log.error(f"Caught error {e!r} while writing {self.path}. Will try again.")
+                with self._lock:
+                    self._schedule_flush()
+
+
+    def close(self):
+        """
+        Writes any pending changes.
+        """
+
+        with self._lock:
+            if self._timer != None:
+                self._timer.cancel()
+
+        self.flush()
@@ -0,0 +1,76 @@
+"""
+Contains the interactive message components used by the slash commands.
+
+"""
+
+# imports
+import discord
+
+# Set up logging
+import bot.logger
+log = bot.logger.setup_logger("./bot/fault_bot.log", "views")
+
+
+class MatchPageView(discord.ui.View):
+    """
+    Previous and Next buttons that page through the matches of a MatchPages.
+    Only the user who ran the command can turn the pages.
+    """
+
+    def __init__(self, pages, author_id, timeout=300):
+        super().__init__(timeout=timeout)
+        self.pages = pages
+        self.author_id = author_id
+        self.index = 0
+
+        # Callbacks are assigned instead of using the @discord.ui.button decorator
+        # because its argument order changed between discord.py 2.0 builds
+        self.previous_button = discord.ui.Button(label="Previous", style=discord.ButtonStyle.secondary)
+        self.previous_button.callback = self.previous
+        self.next_button = discord.ui.Button(label="Next", style=discord.ButtonStyle.primary)
+        self.next_button.callback = self.next
+
+        self.add_item(self.previous_button)
+        self.add_item(self.next_button)
+        self._update_buttons()
+
+
+    def _update_buttons(self):
+        self.previous_button.disabled = self.index <= 0
+        self.next_button.disabled = self.index >= len(self.pages) - 1
+
+
+    async def interaction_check(self, interaction):
+        return interaction.user.id == self.author_id
+
+
+    async def previous(self, interaction):
+        await self.show(interaction, self.index - 1)
+
+
+    async def next(self, interaction):
+        await self.show(interaction, self.index + 1)
+
+
+    async def show(self, interaction, index):
+        """
+        Builds the page if it hasn't been shown before and edits the message to show it.
+        The message is edited in the answer to the click.
+        """
+
+        self.index = max(0, min(index, len(self.pages) - 1))
+        self._update_buttons()
+
+        try:
+            embeds = await self.pages.page(self.index)
+        except Exception as e:
+            log.error(f"Caught error {e!r} while building page {self.index + 1}.")
+            await interaction.response.edit_message(content=f"I couldn't load match {self.index + 1}. Please try again in a minute.",
+                                                    embeds=[], view=self)
+            return
+
+        await interaction.response.edit_message(content=self.pages.label(self.index), embeds=embeds, view=self)
+
+
+    async def on_timeout(self):
+        self.pages.cancel()
@@ -0,0 +1,1302 @@
+''' 
+Fault Public API
+Written by: Chris Quartararo
+
+This file is a list of all the fault website API links for reference.
+When imported it will return dictionaries of these useful things.
+
+The current functionality allows for the following methods:
+- Getting a player ID by username
+- Get the previous matches of a player
+- Get the hero performance data for a player
+- Get the MMR/ELO information for a player
+- Get item list
+
+An asyncio version of the same functions lives in fault_api.aio.
+
+To Do:
+- hero win statistics and pick rates
+- Document aspect labels
+
+
+'''
+
+
+## Import dependencies
+import urllib3
+import json
+
+# orjson is optional. It decodes responses several times faster than the json module.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+import sqlite3
+import threading
+import time
+
+from fault_api.cache import ResponseCache, MISSING, endpoint_name
+from fault_api.store import StaticStore
+from fault_api.images import ImageCache
+from fault_api.registry import GameRegistry
+from fault_api import models
+from fault_api.models import User, EloData, MatchSummary, MatchDetail, PlayerLine
+from fault_api.singleflight import SingleFlight
+from fault_api.ratelimit import RateLimiter, request_priority, INTERACTIVE, BACKGROUND
+from fault_api.resilience import APIError, CircuitOpenError, CircuitBreaker, Deadline, backoff_delay
+from fault_api.metrics import Metrics
+from fault_api import tracing
+
+
+## Connection settings
+API_URL = "https://api.playfault.com"
+
+# One pool manager is shared by every request so the TCP+TLS connection to the API is reused.
+POOL_MAXSIZE = 10
+CONNECT_TIMEOUT = 3.0
+READ_TIMEOUT = 10.0
+
+# Failed GETs are retried with jittered exponential backoff until REQUEST_DEADLINE seconds have passed
+# (see fault_api.resilience). After BREAKER_THRESHOLD failed requests in a row an endpoint fails fast
+# for BREAKER_COOLDOWN seconds, serving stale cached data where there is some.
+REQUEST_DEADLINE = 15.0
+RETRIES = 3
+RETRY_BACKOFF = 0.3
+RETRY_BACKOFF_MAX = 4.0
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+_http = None
+
+# Decoded responses are cached per endpoint (see fault_api.cache). Set to None to disable.
+_cache = ResponseCache()
+
+# Identical requests made at the same time share one trip to the website (see fault_api.singleflight)
+_flights = SingleFlight()
+
+# Requests to the website are rate limited, slash commands first (see fault_api.ratelimit). Set to None to disable.
+_limiter = RateLimiter()
+
+_breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+
+# Request counts, latencies, errors and cache results per endpoint (see fault_api.metrics). Set to None to disable.
+_metrics = Metrics()
+
+# Static game data is also kept on disk (see fault_api.store) so restarts start warm.
+# The store is opened on first use. Set to None to disable.
+STATIC_ENDPOINTS = {"getStatsPerHero", "items", "aspects", "heroData"}
+STATIC_STORE_PATH = "./bot/static_data.db"
+_static_store = MISSING
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+# Hero, item and aspect records, loaded on first use by get_registry()
+REGISTRY_ENDPOINTS = {"getStatsPerHero", "items", "aspects"}
+_registry = None
+
+# Images from the image CDN are kept in a size bounded on-disk cache (see fault_api.images).
+# The cache is opened on first use. Set to None to disable.
+IMAGE_CACHE_DIR = "./bot/images"
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_image_cache = MISSING
+_image_flights = SingleFlight()
+
+
+## Utilities
+def _decode_json(json_data):
+    """
+    Decodes json binary data and returns a dictionary.
+    Accepts bytes, bytearray or memoryview straight from the response buffer.
+    Uses orjson when it is installed (see set_json_decoder).
+    """
+
+    return _json_decoder(json_data)
+
+
+def _decode_json_stdlib(json_data):
+    """
+    Decodes json with the standard library.
+    json.loads reads bytes and bytearray directly but a memoryview has to be copied first.
+    """
+
+    if isinstance(json_data, memoryview):
+        json_data = json_data.tobytes()
+
+    return json.loads(json_data)
+
+
+JSON_DECODERS = {"json": _decode_json_stdlib}
+if orjson != None:
+    JSON_DECODERS["orjson"] = orjson.loads
+
+_json_decoder = JSON_DECODERS.get("orjson", _decode_json_stdlib)
+
+
+def set_json_decoder(decoder):
+    """
+    Sets the function used to decode responses.
+    Takes a name from JSON_DECODERS ("json" or "orjson") or any function that takes bytes.
+    Both raise a ValueError for data that isn't JSON.
+    """
+
+    global _json_decoder
+
+    if isinstance(decoder, str):
+        decoder = JSON_DECODERS[decoder]
+    _json_decoder = decoder
+
+    return _json_decoder
+
+
+def _query_website(url):
+    """
+    Returns a JSON object from a website query.
+    Responses are served from the response cache when possible.
+    If the website fails, a stale cached response is returned if there is one.
+    Inside a trace the lookup is a span named after the endpoint (see fault_api.tracing).
+    """
+
+    with tracing.span(endpoint_name(url)):
+        if _cache != None:
+            page_json = _cache.get(url)
+            _record_cache(url, "miss" if page_json is MISSING else "hit")
+            if page_json is not MISSING:
+                return page_json
+
+        try:
+            # Callers asking for the same URL at the same time share one request
+            page_json = _flights.do(url, lambda: _load(url))
+        except APIError as e:
+            page_json = _cache.get_stale(url) if _cache != None else MISSING
+            if page_json is MISSING:
+                raise
+            _record_cache(url, "stale")
+
+    return page_json
+
+
+def _record_cache(url, result):
+    """
+    Records a response cache lookup in the metrics and on the current span.
+    """
+
+    if _metrics != None:
+        _metrics.record_cache(endpoint_name(url), result)
+    tracing.span_set(cache=result)
+
+
+def _load(url):
+    """
+    Gets a URL from the static data store or the website and puts the result in the response cache.
+    Player and match responses are turned into records (see fault_api.models) before they are cached.
+    """
+
+    if endpoint_name(url) in STATIC_ENDPOINTS and get_static_store() != None:
+        page_json = _query_static(url)
+    else:
+        page_json = models.build(url, _fetch_json(url))
+
+    if _cache != None:
+        _cache.put(url, page_json)
+
+    return page_json
+
+
+def _fetch_response(url, headers=None):
+    """
+    Requests a URL from the website and returns the response.
+    Waits for the rate limiter and uses the shared pool manager so connections to the API are reused.
+    Connection errors and RETRY_STATUSES are retried until REQUEST_DEADLINE.
+    Raises APIError if every attempt failed and CircuitOpenError if the endpoint is failing fast.
+    """
+
+    endpoint = endpoint_name(url)
+    if _breaker != None and not _breaker.allow(endpoint):
+        if _metrics != None:
+            _metrics.record_error(endpoint, "circuit_open")
+        raise CircuitOpenError(f"{endpoint} is failing, not requesting {url}")
+
+    http = _get_pool_manager()
+    deadline = Deadline(REQUEST_DEADLINE)
+    attempt = 0
+
+    try:
+        while True:
+            if _limiter != None:
+                with tracing.span("rate limit"):
+                    _limiter.acquire()
+
+            remaining = deadline.remaining()
+            timeout = urllib3.Timeout(connect=min(CONNECT_TIMEOUT, remaining), read=min(READ_TIMEOUT, remaining))
+            start = time.perf_counter()
+            try:
+                with tracing.span("GET", attempt=attempt) as request_span:
+                    page = http.request("GET", url, headers=headers, timeout=timeout, retries=False)
+                    request_span.set(status=page.status)
+                if _metrics != None:
+                    _metrics.record_request(endpoint, page.status, time.perf_counter() - start)
+                if page.status not in RETRY_STATUSES:
+                    if _breaker != None:
+                        _breaker.record_success(endpoint)
+                    return page
+                error = APIError(f"{url} returned status {page.status}")
+                if _metrics != None:
+                    _metrics.record_error(endpoint, "status")
+            except urllib3.exceptions.HTTPError as e:
+                error = APIError(f"{url} failed: {e}")
+                if _metrics != None:
+                    _metrics.record_error(endpoint, "connection")
+
+            delay = backoff_delay(attempt, RETRY_BACKOFF, RETRY_BACKOFF_MAX)
+            if attempt >= RETRIES or delay >= deadline.remaining():
+                if _breaker != None:
+                    _breaker.record_failure(endpoint)
+                raise error
+
+            time.sleep(delay)
+            attempt += 1
+    finally:
+        # Any other exception must not leave a half open trial taken forever
+        if _breaker != None:
+            _breaker.release(endpoint)
+
+
+def _fetch_json(url):
+    """
+    Requests a URL from the website and returns the decoded JSON.
+    Raises APIError if the website answers with something that isn't JSON (like an error page).
+    """
+
+    page = _fetch_response(url)
+    page_data = page.data
+    page_json = _decode_response(url, page.status, page_data)
+
+    return page_json
+
+
+def _decode_response(url, status, page_data):
+    """
+    Decodes a response body, raising APIError for server errors and bodies that are not JSON.
+    """
+
+    if _metrics != None:
+        _metrics.record_bytes(endpoint_name(url), len(page_data))
+
+    if status >= 500:
+        if _metrics != None:
+            _metrics.record_error(endpoint_name(url), "status")
+        raise APIError(f"{url} returned status {status}")
+
+    try:
+        page_json = _decode_json(page_data)
+    except ValueError as e:
+        if _metrics != None:
+            _metrics.record_error(endpoint_name(url), "invalid_json")
+        raise APIError(f"{url} returned status {status} with a body that is not JSON") from e
+
+    return page_json
+
+
+def _query_image(url):
+    """
+    Returns an image from the image CDN as bytes, or None if there is no image at the URL.
+    Images are downloaded once and then served from the on-disk image cache.
+    """
+
+    cache = get_image_cache()
+    if cache != None:
+        data = cache.get(url)
+        if data != None:
+            return data
+
+    # Callers asking for the same image at the same time share one download
+    return _image_flights.do(url, lambda: _load_image(url))
+
+
+def _load_image(url):
+    """
+    Downloads an image through the shared pool and puts it in the image cache.
+    """
+
+    page = _fetch_response(url)
+
+    if page.status in (403, 404):
+        return None
+    if page.status >= 400:
+        raise APIError(f"{url} returned status {page.status}")
+
+    data = page.data
+    if _metrics != None:
+        _metrics.record_bytes(endpoint_name(url), len(data))
+    cache = get_image_cache()
+    if cache != None:
+        cache.put(url, data)
+
+    return data
+
+
+def _query_static(url):
+    """
+    Returns a JSON object for static game data from the on-disk store.
+    Only goes to the website if the URL has never been stored.
+    Stale entries are served as is and refreshed in the background.
+    """
+
+    store = get_static_store()
+    entry = store.get(url)
+
+    if entry == None:
+        page = _fetch_response(url)
+        page_json = _decode_response(url, page.status, page.data)
+        if page.status == 200:
+            store.put(url, page.data, page.headers.get("ETag"), page.headers.get("Last-Modified"))
+        return page_json
+
+    if store.is_stale(entry):
+        _schedule_refresh(url)
+
+    return _decode_json(entry.body)
+
+
+def _refresh_static(url):
+    """
+    Revalidates a stored response with a conditional request.
+    A 304 marks the stored copy fresh, a 200 replaces it and updates the response cache.
+    New hero, item or aspect data also rebuilds the game registry.
+    """
+
+    store = get_static_store()
+    if store == None:
+        return
+
+    entry = store.get(url)
+    headers = {}
+    if entry != None and entry.etag != None:
+        headers["If-None-Match"] = entry.etag
+    if entry != None and entry.last_modified != None:
+        headers["If-Modified-Since"] = entry.last_modified
+
+    page = _fetch_response(url, headers=headers)
+
+    if page.status == 304:
+        store.touch(url)
+    elif page.status == 200:
+        if _metrics != None:
+            _metrics.record_bytes(endpoint_name(url), len(page.data))
+        page_json = _decode_json(page.data)
+        store.put(url, page.data, page.headers.get("ETag"), page.headers.get("Last-Modified"))
+        if _cache != None:
+            _cache.put(url, page_json)
+        if _registry != None and endpoint_name(url) in REGISTRY_ENDPOINTS:
+            refresh_registry()
+
+
+def _schedule_refresh(url):
+    """
+    Refreshes a static URL on a background thread unless a refresh is already running.
+    """
+
+    with _refreshing_lock:
+        if url in _refreshing:
+            return
+        _refreshing.add(url)
+
+    def refresh():
+        try:
+            with request_priority(BACKGROUND):
+                _refresh_static(url)
+        except Exception as e:
+            pass  # The stored copy keeps being served and the next lookup tries again
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(url)
+
+    threading.Thread(target=refresh, name=f"refresh {url}", daemon=True).start()
+
+
+def _create_pool_manager(maxsize=POOL_MAXSIZE,
+                         connect_timeout=CONNECT_TIMEOUT,
+                         read_timeout=READ_TIMEOUT):
+    """
+    Creates a pool manager for website queries.
+    Connections are kept alive and reused between requests to the same host.
+    Retries are handled by _fetch_response so the pool itself never retries.
+    """
+
+    timeout = urllib3.Timeout(connect=connect_timeout, read=read_timeout)
+
+    return urllib3.PoolManager(maxsize=maxsize,
+                               block=False,
+                               timeout=timeout,
+                               retries=False,
+                               headers={"Connection": "keep-alive"})
+
+
+def _get_pool_manager():
+    """
+    Returns the shared pool manager, creating it if it does not exist yet.
+    """
+
+    global _http
+
+    if _http is None:
+        _http = _create_pool_manager()
+
+    return _http
+
+
+def configure_pool(**kwargs):
+    """
+    Replaces the shared pool manager with one built from the given settings.
+    Accepts the keyword arguments of _create_pool_manager().
+    """
+
+    global _http
+
+    old_http = _http
+    _http = _create_pool_manager(**kwargs)
+    if old_http is not None:
+        old_http.clear()
+
+    return _http
+
+
+def get_cache():
+    """
+    Returns the response cache used by _query_website or None if caching is disabled.
+    """
+
+    return _cache
+
+
+def set_cache(cache):
+    """
+    Replaces the response cache used by _query_website.
+    Pass None to disable caching.
+    """
+
+    global _cache
+    _cache = cache
+
+    return _cache
+
+
+def get_rate_limiter():
+    """
+    Returns the rate limiter for requests to the website or None if rate limiting is disabled.
+    """
+
+    return _limiter
+
+
+def set_rate_limiter(limiter):
+    """
+    Replaces the rate limiter for requests to the website.
+    Pass None to disable rate limiting.
+    """
+
+    global _limiter
+    _limiter = limiter
+
+    return _limiter
+
+
+def get_circuit_breaker():
+    """
+    Returns the circuit breaker for requests to the website or None if it is disabled.
+    """
+
+    return _breaker
+
+
+def set_circuit_breaker(breaker):
+    """
+    Replaces the circuit breaker for requests to the website.
+    Pass None to disable it.
+    """
+
+    global _breaker
+    _breaker = breaker
+
+    return _breaker
+
+
+def get_metrics():
+    """
+    Returns the request metrics or None if they are disabled.
+    """
+
+    return _metrics
+
+
+def set_metrics(metrics):
+    """
+    Replaces the request metrics.
+    Pass None to disable them.
+    """
+
+    global _metrics
+
+    if metrics != None:
+        metrics.add_collector(_pool_connection_stats)
+    _metrics = metrics
+
+    return _metrics
+
+
+def _pool_connection_stats():
+    """
+    Returns how many connections the shared pool manager opened and how many requests reused one.
+    These restart from zero when configure_pool() replaces the pool manager.
+    """
+
+    http = _http
+    if http is None:
+        return []
+
+    created = 0
+    requests = 0
+    for key in list(http.pools.keys()):
+        try:
+            pool = http.pools[key]
+        except KeyError as e:
+            continue  # Dropped from the pool manager since the keys were listed
+        created += pool.num_connections
+        requests += pool.num_requests
+
+    return [("fault_api_connections_total", {"client": "urllib3", "event": "created"}, created),
+            ("fault_api_connections_total", {"client": "urllib3", "event": "reused"}, max(0, requests - created))]
+
+
+_metrics.add_collector(_pool_connection_stats)
+
+
+def get_static_store():
+    """
+    Returns the on-disk store for static game data, opening it on first use.
+    Returns None if the store is disabled or could not be opened.
+    """
+
+    global _static_store
+
+    if _static_store is MISSING:
+        try:
+            _static_store = StaticStore(STATIC_STORE_PATH)
+        except sqlite3.Error as e:
+            _static_store = None
+
+    return _static_store
+
+
+def set_static_store(store):
+    """
+    Replaces the on-disk store for static game data.
+    Pass None to disable it.
+    """
+
+    global _static_store
+    _static_store = store
+
+    return _static_store
+
+
+def get_image_cache():
+    """
+    Returns the on-disk image cache, opening it on first use.
+    Returns None if the cache is disabled or could not be opened.
+    """
+
+    global _image_cache
+
+    if _image_cache is MISSING:
+        try:
+            _image_cache = ImageCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES)
+        except (OSError, sqlite3.Error) as e:
+            _image_cache = None
+
+    return _image_cache
+
+
+def set_image_cache(cache):
+    """
+    Replaces the on-disk image cache.
+    Pass None to disable it.
+    """
+
+    global _image_cache
+    _image_cache = cache
+
+    return _image_cache
+
+
+def warm_static_data():
+    """
+    Loads every stored static response into the response cache.
+    Stale entries and static endpoints that were never stored are refreshed in the background.
+    Call once at startup so the first commands don't wait on the website.
+    """
+
+    store = get_static_store()
+    if store == None:
+        return
+
+    stored_urls = store.urls()
+    for url in stored_urls:
+        entry = store.get(url)
+        if _cache != None:
+            _cache.put(url, _decode_json(entry.body))
+        if store.is_stale(entry):
+            _schedule_refresh(url)
+
+    for url in [f"{API_URL}/getStatsPerHero", f"{API_URL}/items", f"{API_URL}/aspects"]:
+        if url not in stored_urls:
+            _schedule_refresh(url)
+
+
+def _startup():
+    """
+    Creates global variables.
+    """
+
+    _get_pool_manager()
+
+
+def _player_id(user):
+    """
+    Returns the player ID for a User (from get_user), a user dict or a bare player ID.
+    """
+
+    if isinstance(user, User):
+        return user.id
+    if isinstance(user, dict):
+        return user['id']
+
+    return user
+
+
+def _check_user_request_response(page_dict):
+    """
+    Check to see if the request for a player was successful.
+    Returns the user JSON if successful.
+    Returns None if unsuccessful.
+    """
+
+    if page_dict['success']:
+        user = page_dict['players'][0]
+    else:
+        user = None
+    
+    return user
+
+
+## Main
+def get_hero_play_stats():
+    """
+    Gets the stats per hero in the format https://api.playfault.com/getStatsPerHero
+    Returns a JSON object with the HeroID as the key.
+    
+    JSON
+    {
+        "heroes": {
+            "{heroName}": {
+                "wins": 0,
+                "games": 0,
+                "averageGameTime": "string",
+                "averageLevel": 0,
+                "kills": 0,
+                "deaths": 0,
+                "assists": 0,
+                "damage": 0,
+                "damageTaken": 0,
+                "gold": 0,
+                "pickRate": 0.0,
+                "winRate": 0.0,
+                "kda": 0.0,
+                "killsPerMin": 0.0,
+                "deathsPerMin": 0.0,
+                "assistsPerMin": 0.0,
+                "damagePerMin": 0.0,
+                "damageTakenPerMin": 0.0,
+                "goldPerMin": 0.0,
+                "Id": 0
+            }
+        }
+    }
+    """
+
+    page_link = f'{API_URL}/getStatsPerHero'
+    page_dict = _query_website(page_link)
+    
+    return page_dict['heroes']
+
+
+def get_hero_dicts(hero_stats = None):
+    """
+    Returns dictionaries mapping hero names to IDs and hero IDs to names.
+    Builds them from hero_stats if given, otherwise they come from the game registry.
+    """
+
+    if hero_stats != None:
+        return _build_hero_dicts(hero_stats)
+
+    registry = get_registry()
+
+    return registry.hero_to_id, registry.id_to_hero
+
+
+def get_registry():
+    """
+    Returns the GameRegistry of heroes, items and aspects (see fault_api.registry).
+    It is loaded on first use and kept until refresh_registry() swaps in a new one.
+    """
+
+    if _registry == None:
+        refresh_registry()
+
+    return _registry
+
+
+def loaded_registry():
+    """
+    Returns the current GameRegistry without loading it, or None if it hasn't been loaded.
+    """
+
+    return _registry
+
+
+def refresh_registry(hero_stats = None, items = None, aspects = None):
+    """
+    Builds a new GameRegistry and swaps it in for the current one.
+    Fetches any of the hero stats, items and aspects that are not given.
+    Code holding the old registry keeps working with it.
+    """
+
+    if hero_stats == None:
+        hero_stats = get_hero_play_stats()
+    if items == None:
+        items = get_items()
+    if aspects == None:
+        aspects = get_aspects()
+
+    return set_registry(GameRegistry.from_api(hero_stats, items, aspects))
+
+
+def set_registry(registry):
+    """
+    Replaces the GameRegistry returned by get_registry().
+    """
+
+    global _registry
+    _registry = registry
+
+    return _registry
+
+
+def _build_hero_dicts(hero_stats):
+    """
+    Creates a dictionary with the hero ID as keys and their names as values and the reverse.
+    """
+    
+    hero_to_id = {}
+    id_to_hero = {}
+
+    for key, val in hero_stats.items():
+        id_to_hero[val["Id"]] = key
+        hero_to_id[key] = val["Id"]
+    
+    return hero_to_id, id_to_hero
+
+
+def get_user(fault_username):
+    """
+    Gets the username and ID of the first fault user matching a search string.
+    Returns a User or None if no user is found.
+
+    JSON
+    [
+        {
+            "id": 0,
+            "username": "string"
+        }
+    ]
+    """
+
+    page_link = f"{API_URL}/searchUsers/{fault_username}"
+    users = _query_website(page_link)
+
+    if len(users) == 0:
+        return None
+
+    return users[0]
+
+
+def get_top_players(user):
+    """ 
+    TODO update this method to be useful
+    OLD GET_USERS() METHOD. NEEDS REWORK FOR TOP PLAYERS LIST
+    Returns a player's information from a username as a dict.
+    Returns None if the username is not found.
+
+    JSON
+    {
+        "success": true,
+        "players": 
+        [
+            {
+                "rank": 0,
+                "id": 0,
+                "name": "string",
+                "elo": 0.0,
+                "eloType": "string",
+                "winRate": 0.0,
+                "totalGames": 0,
+                "totalKills": 0,
+                "totalDeaths": 0,
+                "totalAssists": 0,
+                "mostPlayedHeroes": 
+                [
+                    {
+                        "HeroID": 0,
+                        "Count": 0
+                    },
+                    {
+                        "HeroID": 0,
+                        "Count": 0
+                    }
+                ]
+            }
+        ]
+    }
+    """
+    
+    page_link = f'{API_URL}/getTopPlayers/1/{user}'
+    page_dict = _query_website(page_link)
+    
+    user = _check_user_request_response(page_dict)
+
+    return user
+
+
+def get_user_id(user, get_user_fn=get_user):
+    """
+    TODO evaluate if this method needs to be here
+    Returns a player's ID given a username.
+    """
+
+    user = get_user_fn(user)
+    if user == None:
+        return user
+    
+    return _player_id(user)
+
+
+def get_hero_info(hero):
+    """
+    Gets the information for a given hero.
+
+    {
+        "info": {
+            "basicRange": "string",
+            "niche": "string",
+            "role": "string",
+            "damageType": "string",
+            "description": "string"
+        },
+        "health": 0,
+        "healthPerLevel": 0,
+        "healthRegen": 0,
+        "healthRegenPerLevel": 0,
+        "mana": 0,
+        "manaPerLevel": 0,
+        "manaRegen": 0,
+        "manaRegenPerLevel": 0,
+        "physicalArmor": 0,
+        "physicalArmorPerLevel": 0,
+        "energyArmor": 0,
+        "energyArmorPerLevel": 0,
+        "movespeed": 0,
+        "lmb": {
+            "name": "string",
+            "description": "string",
+            "anyOtherAttribute": 0
+        },
+        "rmb": {
+            "name": "string",
+            "description": "string",
+            "anyOtherAttribute": 0
+        },
+        "q": {
+            "name": "string",
+            "description": "string",
+            "anyOtherAttribute": 0
+        },
+        "e": {
+            "name": "string",
+            "description": "string",
+            "anyOtherAttribute": 0
+        },
+        "r": {
+            "name": "string",
+            "description": "string",
+            "anyOtherAttribute": 0
+        },
+        "p": {
+            "name": "string",
+            "description": "string",
+            "anyOtherAttribute": 0
+        }
+    }
+    """
+
+    page_link = f"{API_URL}/heroData/{hero}"
+    page_json = _query_website(page_link)
+
+    return page_json
+
+
+def get_items():
+    """
+    Gets the list of items from the website.
+    Returns a dict.
+
+    {
+        "id": 
+        {
+            "id": 0,
+            "name": "string",
+            "parents": 
+            [
+                0
+            ],
+            "children": 
+            [
+                0
+            ],
+            "treeId": 0,
+            "attributes": 
+            [
+                {
+                    "AttributeName": "string",
+                    "Value": 0,
+                    "RankValue": 0,
+                    "UIDetails": "string"
+                }
+            ],
+            "passive": "string",
+            "active": "string",
+            "cost": "string",
+            "color": "string"
+        }
+    }
+    """
+
+    # Gets information from the website
+    items_link = f"{API_URL}/items"
+    items = _query_website(items_link)
+
+    return items
+
+
+def get_aspects():
+    """
+    Gets the list of aspects.
+    Returns a dict.
+
+    [
+        {
+            "name": "string",
+            "color": "string",
+            "effect1": "string",
+            "effect2": "string"
+        }
+    ]
+    """
+
+    # Gets information from the website
+    aspects_link = f"{API_URL}/aspects"
+    aspects = _query_website(aspects_link)
+
+    return aspects
+
+
+def get_matches(user, n = 1):
+    """
+    Gets the last match for a given player.
+    Returns a MatchSummary or None if no matches were found.
+    The response looks like this before it is turned into records:
+
+    {
+        "success": true,
+        "matches": 
+        [
+            {
+                "id": 0,
+                "winner": 0,
+                "timeLength": "string",
+                "startDateTime": "string",
+                "status": 0,
+                "players": 
+                [
+                    {
+                        "playerId": 0,
+                        "team": 0,
+                        "heroId": 0,
+                        "heroLevel": 0,
+                        "kills": 0,
+                        "deaths": 0,
+                        "assists": 0,
+                        "heroDamage": 0,
+                        "damageTaken": 0,
+                        "gold": 0,
+                        "card1": 0,
+                        "card2": 0,
+                        "item1": 0,
+                        "item2": 0,
+                        "item3": 0,
+                        "item4": 0,
+                        "item5": 0,
+                        "item6": 0,
+                        "cs": 0,
+                        "username": "string",
+                        "mmr": 0,
+                        "mmrChange": 0
+                    }
+                ]
+            }
+        ]
+    }
+    """
+    
+    # Check if the user is good
+    if user == None:
+        return user
+
+    matches = get_recent_matches(user, n)
+
+    if len(matches) == 0:
+        return None
+
+    return matches[0]
+
+
+def get_recent_matches(user, n = 1):
+    """
+    Gets the last n matches for a given player in one request.
+    Returns a tuple of MatchSummary, newest first. See get_matches for the response.
+    """
+
+    page_link = f'{API_URL}/getMatches/{_player_id(user)}/{n}'
+    matches = _query_website(page_link)
+
+    return matches
+
+
+def get_match_data(match_id):
+    """
+    Gets match data from the website.
+    Returns a MatchDetail built from this response:
+
+    {
+        "ID": 798209,
+        "Winner": 0,
+        "StartDateTime": "2022-03-19T19:02:28.000Z",
+        "TimeLength": "00:32:37",
+        "Status": 2,
+        "CustomMatch": 0,
+        "MatchType": 0,
+        "Players": [
+            {
+                "PlayerID": 29016,
+                "Team": 1,
+                "HeroID": 25,
+                "HeroLevel": 15,
+                "Kills": 7,
+                "Deaths": 10,
+                "Assists": 7,
+                "HeroDamage": 11092,
+                "MinionDamage": 20550,
+                "StructureDamage": 127,
+                "DamageTaken": 26353,
+                "Healing": 0,
+                "SelfHealing": 0,
+                "Shielding": 0,
+                "SelfShielding": 0,
+                "UnusedFavor": 0,
+                "RedFavor": 7,
+                "WhiteFavor": 0,
+                "BlackFavor": 0,
+                "BlueFavor": 0,
+                "GreenFavor": 0,
+                "WardsPlaced": 5,
+                "Raptors": 0,
+                "Primes": 1,
+                "StructuresDestroyed": 1,
+                "Gold": 10252,
+                "Card1": 6,
+                "Card2": 0,
+                "Item1": -1,
+                "Item2": 74,
+                "Item3": 145,
+                "Item4": 135,
+                "Item5": 5,
+                "Item6": 87,
+                "CS": 96,
+                "Username": "qchrisd",
+                "MMR": 1264,
+                "MMRChange": -32
+            }
+        ]
+    }
+    """
+
+    page_link = f'{API_URL}/getMatchData/{match_id}'
+    match = _query_website(page_link)
+
+    return match
+
+
+def get_player_hero_stats(user):
+    """
+    Gets hero statistics for a specified user.
+    Returns None if the player is not found.
+
+    {
+        "heroes": 
+        {
+            heroID: 
+            {
+                "wins": 0,
+                "games": 0,
+                "kills": 0,
+                "deaths": 0,
+                "assists": 0
+            }
+        }
+    }
+    """
+
+    # Check if the user is good
+    if user == None:
+        return user
+    else:
+        user_id = _player_id(user)
+    
+    # Collect info from Fault website and convert json to dict
+    page_link = f'{API_URL}/getPlayerHeroStats/{user_id}'
+    page_dict = _query_website(page_link)
+    player_hero_stats = page_dict["heroes"]
+
+    return player_hero_stats
+
+
+def get_elo(user):
+    """
+    Gets the MMR and ELO information for a user or player ID.
+    Returns an EloData built from this response, or None if no user is given.
+
+    JSON
+    {
+        "id": 0,
+        "username": "string",
+        "eloTitle": "string",
+        "MMR": 0,
+        "ranking": 0,
+        "placementGamesRemain": 0
+    }
+    """
+
+    # Check if the user is good
+    if user == None:
+        return user
+    else:
+        user_id = _player_id(user)
+
+    # Gets the information from the website
+    page_link = f'{API_URL}/getEloData/{user_id}'
+    page_json = _query_website(page_link)
+
+    return page_json
+
+
+## Image API
+# The image_link functions return the CDN link (for embeds, where discord downloads the image itself).
+# The get_image functions return the image as bytes from the on-disk image cache, or None if there is no such image.
+def image_link_hero_ability(hero, ability):
+    """
+    Returns the link to the png icon of a hero ability.
+    """
+
+    return f"{API_URL}/imagecdn/abilities/{hero}/{ability}.png"
+
+
+def image_link_item(item_id):
+    """
+    Returns the link to the jpg image of an item.
+    """
+
+    return f"{API_URL}/imagecdn/items/{item_id}.jpg"
+
+
+def image_link_hero_portrait(hero_id):
+    """
+    Returns the link to the jpg portrait of a hero.
+    """
+
+    return f"{API_URL}/imagecdn/portraits/{hero_id}.jpg"
+
+
+def get_image_hero_ability(hero, ability):
+    """
+    Gets the icon of a hero ability.
+    Returns png bytes or None.
+    """
+
+    return _query_image(image_link_hero_ability(hero, ability))
+
+
+def get_image_item(item_id):
+    """
+    Gets the image of an item.
+    Returns jpg bytes or None.
+    """
+
+    return _query_image(image_link_item(item_id))
+
+
+def get_image_hero_portrait(hero_id):
+    """
+    Gets the portrait of a hero.
+    Returns jpg bytes or None.
+    """
+
+    return _query_image(image_link_hero_portrait(hero_id))
+
+
+def get_player_avatar(user):
+    """
+    Gets the avatar of the given user.
+    Accepts a User, a user dict or a bare player ID (like PlayerLine.player_id).
+    Returns a dict with avatarId and avatarURI
+
+    {
+        "avatarId": 0,
+        "avatarURI": "https://api.playfault.com/imagecdn/avatars/{avatarId}.jpg"
+    }
+    """
+
+    if user == None:
+        return None
+
+    page_link = f"{API_URL}/userAvatar/{_player_id(user)}"
+    page_json = _query_website(page_link)
+
+    return page_json
+
+
+if __name__ == '__main__':
+    print("File called directly.")
+    _startup()
+    print(get_user("bbbbbbbbb"))
+else:
+    _startup()
\ No newline at end of file
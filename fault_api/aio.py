@@ -0,0 +1,464 @@
+'''
+Fault Public API (asyncio)
+
+This file mirrors the functions in fault_api but awaits the website instead of blocking.
+All requests share one aiohttp ClientSession so connections to the API are reused.
+Use these from coroutines (like the slash commands) so the event loop is never stalled.
+
+'''
+
+
+## Import dependencies
+import asyncio
+import time
+import aiohttp
+
+import fault_api
+from fault_api import (API_URL,
+                       APIError,
+                       CircuitOpenError,
+                       _decode_response,
+                       _check_user_request_response,
+                       _record_cache,
+                       _player_id)
+from fault_api.cache import MISSING, endpoint_name
+from fault_api import models
+from fault_api import tracing
+from fault_api.registry import GameRegistry
+from fault_api.singleflight import AsyncSingleFlight
+from fault_api.resilience import Deadline, backoff_delay
+
+
+_session = None
+
+# Identical requests made at the same time share one trip to the website (see fault_api.singleflight)
+_flights = AsyncSingleFlight()
+
+
+## Utilities
+def _create_session():
+    """
+    Creates a client session for website queries.
+    Uses the same pool size and timeouts as the blocking pool manager.
+    """
+
+    timeout = aiohttp.ClientTimeout(sock_connect=fault_api.CONNECT_TIMEOUT,
+                                    sock_read=fault_api.READ_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit_per_host=fault_api.POOL_MAXSIZE)
+
+    return aiohttp.ClientSession(timeout=timeout, connector=connector, trace_configs=[_connection_trace()])
+
+
+def _connection_trace():
+    """
+    Returns a trace config that counts connections opened and reused by the session (see fault_api.metrics).
+    """
+
+    async def created(session, context, params):
+        metrics = fault_api.get_metrics()
+        if metrics != None:
+            metrics.record_connection("aiohttp", reused=False)
+
+    async def reused(session, context, params):
+        metrics = fault_api.get_metrics()
+        if metrics != None:
+            metrics.record_connection("aiohttp", reused=True)
+
+    trace = aiohttp.TraceConfig()
+    trace.on_connection_create_end.append(created)
+    trace.on_connection_reuseconn.append(reused)
+
+    return trace
+
+
+def _get_session():
+    """
+    Returns the shared client session, creating it if it does not exist or was closed.
+    Must be called from inside a running event loop.
+    """
+
+    global _session
+
+    if _session is None or _session.closed:
+        _session = _create_session()
+
+    return _session
+
+
+async def close():
+    """
+    Closes the shared client session.
+    """
+
+    global _session
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def _query_website(url):
+    """
+    Returns a JSON object from a website query.
+    Shares the response cache and static data store with the blocking functions.
+    If the website fails, a stale cached response is returned if there is one.
+    Inside a trace the lookup is a span named after the endpoint (see fault_api.tracing).
+    """
+
+    with tracing.span(endpoint_name(url)):
+        cache = fault_api.get_cache()
+        if cache != None:
+            page_json = cache.get(url)
+            _record_cache(url, "miss" if page_json is MISSING else "hit")
+            if page_json is not MISSING:
+                return page_json
+
+        try:
+            # Callers asking for the same URL at the same time share one request
+            page_json = await _flights.do(url, lambda: _load(url))
+        except APIError as e:
+            page_json = cache.get_stale(url) if cache != None else MISSING
+            if page_json is MISSING:
+                raise
+            _record_cache(url, "stale")
+
+    return page_json
+
+
+async def _load(url):
+    """
+    Gets a URL from the static data store or the website and puts the result in the response cache.
+    Player and match responses are turned into records (see fault_api.models) before they are cached.
+    """
+
+    # Static game data goes through the on-disk store, which is blocking, so it runs in a thread.
+    # The cache lookup and span were already done by _query_website, so only the load is handed over.
+    if endpoint_name(url) in fault_api.STATIC_ENDPOINTS and fault_api.get_static_store() != None:
+        return await asyncio.to_thread(fault_api._load, url)
+
+    page_json = models.build(url, await _fetch_json(url))
+
+    cache = fault_api.get_cache()
+    if cache != None:
+        cache.put(url, page_json)
+
+    return page_json
+
+
+async def _fetch_json(url):
+    """
+    Requests a URL from the website and returns the decoded JSON.
+    Shares the rate limiter and circuit breaker with the blocking functions and retries
+    the same way until fault_api.REQUEST_DEADLINE.
+    Raises APIError if every attempt failed and CircuitOpenError if the endpoint is failing fast.
+    """
+
+    endpoint = endpoint_name(url)
+    breaker = fault_api.get_circuit_breaker()
+    metrics = fault_api.get_metrics()
+    if breaker != None and not breaker.allow(endpoint):
+        if metrics != None:
+            metrics.record_error(endpoint, "circuit_open")
+        raise CircuitOpenError(f"{endpoint} is failing, not requesting {url}")
+
+    limiter = fault_api.get_rate_limiter()
+    session = _get_session()
+    deadline = Deadline(fault_api.REQUEST_DEADLINE)
+    attempt = 0
+
+    try:
+        while True:
+            if limiter != None:
+                with tracing.span("rate limit"):
+                    await limiter.acquire_async()
+
+            timeout = aiohttp.ClientTimeout(total=deadline.remaining(),
+                                            sock_connect=fault_api.CONNECT_TIMEOUT,
+                                            sock_read=fault_api.READ_TIMEOUT)
+            start = time.perf_counter()
+            try:
+                with tracing.span("GET", attempt=attempt) as request_span:
+                    async with session.get(url, timeout=timeout) as page:
+                        page_data = await page.read()
+                    request_span.set(status=page.status)
+                if metrics != None:
+                    metrics.record_request(endpoint, page.status, time.perf_counter() - start)
+                if page.status not in fault_api.RETRY_STATUSES:
+                    if breaker != None:
+                        breaker.record_success(endpoint)
+                    break
+                error = APIError(f"{url} returned status {page.status}")
+                if metrics != None:
+                    metrics.record_error(endpoint, "status")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = APIError(f"{url} failed: {e!r}")
+                if metrics != None:
+                    metrics.record_error(endpoint, "connection")
+
+            delay = backoff_delay(attempt, fault_api.RETRY_BACKOFF, fault_api.RETRY_BACKOFF_MAX)
+            if attempt >= fault_api.RETRIES or delay >= deadline.remaining():
+                if breaker != None:
+                    breaker.record_failure(endpoint)
+                raise error
+
+            await asyncio.sleep(delay)
+            attempt += 1
+    finally:
+        # Anything else, like the command being cancelled, must not leave a half open trial taken forever
+        if breaker != None:
+            breaker.release(endpoint)
+
+    page_json = _decode_response(url, page.status, page_data)
+
+    return page_json
+
+
+## Main
+async def get_hero_play_stats():
+    """
+    Gets the stats per hero.
+    Returns a JSON object with the hero name as the key.
+    See fault_api.get_hero_play_stats for the format.
+    """
+
+    page_link = f'{API_URL}/getStatsPerHero'
+    page_dict = await _query_website(page_link)
+
+    return page_dict['heroes']
+
+
+async def get_hero_dicts(hero_stats=None):
+    """
+    Returns dictionaries mapping hero names to IDs and hero IDs to names.
+    Builds them from hero_stats if given, otherwise they come from the game registry.
+    """
+
+    if hero_stats != None:
+        return fault_api.get_hero_dicts(hero_stats)
+
+    registry = await get_registry()
+
+    return registry.hero_to_id, registry.id_to_hero
+
+
+async def get_registry():
+    """
+    Returns the GameRegistry shared with fault_api.get_registry(), loading it on first use.
+    """
+
+    registry = fault_api.loaded_registry()
+    if registry == None:
+        registry = await refresh_registry()
+
+    return registry
+
+
+async def refresh_registry():
+    """
+    Fetches the hero stats, items and aspects concurrently and swaps in a new GameRegistry.
+    """
+
+    hero_stats, items, aspects = await asyncio.gather(get_hero_play_stats(), get_items(), get_aspects())
+
+    return fault_api.set_registry(GameRegistry.from_api(hero_stats, items, aspects))
+
+
+async def get_user(fault_username):
+    """
+    Gets the username and ID of the first fault user matching a search string.
+    Returns a User or None if no user is found.
+    """
+
+    page_link = f"{API_URL}/searchUsers/{fault_username}"
+    users = await _query_website(page_link)
+
+    if len(users) == 0:
+        return None
+
+    return users[0]
+
+
+async def get_top_players(user):
+    """
+    Returns a player's leaderboard information from a username as a dict.
+    Returns None if the username is not found.
+    """
+
+    page_link = f'{API_URL}/getTopPlayers/1/{user}'
+    page_dict = await _query_website(page_link)
+
+    user = _check_user_request_response(page_dict)
+
+    return user
+
+
+async def get_user_id(user, get_user_fn=get_user):
+    """
+    Returns a player's ID given a username.
+    """
+
+    user = await get_user_fn(user)
+    if user == None:
+        return user
+
+    return _player_id(user)
+
+
+async def get_hero_info(hero):
+    """
+    Gets the information for a given hero.
+    See fault_api.get_hero_info for the format.
+    """
+
+    page_link = f"{API_URL}/heroData/{hero}"
+    page_json = await _query_website(page_link)
+
+    return page_json
+
+
+async def get_items():
+    """
+    Gets the list of items from the website.
+    Returns a dict.
+    """
+
+    items_link = f"{API_URL}/items"
+    items = await _query_website(items_link)
+
+    return items
+
+
+async def get_aspects():
+    """
+    Gets the list of aspects.
+    Returns a list of dicts.
+    """
+
+    aspects_link = f"{API_URL}/aspects"
+    aspects = await _query_website(aspects_link)
+
+    return aspects
+
+
+async def get_matches(user, n = 1):
+    """
+    Gets the last match for a given player.
+    Returns a MatchSummary or None if the user is None or has no matches.
+    """
+
+    # Check if the user is good
+    if user == None:
+        return user
+
+    matches = await get_recent_matches(user, n)
+
+    if len(matches) == 0:
+        return None
+
+    return matches[0]
+
+
+async def get_recent_matches(user, n = 1):
+    """
+    Gets the last n matches for a given player in one request.
+    Returns a tuple of MatchSummary, newest first.
+    """
+
+    page_link = f'{API_URL}/getMatches/{_player_id(user)}/{n}'
+    matches = await _query_website(page_link)
+
+    return matches
+
+
+async def get_match_data(match_id):
+    """
+    Gets match data from the website.
+    Returns a MatchDetail. See fault_api.get_match_data for the response it is built from.
+    """
+
+    page_link = f'{API_URL}/getMatchData/{match_id}'
+    match = await _query_website(page_link)
+
+    return match
+
+
+async def get_player_hero_stats(user):
+    """
+    Gets hero statistics for a specified user.
+    Returns None if the player is not found.
+    """
+
+    # Check if the user is good
+    if user == None:
+        return user
+    else:
+        user_id = _player_id(user)
+
+    page_link = f'{API_URL}/getPlayerHeroStats/{user_id}'
+    page_dict = await _query_website(page_link)
+    player_hero_stats = page_dict["heroes"]
+
+    return player_hero_stats
+
+
+async def get_elo(user):
+    """
+    Gets the MMR and ELO information for a user or player ID.
+    Returns an EloData or None if no user is given.
+    """
+
+    # Check if the user is good
+    if user == None:
+        return user
+    else:
+        user_id = _player_id(user)
+
+    page_link = f'{API_URL}/getEloData/{user_id}'
+    page_json = await _query_website(page_link)
+
+    return page_json
+
+
+## Image API
+# Images are served from the blocking on-disk image cache, so they are looked up in a thread
+async def get_image_hero_ability(hero, ability):
+    """
+    Gets the icon of a hero ability.
+    Returns png bytes or None.
+    """
+
+    return await asyncio.to_thread(fault_api.get_image_hero_ability, hero, ability)
+
+
+async def get_image_item(item_id):
+    """
+    Gets the image of an item.
+    Returns jpg bytes or None.
+    """
+
+    return await asyncio.to_thread(fault_api.get_image_item, item_id)
+
+
+async def get_image_hero_portrait(hero_id):
+    """
+    Gets the portrait of a hero.
+    Returns jpg bytes or None.
+    """
+
+    return await asyncio.to_thread(fault_api.get_image_hero_portrait, hero_id)
+
+
+async def get_player_avatar(user):
+    """
+    Gets the avatar of the given user.
+    Accepts a User, a user dict or a bare player ID (like PlayerLine.player_id).
+    Returns a dict with avatarId and avatarURI.
+    """
+
+    if user == None:
+        return None
+
+    page_link = f"{API_URL}/userAvatar/{_player_id(user)}"
+    page_json = await _query_website(page_link)
+
+    return page_json
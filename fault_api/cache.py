@@ -0,0 +1,207 @@
+'''
+Response cache for the Fault API.
+
+Keeps decoded responses in memory keyed by URL so repeat lookups don't hit the website.
+Each endpoint has its own time to live (TTL):
+- Finished matches never change so they are kept until evicted.
+- Static game data (heroes, items, aspects) only changes with a patch so it is kept for hours.
+- Player data like ELO changes after every game so it is only kept for seconds.
+
+The cache is a bounded LRU. When it is full the least recently used response is evicted.
+Expired responses stay until evicted so they can be served if the website is down.
+Cached responses are shared between callers and must not be modified.
+
+'''
+
+
+## Import dependencies
+import math
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+
+## Constants
+MINUTE = 60
+HOUR = 60 * MINUTE
+FOREVER = math.inf
+
+# Match status reported by getMatchData once a match is over
+MATCH_FINISHED = 2
+
+# Returned by ResponseCache.get() when nothing usable is cached
+MISSING = object()
+
+
+def _match_ttl(match):
+    """
+    Finished matches are cached forever, matches in progress only briefly.
+    Takes a MatchDetail (see fault_api.models) or the raw match dict.
+    """
+
+    if isinstance(match, dict):
+        status = match.get("Status")
+    else:
+        status = getattr(match, "status", None)
+
+    return FOREVER if status == MATCH_FINISHED else 30
+
+
+# TTL in seconds for each endpoint, keyed by the first part of the URL path.
+# A value may also be a function that takes the decoded response and returns the TTL.
+# Endpoints that are not listed use DEFAULT_TTL.
+TTL_POLICIES = {
+    "getStatsPerHero": 6 * HOUR,
+    "items": 6 * HOUR,
+    "aspects": 6 * HOUR,
+    "heroData": 6 * HOUR,
+    "userAvatar": HOUR,
+    "searchUsers": 10 * MINUTE,
+    "getTopPlayers": MINUTE,
+    "getPlayerHeroStats": MINUTE,
+    "getMatches": 30,
+    "getEloData": 30,
+    "getMatchData": _match_ttl,
+}
+DEFAULT_TTL = 30
+DEFAULT_MAXSIZE = 1024
+
+
+def endpoint_name(url):
+    """
+    Returns the endpoint of an API URL, which is the first part of the path.
+    e.g. https://api.playfault.com/getMatchData/123 -> getMatchData
+    """
+
+    path = urlsplit(url).path.strip("/")
+
+    return path.split("/")[0]
+
+
+class ResponseCache:
+    """
+    Bounded in-memory LRU of decoded API responses with per-endpoint TTLs.
+    Safe to share between threads.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, policies=None, default_ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.policies = dict(TTL_POLICIES if policies == None else policies)
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_hits = 0
+
+
+    def ttl_for(self, url, value):
+        """
+        Returns the TTL in seconds for a response from the given URL.
+        """
+
+        policy = self.policies.get(endpoint_name(url), self.default_ttl)
+        if callable(policy):
+            policy = policy(value)
+
+        return policy
+
+
+    def get(self, url):
+        """
+        Returns the cached response for a URL or MISSING if there is none or it has expired.
+        """
+
+        with self._lock:
+            entry = self._entries.get(url)
+
+            if entry != None:
+                expires, value = entry
+                if expires > self._clock():
+                    self._entries.move_to_end(url)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+
+        return MISSING
+
+
+    def get_stale(self, url):
+        """
+        Returns the cached response for a URL even if it has expired, or MISSING.
+        Expired responses are kept until they are evicted so they can be served while the website is down.
+        """
+
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry == None:
+                return MISSING
+            self.stale_hits += 1
+
+        return entry[1]
+
+
+    def put(self, url, value):
+        """
+        Stores a response for a URL using the TTL of its endpoint.
+        Responses with a TTL of 0 are not stored.
+        """
+
+        ttl = self.ttl_for(url, value)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[url] = (self._clock() + ttl, value)
+            self._entries.move_to_end(url)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+
+    def invalidate(self, url):
+        """
+        Removes the cached response for a URL.
+        """
+
+        with self._lock:
+            self._entries.pop(url, None)
+
+
+    def clear(self):
+        """
+        Removes every cached response and resets the counters.
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.stale_hits = 0
+
+
+    def stats(self):
+        """
+        Returns a dict with the hit, miss, eviction and stale hit counts and the current size.
+        """
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "stale_hits": self.stale_hits,
+                "size": len(self._entries),
+                "maxsize": self.maxsize
+            }
+
+
+    def __len__(self):
+        return len(self._entries)
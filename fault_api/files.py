@@ -0,0 +1,37 @@
+'''
+Atomic file writes.
+
+A file is written to a temporary file in the same directory and renamed over the old one,
+so a crash or a reader never sees half a file.
+
+'''
+
+
+## Import dependencies
+import os
+import tempfile
+
+
+def atomic_write(path, data, fsync=False):
+    """
+    Replaces the file at path with data (str or bytes).
+    With fsync the data is on disk before the rename, so the new file survives a power cut.
+    If the write fails the temporary file is removed and the error is raised.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    mode = "wb" if isinstance(data, bytes) else "w"
+    temp_name = None
+
+    try:
+        with tempfile.NamedTemporaryFile(mode, dir=directory, delete=False, suffix=".tmp") as file:
+            temp_name = file.name
+            file.write(data)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(temp_name, path)
+    except BaseException as e:
+        if temp_name != None and os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
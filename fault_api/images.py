@@ -0,0 +1,213 @@
+'''
+On-disk cache for the images on the Fault image CDN (hero portraits, item images and ability icons).
+
+Images never change once they are published, so each one is only downloaded once.
+Files are named by the SHA-256 of their content, so an image served from several URLs is stored once.
+An index in a small SQLite file maps each URL to its file and records when it was last used.
+When the files grow past max_bytes the least recently used URLs are dropped, along with any file
+no URL points at anymore.
+
+Images are returned as the bytes read from disk or received from the website, without copying them again.
+
+'''
+
+
+## Import dependencies
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from fault_api.files import atomic_write
+
+
+## Constants
+DEFAULT_DIRECTORY = "./bot/images"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+INDEX_FILE = "index.db"
+
+# Bump when the table layout changes. Older indexes are dropped and rebuilt.
+SCHEMA_VERSION = 1
+
+# Seconds before a hit updates an image's last_used again, so a hot image isn't written on every read
+TOUCH_INTERVAL = 60
+
+
+def content_hash(data):
+    """
+    Returns the hex SHA-256 of an image, used as its file name.
+    """
+
+    return hashlib.sha256(data).hexdigest()
+
+
+class ImageCache:
+    """
+    Size bounded LRU of images on disk keyed by URL.
+    Safe to share between threads.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES, clock=time.time):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(os.path.join(directory, INDEX_FILE), check_same_thread=False)
+        self._create_tables()
+
+
+    def _create_tables(self):
+        """
+        Creates the index, dropping it first if it was made by another schema version.
+        """
+
+        with self._lock, self._connection:
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS images")
+                self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS images (
+                    url TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )""")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS images_last_used ON images (last_used)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS images_digest ON images (digest)")
+
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest)
+
+
+    def get(self, url):
+        """
+        Returns the image stored for a URL as bytes, or None if it isn't stored.
+        """
+
+        with self._lock:
+            row = self._connection.execute("SELECT digest, last_used FROM images WHERE url = ?", (url,)).fetchone()
+            if row == None:
+                return None
+
+            try:
+                with open(self._path(row[0]), "rb") as file:
+                    data = file.read()
+            except FileNotFoundError as e:
+                # The file was removed behind our back, so forget the URL and download it again
+                with self._connection:
+                    self._connection.execute("DELETE FROM images WHERE url = ?", (url,))
+                return None
+
+            now = self._clock()
+            if now - row[1] >= TOUCH_INTERVAL:
+                with self._connection:
+                    self._connection.execute("UPDATE images SET last_used = ? WHERE url = ?", (now, url))
+
+        return data
+
+
+    def put(self, url, data):
+        """
+        Stores an image for a URL and evicts the least recently used images if the cache is too big.
+        Returns the content hash of the image.
+        """
+
+        digest = content_hash(data)
+        path = self._path(digest)
+
+        with self._lock:
+            # Identical images share one file
+            if not os.path.exists(path):
+                atomic_write(path, data)
+
+            with self._connection:
+                old = self._connection.execute("SELECT digest FROM images WHERE url = ?", (url,)).fetchone()
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO images (url, digest, size, last_used) VALUES (?, ?, ?, ?)",
+                    (url, digest, len(data), self._clock()))
+                if old != None and old[0] != digest:
+                    self._remove_unused(old[0])
+
+            self._evict()
+
+        return digest
+
+
+    def invalidate(self, url):
+        """
+        Removes the image stored for a URL.
+        """
+
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT digest FROM images WHERE url = ?", (url,)).fetchone()
+            if row != None:
+                self._connection.execute("DELETE FROM images WHERE url = ?", (url,))
+                self._remove_unused(row[0])
+
+
+    def _remove_unused(self, digest):
+        """
+        Deletes an image file once no URL points at it. Must be called while holding the lock.
+        Returns True if the file was deleted.
+        """
+
+        in_use = self._connection.execute("SELECT 1 FROM images WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+        if in_use != None:
+            return False
+
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError as e:
+            pass
+
+        return True
+
+
+    def _size(self):
+        row = self._connection.execute("SELECT SUM(size) FROM (SELECT DISTINCT digest, size FROM images)").fetchone()
+        return row[0] or 0
+
+
+    def _evict(self):
+        """
+        Drops least recently used URLs until the files fit in max_bytes. Must be called while holding the lock.
+        """
+
+        # The total is read once and reduced as files are deleted
+        size = self._size()
+        with self._connection:
+            while size > self.max_bytes:
+                url, digest, image_size = self._connection.execute(
+                    "SELECT url, digest, size FROM images ORDER BY last_used LIMIT 1").fetchone()
+                self._connection.execute("DELETE FROM images WHERE url = ?", (url,))
+                if self._remove_unused(digest):
+                    size -= image_size
+
+
+    def size(self):
+        """
+        Returns the total size of the stored image files in bytes.
+        """
+
+        with self._lock:
+            return self._size()
+
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+
+    def close(self):
+        """
+        Closes the index.
+        """
+
+        with self._lock:
+            self._connection.close()
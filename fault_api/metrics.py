@@ -0,0 +1,307 @@
+'''
+Request metrics for the Fault API.
+
+Counts what fault_api does on behalf of the bot, per endpoint (the first part of the URL path):
+- requests sent to the website by status, how long they took and how many bytes came back
+- failures by kind (connection errors, error statuses, bodies that aren't JSON, open circuit breakers)
+- response cache hits, misses and stale responses served while the website was down
+- connections to the website opened and reused
+
+Metrics are written in the Prometheus text format, either from a small HTTP server
+(start_http_server) or to a file on demand (dump).
+
+'''
+
+
+## Import dependencies
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fault_api.files import atomic_write
+
+
+## Constants
+# Upper bounds in seconds of the request duration histogram buckets
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Type and help text of every metric, in the order they are written
+METRICS = {
+    "fault_api_requests_total": ("counter", "HTTP requests sent to the website by endpoint and status."),
+    "fault_api_request_duration_seconds": ("histogram", "Time taken by HTTP requests to the website, including reading the body."),
+    "fault_api_response_bytes_total": ("counter", "Bytes of response bodies received from the website."),
+    "fault_api_errors_total": ("counter", "Failed requests to the website by endpoint and kind of failure."),
+    "fault_api_cache_requests_total": ("counter", "Response cache lookups by endpoint and result (hit, miss or stale)."),
+    "fault_api_connections_total": ("counter", "Connections to the website opened (created) and reused, by HTTP client."),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if len(pairs) == 0:
+        return ""
+
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
+
+
+class Histogram:
+    """
+    Counts of observed values per bucket, with their sum.
+    Not thread safe on its own, Metrics holds a lock around it.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last one counts values above every bucket
+        self.sum = 0.0
+        self.count = 0
+
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+    def cumulative(self):
+        """
+        Returns (upper bound, number of values at or below it) for every bucket, ending with +Inf.
+        """
+
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+
+        return result
+
+
+class Metrics:
+    """
+    Counters and histograms keyed by metric name and labels.
+    Safe to share between threads.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+
+
+    def inc(self, name, amount=1, **labels):
+        """
+        Adds to a counter.
+        """
+
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+
+    def observe(self, name, value, **labels):
+        """
+        Adds a value to a histogram.
+        """
+
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(self.buckets)
+            series[key].observe(value)
+
+
+    def add_collector(self, collector):
+        """
+        Adds a function that is called every time the metrics are read.
+        It returns (counter name, labels dict, value) for counters kept somewhere else, like connection pools.
+        """
+
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+
+    ## Recording
+    def record_request(self, endpoint, status, seconds):
+        """
+        Records one HTTP request that got a response.
+        """
+
+        self.inc("fault_api_requests_total", endpoint=endpoint, status=status)
+        self.observe("fault_api_request_duration_seconds", seconds, endpoint=endpoint)
+
+
+    def record_bytes(self, endpoint, size):
+        """
+        Records the size of a response body that was read.
+        """
+
+        self.inc("fault_api_response_bytes_total", size, endpoint=endpoint)
+
+
+    def record_error(self, endpoint, kind):
+        """
+        Records a failure. kind is "connection", "status", "invalid_json" or "circuit_open".
+        A connection error is also counted as a request with status "error".
+        """
+
+        if kind == "connection":
+            self.inc("fault_api_requests_total", endpoint=endpoint, status="error")
+        self.inc("fault_api_errors_total", endpoint=endpoint, kind=kind)
+
+
+    def record_cache(self, endpoint, result):
+        """
+        Records a response cache lookup. result is "hit", "miss" or "stale".
+        """
+
+        self.inc("fault_api_cache_requests_total", endpoint=endpoint, result=result)
+
+
+    def record_connection(self, client, reused):
+        """
+        Records a connection to the website being opened or reused.
+        """
+
+        self.inc("fault_api_connections_total", client=client, event="reused" if reused else "created")
+
+
+    ## Reading
+    def _collect(self):
+        """
+        Returns copies of the counters, with the collectors' values added, and of the histograms.
+        """
+
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: (histogram.cumulative(), histogram.sum, histogram.count)
+                                 for key, histogram in series.items()}
+                          for name, series in self._histograms.items()}
+            collectors = list(self._collectors)
+
+        for collector in collectors:
+            for name, labels, value in collector():
+                series = counters.setdefault(name, {})
+                key = _label_key(labels)
+                series[key] = series.get(key, 0) + value
+
+        return counters, histograms
+
+
+    def value(self, name, **labels):
+        """
+        Returns the value of a counter, or the number of values in a histogram.
+        """
+
+        counters, histograms = self._collect()
+        key = _label_key(labels)
+        if name in histograms:
+            return histograms[name][key][2] if key in histograms[name] else 0
+
+        return counters.get(name, {}).get(key, 0)
+
+
+    def to_prometheus(self):
+        """
+        Returns every metric in the Prometheus text format.
+        """
+
+        counters, histograms = self._collect()
+        names = list(METRICS) + sorted(set(counters).union(histograms).difference(METRICS))
+        lines = []
+
+        for name in names:
+            if name not in counters and name not in histograms:
+                continue
+
+            metric_type, help_text = METRICS.get(name, ("histogram" if name in histograms else "counter", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+            for key, value in sorted(counters.get(name, {}).items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+            for key, (buckets, total, count) in sorted(histograms.get(name, {}).items()):
+                for bound, bucket_count in buckets:
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {bucket_count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+    def reset(self):
+        """
+        Clears every counter and histogram. Collectors are kept.
+        """
+
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+## Exporting
+def dump(metrics, path):
+    """
+    Writes the metrics in the Prometheus text format to a file, e.g. for the node exporter's textfile collector.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    atomic_write(path, metrics.to_prometheus())
+
+
+def start_http_server(metrics, port, host="127.0.0.1"):
+    """
+    Serves the metrics at http://host:port/metrics from a background thread.
+    Returns the server; call shutdown() on it to stop.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+
+            body = metrics.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+
+    return server
@@ -0,0 +1,211 @@
+'''
+Records for the player and match data returned by the Fault API.
+
+The API spells the same fields differently between endpoints:
+getMatches uses camelCase ("playerId", "heroId") and getMatchData uses PascalCase ("PlayerID", "HeroID").
+Responses are turned into these records once, when they are decoded (see build()),
+so the rest of the bot reads attributes like player.hero_id and never deals with the raw keys.
+
+The records are slotted namedtuples: small, immutable and safe to share from the response cache.
+
+'''
+
+
+## Import dependencies
+from collections import namedtuple
+
+from fault_api.cache import endpoint_name
+from fault_api.resilience import APIError
+
+
+def _lower_keys(raw):
+    """
+    Returns a copy of a response dict with lower case keys, so "PlayerID" and "playerId" both become "playerid".
+    """
+
+    return {key.lower(): val for key, val in raw.items()}
+
+
+## Records
+class User(namedtuple("User", ["id", "username"])):
+    """
+    A Fault user from searchUsers.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_api(cls, raw):
+        raw = _lower_keys(raw)
+        return cls(raw["id"], raw.get("username", raw.get("name")))
+
+
+    def to_dict(self):
+        """
+        Returns the user as the dict the API sends, for saving to the user store.
+        """
+
+        return {"id": self.id, "username": self.username}
+
+
+class EloData(namedtuple("EloData", ["id", "username", "elo_title", "mmr", "ranking", "placement_games_remain"])):
+    """
+    MMR information for a player from getEloData.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_api(cls, raw):
+        raw = _lower_keys(raw)
+        return cls(raw.get("id"),
+                   raw.get("username"),
+                   raw.get("elotitle"),
+                   raw.get("mmr"),
+                   raw.get("ranking"),
+                   raw.get("placementgamesremain"))
+
+
+class PlayerLine(namedtuple("PlayerLine", ["player_id", "username", "team", "hero_id", "hero_level",
+                                           "kills", "deaths", "assists", "cs", "gold",
+                                           "hero_damage", "minion_damage", "structure_damage", "damage_taken",
+                                           "healing", "shielding", "wards_placed",
+                                           "cards", "items", "mmr", "mmr_change"])):
+    """
+    One player's line in a match.
+    cards holds Card1 and Card2 and items holds Item1 to Item6, empty slots included.
+    Fields only sent by getMatchData are None in the lines from getMatches.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_api(cls, raw):
+        raw = _lower_keys(raw)
+        return cls(raw.get("playerid"),
+                   raw.get("username"),
+                   raw.get("team"),
+                   raw.get("heroid"),
+                   raw.get("herolevel"),
+                   raw.get("kills", 0),
+                   raw.get("deaths", 0),
+                   raw.get("assists", 0),
+                   raw.get("cs"),
+                   raw.get("gold"),
+                   raw.get("herodamage"),
+                   raw.get("miniondamage"),
+                   raw.get("structuredamage"),
+                   raw.get("damagetaken"),
+                   raw.get("healing"),
+                   raw.get("shielding"),
+                   raw.get("wardsplaced"),
+                   (raw.get("card1"), raw.get("card2")),
+                   tuple(raw.get(f"item{slot}") for slot in range(1, 7)),
+                   raw.get("mmr"),
+                   raw.get("mmrchange"))
+
+
+    @property
+    def kda(self):
+        """
+        (kills + assists) / deaths, or kills + assists if the player never died.
+        """
+
+        if self.deaths == 0:
+            return self.kills + self.assists
+
+        return (self.kills + self.assists) / self.deaths
+
+
+_MATCH_FIELDS = ["id", "winner", "start_date_time", "time_length", "status", "players"]
+
+
+class MatchSummary(namedtuple("MatchSummary", _MATCH_FIELDS)):
+    """
+    A match from a player's history in getMatches.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_api(cls, raw):
+        raw = _lower_keys(raw)
+        return cls(raw.get("id"),
+                   raw.get("winner"),
+                   raw.get("startdatetime"),
+                   raw.get("timelength"),
+                   raw.get("status"),
+                   tuple(PlayerLine.from_api(player) for player in raw.get("players", [])))
+
+
+class MatchDetail(namedtuple("MatchDetail", _MATCH_FIELDS + ["custom_match", "match_type"])):
+    """
+    The full data for one match from getMatchData.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_api(cls, raw):
+        raw = _lower_keys(raw)
+        return cls(raw.get("id"),
+                   raw.get("winner"),
+                   raw.get("startdatetime"),
+                   raw.get("timelength"),
+                   raw.get("status"),
+                   tuple(PlayerLine.from_api(player) for player in raw.get("players", [])),
+                   raw.get("custommatch"),
+                   raw.get("matchtype"))
+
+
+## Building records from responses
+def _build_users(page_json):
+    """
+    searchUsers returns a list of users.
+    """
+
+    if not isinstance(page_json, list):
+        return ()
+
+    return tuple(User.from_api(user) for user in page_json)
+
+
+def _build_matches(page_json):
+    """
+    getMatches returns {"success": bool, "matches": [...]}.
+    """
+
+    if not page_json.get("success", True):
+        return ()
+
+    return tuple(MatchSummary.from_api(match) for match in page_json.get("matches", []))
+
+
+# Record builder for each endpoint, keyed like the cache's TTL_POLICIES.
+# Responses from other endpoints are left as decoded JSON.
+MODELS = {
+    "searchUsers": _build_users,
+    "getEloData": EloData.from_api,
+    "getMatches": _build_matches,
+    "getMatchData": MatchDetail.from_api,
+}
+
+# Endpoints that answer with a JSON object. Anything else, like null or an error string, is a broken response.
+OBJECT_ENDPOINTS = ("getEloData", "getMatches", "getMatchData")
+
+
+def build(url, page_json):
+    """
+    Returns the records for a decoded response from the given URL.
+    Raises APIError if an endpoint that sends an object sent something else.
+    """
+
+    endpoint = endpoint_name(url)
+    builder = MODELS.get(endpoint)
+    if builder == None:
+        return page_json
+
+    if endpoint in OBJECT_ENDPOINTS and not isinstance(page_json, dict):
+        raise APIError(f"{url} returned {type(page_json).__name__} instead of an object")
+
+    return builder(page_json)
@@ -0,0 +1,193 @@
+'''
+Client side rate limiting for the Fault API.
+
+Every request to the website takes a token from a shared token bucket.
+The bucket refills at `rate` tokens per second and holds at most `burst` tokens.
+When it is empty requests wait for a token instead of failing.
+
+Requests have a priority. While an INTERACTIVE request (a slash command) is waiting,
+BACKGROUND requests (prefetching and cache refreshes) hold back so commands go first.
+The priority of the current thread or task is set with the request_priority() context manager.
+
+The same limiter is used by the blocking functions and by fault_api.aio so their total is capped.
+
+'''
+
+
+## Import dependencies
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+
+
+## Priorities, lower numbers go first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 20
+
+_priority = contextvars.ContextVar("fault_api_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def request_priority(priority):
+    """
+    Sets the priority of API requests made inside the with block.
+    """
+
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    """
+    Returns the priority of API requests made from the current thread or task.
+    """
+
+    return _priority.get()
+
+
+class RateLimiter:
+    """
+    Token bucket shared by threads and coroutines with a priority queue in front of it.
+    Keeps queue depth and wait time counters for each priority.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+
+        self._waiting = {priority: 0 for priority in PRIORITIES}
+        self._max_waiting = {priority: 0 for priority in PRIORITIES}
+        self._acquired = {priority: 0 for priority in PRIORITIES}
+        self._delayed = {priority: 0 for priority in PRIORITIES}
+        self._wait_total = {priority: 0.0 for priority in PRIORITIES}
+        self._wait_max = {priority: 0.0 for priority in PRIORITIES}
+
+
+    def _refill(self):
+        """
+        Adds the tokens earned since the last refill. Must be called while holding the lock.
+        """
+
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+    def _try_take(self, priority):
+        """
+        Takes a token if one is free and no more important request is waiting.
+        Returns 0 on success or the number of seconds to wait before trying again.
+        """
+
+        with self._lock:
+            self._refill()
+
+            # Let the more important request have the next token
+            if any(self._waiting[other] for other in PRIORITIES if other < priority):
+                return 1 / self.rate
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+
+            return (1 - self._tokens) / self.rate
+
+
+    def _enter(self, priority):
+        with self._lock:
+            self._waiting[priority] += 1
+            self._max_waiting[priority] = max(self._max_waiting[priority], self._waiting[priority])
+
+
+    def _leave(self, priority, waited, delayed):
+        with self._lock:
+            self._waiting[priority] -= 1
+            self._acquired[priority] += 1
+            if delayed:
+                self._delayed[priority] += 1
+            self._wait_total[priority] += waited
+            self._wait_max[priority] = max(self._wait_max[priority], waited)
+
+
+    def acquire(self, priority=None):
+        """
+        Blocks until the calling thread may make a request.
+        Uses the priority set by request_priority() if none is given.
+        """
+
+        if priority == None:
+            priority = current_priority()
+
+        start = self._clock()
+        self._enter(priority)
+        try:
+            delay = self._try_take(priority)
+            delayed = delay > 0
+            while delay > 0:
+                time.sleep(delay)
+                delay = self._try_take(priority)
+        finally:
+            self._leave(priority, self._clock() - start, delayed)
+
+
+    async def acquire_async(self, priority=None):
+        """
+        Waits without blocking the event loop until the calling task may make a request.
+        Uses the priority set by request_priority() if none is given.
+        """
+
+        if priority == None:
+            priority = current_priority()
+
+        start = self._clock()
+        self._enter(priority)
+        try:
+            delay = self._try_take(priority)
+            delayed = delay > 0
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self._try_take(priority)
+        finally:
+            self._leave(priority, self._clock() - start, delayed)
+
+
+    def queue_depth(self, priority=None):
+        """
+        Returns the number of requests waiting, for one priority or in total.
+        """
+
+        if priority != None:
+            return self._waiting[priority]
+
+        return sum(self._waiting.values())
+
+
+    def stats(self):
+        """
+        Returns a dict of counters for each priority name:
+        queued (waiting now), max_queued, acquired, delayed, wait_total and wait_max in seconds.
+        """
+
+        with self._lock:
+            return {PRIORITY_NAMES[priority]: {
+                        "queued": self._waiting[priority],
+                        "max_queued": self._max_waiting[priority],
+                        "acquired": self._acquired[priority],
+                        "delayed": self._delayed[priority],
+                        "wait_total": self._wait_total[priority],
+                        "wait_max": self._wait_max[priority]}
+                    for priority in PRIORITIES}
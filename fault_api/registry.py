@@ -0,0 +1,164 @@
+'''
+Registry of Fault game data.
+
+Holds compact records for every hero, item and aspect keyed by ID so formatting code can
+resolve the IDs in match data (HeroID, Item1-Item6, Card1/Card2) with a dictionary lookup.
+The records are built once from the API and never change.
+To pick up a new patch a new registry is built and swapped in (see fault_api.refresh_registry).
+
+Match cards are the aspects picked for the match, so card IDs are looked up in the aspects.
+
+'''
+
+
+## Import dependencies
+from collections import namedtuple
+
+
+## Records
+HeroRecord = namedtuple("HeroRecord", ["id", "name"])
+ItemRecord = namedtuple("ItemRecord", ["id", "name", "cost", "color", "tree_id"])
+AspectRecord = namedtuple("AspectRecord", ["id", "name", "color", "effect1", "effect2"])
+
+
+# Empty item and card slots are reported with these IDs in match data
+EMPTY_SLOTS = (-1, None)
+
+
+def _build_heroes(hero_stats):
+    """
+    Builds hero records from get_hero_play_stats() keyed by hero ID.
+    """
+
+    return {val["Id"]: HeroRecord(val["Id"], name) for name, val in hero_stats.items()}
+
+
+def _build_items(items):
+    """
+    Builds item records from get_items() keyed by item ID.
+    """
+
+    records = {}
+    for key, val in items.items():
+        item_id = int(val.get("id", key))
+        records[item_id] = ItemRecord(item_id,
+                                      val.get("name"),
+                                      val.get("cost"),
+                                      val.get("color"),
+                                      val.get("treeId"))
+
+    return records
+
+
+def _build_aspects(aspects):
+    """
+    Builds aspect records from get_aspects() keyed by aspect ID.
+    The API returns either a list (where the position is the ID) or a dict keyed by ID.
+    """
+
+    if isinstance(aspects, dict):
+        pairs = aspects.items()
+    else:
+        pairs = enumerate(aspects)
+
+    records = {}
+    for key, val in pairs:
+        aspect_id = int(val.get("id", key))
+        records[aspect_id] = AspectRecord(aspect_id,
+                                          val.get("name"),
+                                          val.get("color"),
+                                          val.get("effect1"),
+                                          val.get("effect2"))
+
+    return records
+
+
+class GameRegistry:
+    """
+    Read-only lookup of hero, item and aspect records by ID.
+    """
+
+    __slots__ = ("heroes", "items", "aspects", "hero_to_id", "id_to_hero")
+
+    def __init__(self, heroes=None, items=None, aspects=None):
+        self.heroes = heroes or {}
+        self.items = items or {}
+        self.aspects = aspects or {}
+
+        # Kept for code that uses the dictionaries from get_hero_dicts()
+        self.id_to_hero = {hero.id: hero.name for hero in self.heroes.values()}
+        self.hero_to_id = {hero.name: hero.id for hero in self.heroes.values()}
+
+
+    @classmethod
+    def from_api(cls, hero_stats, items=None, aspects=None):
+        """
+        Builds a registry from the responses of get_hero_play_stats(), get_items() and get_aspects().
+        """
+
+        return cls(_build_heroes(hero_stats),
+                   _build_items(items or {}),
+                   _build_aspects(aspects or []))
+
+
+    def hero(self, hero_id):
+        """
+        Returns the HeroRecord for a hero ID or None.
+        """
+
+        return self.heroes.get(hero_id)
+
+
+    def hero_name(self, hero_id, default=None):
+        """
+        Returns the name of a hero ID or default if it is unknown.
+        """
+
+        return self.id_to_hero.get(hero_id, default)
+
+
+    def item(self, item_id):
+        """
+        Returns the ItemRecord for an item ID or None for unknown IDs and empty slots.
+        """
+
+        if item_id in EMPTY_SLOTS:
+            return None
+
+        return self.items.get(item_id)
+
+
+    def aspect(self, aspect_id):
+        """
+        Returns the AspectRecord for an aspect ID or None.
+        """
+
+        if aspect_id in EMPTY_SLOTS:
+            return None
+
+        return self.aspects.get(aspect_id)
+
+
+    def card(self, card_id):
+        """
+        Returns the AspectRecord for a match card (Card1/Card2) or None.
+        """
+
+        return self.aspect(card_id)
+
+
+    def player_items(self, player):
+        """
+        Returns the ItemRecords in the Item1-Item6 slots of a PlayerLine from get_match_data().
+        Empty or unknown slots are None.
+        """
+
+        return [self.item(item_id) for item_id in player.items]
+
+
+    def player_cards(self, player):
+        """
+        Returns the AspectRecords for the Card1/Card2 of a PlayerLine from get_match_data().
+        """
+
+        return [self.card(card_id) for card_id in player.cards]
@@ -0,0 +1,162 @@
+'''
+Failure handling for the Fault API.
+
+- Requests have a deadline. Retries stop once the next attempt could not finish before it.
+- Retries of GET requests wait a jittered exponential backoff so callers don't retry in lockstep.
+- Each endpoint has a circuit breaker. After enough failed requests in a row it opens and
+  requests to that endpoint fail straight away (or are served stale data from the cache)
+  until a cooldown has passed. Then one trial request is let through to test the website.
+
+'''
+
+
+## Import dependencies
+import random
+import threading
+import time
+
+
+## Exceptions
+class APIError(Exception):
+    """
+    Raised when the website can't be reached or answers with an error.
+    """
+
+
+class CircuitOpenError(APIError):
+    """
+    Raised without making a request while an endpoint's circuit breaker is open.
+    """
+
+
+## Backoff
+def backoff_delay(attempt, base, cap, rng=random.random):
+    """
+    Returns how long to wait before retry number `attempt` (starting at 0).
+    Uses full jitter: a random time between 0 and base * 2**attempt, at most cap.
+    """
+
+    return rng() * min(cap, base * (2 ** attempt))
+
+
+class Deadline:
+    """
+    Point in time a request and all its retries must finish by.
+    """
+
+    __slots__ = ("expires", "_clock")
+
+    def __init__(self, seconds, clock=time.monotonic):
+        self._clock = clock
+        self.expires = clock() + seconds
+
+
+    def remaining(self):
+        """
+        Returns the seconds left, never less than 0.
+        """
+
+        return max(0.0, self.expires - self._clock())
+
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+## Circuit breaker
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures for each endpoint and fails fast while an endpoint is down.
+    Safe to share between threads.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._opened_at = {}
+        self._trial = set()
+
+
+    def state(self, endpoint):
+        """
+        Returns CLOSED, OPEN or HALF_OPEN for an endpoint.
+        """
+
+        with self._lock:
+            return self._state(endpoint)
+
+
+    def _state(self, endpoint):
+        opened_at = self._opened_at.get(endpoint)
+        if opened_at == None:
+            return CLOSED
+        if self._clock() - opened_at >= self.cooldown:
+            return HALF_OPEN
+        return OPEN
+
+
+    def allow(self, endpoint):
+        """
+        Returns True if a request to the endpoint may be made.
+        While half open only one trial request is allowed at a time.
+        """
+
+        with self._lock:
+            state = self._state(endpoint)
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and endpoint not in self._trial:
+                self._trial.add(endpoint)
+                return True
+            return False
+
+
+    def record_success(self, endpoint):
+        """
+        Closes the breaker for an endpoint.
+        """
+
+        with self._lock:
+            self._failures.pop(endpoint, None)
+            self._opened_at.pop(endpoint, None)
+            self._trial.discard(endpoint)
+
+
+    def record_failure(self, endpoint):
+        """
+        Counts a failed request and opens the breaker once the threshold is reached.
+        A failed trial request opens it again for another cooldown.
+        """
+
+        with self._lock:
+            self._failures[endpoint] = self._failures.get(endpoint, 0) + 1
+            if endpoint in self._trial or self._failures[endpoint] >= self.failure_threshold:
+                self._opened_at[endpoint] = self._clock()
+            self._trial.discard(endpoint)
+
+
+    def release(self, endpoint):
+        """
+        Ends a trial request that neither succeeded nor failed, like one that was cancelled,
+        so the next request can be the trial instead.
+        """
+
+        with self._lock:
+            self._trial.discard(endpoint)
+
+
+    def states(self):
+        """
+        Returns a dict of every endpoint that has failed and its state.
+        """
+
+        with self._lock:
+            return {endpoint: self._state(endpoint) for endpoint in self._failures}
@@ -0,0 +1,128 @@
+'''
+Request coalescing for the Fault API.
+
+When several callers ask for the same URL at the same time only the first one goes to the website.
+The others wait for that request and get the same decoded result (or the same exception).
+Nothing is remembered once the request finishes; that is the response cache's job.
+
+SingleFlight is for threads (fault_api), AsyncSingleFlight is for coroutines (fault_api.aio).
+
+'''
+
+
+## Import dependencies
+import asyncio
+import threading
+
+
+class _Call:
+    """
+    A request in flight that other threads can wait on.
+    """
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time across threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+
+    def do(self, key, fn):
+        """
+        Returns fn() or, if a call for the same key is already running, waits for and returns its result.
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call == None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error != None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+
+    def in_flight(self):
+        """
+        Returns the number of keys with a call running.
+        """
+
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Runs at most one coroutine per key at a time on the event loop.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self.shared = 0
+
+
+    async def do(self, key, coro_fn):
+        """
+        Awaits coro_fn() or, if one for the same key is already running, awaits its result.
+        A caller being cancelled does not cancel the shared request for the others.
+        """
+
+        task = self._tasks.get(key)
+
+        if task != None and task.get_loop() is asyncio.get_running_loop():
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(coro_fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+
+        return await asyncio.shield(task)
+
+
+    def _forget(self, key, task):
+        """
+        Removes a finished task so the next caller starts a new request.
+        """
+
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+
+    def in_flight(self):
+        """
+        Returns the number of keys with a request running.
+        """
+
+        return len(self._tasks)
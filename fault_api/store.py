@@ -0,0 +1,129 @@
+'''
+Persistent store for static Fault game data.
+
+Hero stats, hero data, items and aspects only change with a game patch.
+Their raw responses are kept in a small SQLite file so a restarted bot can answer from disk
+instead of waiting on the website.
+
+Each response is stored with its ETag/Last-Modified headers and the time it was fetched.
+Once an entry is older than max_age it is stale. It is still served, and fault_api
+revalidates it in the background with a conditional request.
+
+'''
+
+
+## Import dependencies
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+
+## Constants
+DEFAULT_PATH = "./bot/static_data.db"
+DEFAULT_MAX_AGE = 60 * 60
+
+# Bump when the table layout changes. Older stores are dropped and rebuilt.
+SCHEMA_VERSION = 1
+
+
+StoredResponse = namedtuple("StoredResponse", ["url", "body", "etag", "last_modified", "fetched_at"])
+
+
+class StaticStore:
+    """
+    SQLite backed store of raw API responses keyed by URL.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_age=DEFAULT_MAX_AGE, clock=time.time):
+        self.path = path
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._create_tables()
+
+
+    def _create_tables(self):
+        """
+        Creates the responses table, dropping it first if it was made by another schema version.
+        """
+
+        with self._lock, self._connection:
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS responses")
+                self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL
+                )""")
+
+
+    def get(self, url):
+        """
+        Returns the StoredResponse for a URL or None if it has never been stored.
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT url, body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)).fetchone()
+
+        if row == None:
+            return None
+
+        return StoredResponse(*row)
+
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """
+        Stores the raw body of a response along with its validators.
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (url, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, bytes(body), etag, last_modified, self._clock()))
+
+
+    def touch(self, url):
+        """
+        Marks a stored response as fresh again, e.g. after the website answered 304 Not Modified.
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (self._clock(), url))
+
+
+    def is_stale(self, entry):
+        """
+        Returns True if a StoredResponse is older than max_age.
+        """
+
+        return self._clock() - entry.fetched_at > self.max_age
+
+
+    def urls(self):
+        """
+        Returns a list of every stored URL.
+        """
+
+        with self._lock:
+            rows = self._connection.execute("SELECT url FROM responses").fetchall()
+
+        return [row[0] for row in rows]
+
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+
+        with self._lock:
+            self._connection.close()
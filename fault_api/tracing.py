@@ -0,0 +1,359 @@
+'''
+Lightweight tracing for slash commands and the Fault API.
+
+A trace is a tree of timed spans. trace() (or the traced() decorator) starts one for a command, and
+span() marks a stage inside it, such as a website request or building embeds:
+
+    with tracing.trace("/match"):
+        with tracing.span("getMatchData", cache="miss"):
+            ...
+
+The current span is kept in a context variable, so spans opened in tasks and threads started from
+inside a trace are linked to it. Outside a trace span() does nothing, so fault_api can mark its
+stages without any cost to callers that aren't tracing.
+
+When a trace finishes it is passed to every function added with add_listener().
+format_trace() and format_breakdown() turn a trace into text, and SlowCommandReport keeps
+rolling timings per command along with the slowest recent traces.
+
+'''
+
+
+## Import dependencies
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+
+
+_current = contextvars.ContextVar("fault_api_span", default=None)
+_listeners = []
+
+
+class Span:
+    """
+    One timed stage of a trace. Use as a context manager.
+    """
+
+    __slots__ = ("name", "attributes", "children", "start", "end", "error", "_token")
+
+    def __init__(self, name, attributes=None):
+        self.name = name
+        self.attributes = attributes or {}
+        self.children = []
+        self.start = None
+        self.end = None
+        self.error = None
+        self._token = None
+
+
+    @property
+    def duration(self):
+        """
+        Seconds the span took, or has taken so far if it hasn't finished.
+        """
+
+        if self.start == None:
+            return 0.0
+
+        return (self.end or time.perf_counter()) - self.start
+
+
+    def set(self, **attributes):
+        """
+        Adds attributes to the span, e.g. whether a response came from the cache.
+        """
+
+        self.attributes.update(attributes)
+
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.end = time.perf_counter()
+        if exc_type != None:
+            self.error = exc_type.__name__
+        _current.reset(self._token)
+        return False
+
+
+class Trace(Span):
+    """
+    The root span of a trace. Listeners are called with it when it finishes.
+    """
+
+    __slots__ = ("finished_at",)
+
+    def __init__(self, name, attributes=None):
+        super().__init__(name, attributes)
+        self.finished_at = None
+
+
+    def __exit__(self, exc_type, exc, traceback):
+        super().__exit__(exc_type, exc, traceback)
+        self.finished_at = time.time()
+        for listener in list(_listeners):
+            try:
+                listener(self)
+            except Exception as e:
+                pass  # A broken listener must not break the command it traced
+        return False
+
+
+class _NoSpan:
+    """
+    Stands in for a span outside of a trace.
+    """
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def current_span():
+    """
+    Returns the span that is open in this context or None outside of a trace.
+    """
+
+    return _current.get()
+
+
+def span_set(**attributes):
+    """
+    Adds attributes to the current span. Does nothing outside of a trace.
+    """
+
+    current = _current.get()
+    if current != None:
+        current.set(**attributes)
+
+
+def span(name, **attributes):
+    """
+    Returns a span for a stage of the current trace, or a span that records nothing outside of a trace.
+    """
+
+    parent = _current.get()
+    if parent == None:
+        return _NO_SPAN
+
+    child = Span(name, attributes)
+    parent.children.append(child)
+
+    return child
+
+
+def trace(name, **attributes):
+    """
+    Returns a new trace. Inside another trace it is a span of that trace instead.
+    """
+
+    if _current.get() != None:
+        return span(name, **attributes)
+
+    return Trace(name, attributes)
+
+
+def _decorator(name, open_span):
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with open_span(name):
+                    return await fn(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with open_span(name):
+                    return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced(name):
+    """
+    Decorator that runs a function or coroutine function inside trace(name).
+    The signature of the function is kept, so it can be used under slash command decorators.
+    """
+
+    return _decorator(name, trace)
+
+
+def spanned(name):
+    """
+    Decorator that runs a function or coroutine function inside span(name).
+    """
+
+    return _decorator(name, span)
+
+
+def add_listener(listener):
+    """
+    Adds a function that is called with every finished trace.
+    """
+
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener):
+    """
+    Stops calling a function added with add_listener().
+    """
+
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+## Formatting
+def _describe(span):
+    text = f"{span.name} {span.duration * 1000:.1f} ms"
+    if len(span.attributes) > 0:
+        text += " " + " ".join(f"{key}={value}" for key, value in span.attributes.items())
+    if span.error != None:
+        text += f" error={span.error}"
+
+    return text
+
+
+def format_trace(root):
+    """
+    Returns a trace as an indented tree with the time of every span.
+    """
+
+    lines = []
+
+    def add(span, depth):
+        lines.append("  " * depth + _describe(span))
+        for child in sorted(span.children, key=lambda child: child.start or 0):
+            add(child, depth + 1)
+
+    add(root, 0)
+
+    return "\n".join(lines)
+
+
+def breakdown(root):
+    """
+    Returns the total seconds spent in each stage directly under the root, keyed by stage name.
+    Stages that ran at the same time (like concurrent lookups) can add up to more than the whole trace.
+    """
+
+    stages = {}
+    for child in root.children:
+        stages[child.name] = stages.get(child.name, 0.0) + child.duration
+
+    return stages
+
+
+def format_breakdown(root):
+    """
+    Returns one line with the time of a trace and each of its stages.
+    """
+
+    stages = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in breakdown(root).items())
+    text = f"{root.name} took {root.duration * 1000:.0f} ms"
+    if stages:
+        text += f": {stages}"
+    if root.error != None:
+        text += f" (failed with {root.error})"
+
+    return text
+
+
+class SlowCommandReport:
+    """
+    Rolling timings of the last `window` runs of each command, and the last `size` traces
+    that took at least `threshold` seconds.
+    Safe to share between threads.
+    """
+
+    def __init__(self, threshold=2.0, size=20, window=200):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._window = window
+        self._slow = deque(maxlen=size)
+
+
+    def add(self, root):
+        """
+        Records a finished trace. Returns True if it was slow.
+        """
+
+        slow = root.duration >= self.threshold
+        with self._lock:
+            durations = self._durations.setdefault(root.name, deque(maxlen=self._window))
+            durations.append(root.duration)
+            if slow:
+                self._slow.append((root.finished_at or time.time(), root.duration, format_trace(root)))
+
+        return slow
+
+
+    def stats(self):
+        """
+        Returns {command: {"count", "p50", "p95", "max"}} in seconds over each command's recent runs.
+        """
+
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self._durations.items()}
+
+        stats = {}
+        for name, values in durations.items():
+            stats[name] = {
+                "count": len(values),
+                "p50": values[len(values) // 2],
+                "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max": values[-1],
+            }
+
+        return stats
+
+
+    def slow_traces(self):
+        """
+        Returns (finished at, seconds, formatted trace) for the recent slow traces, newest first.
+        """
+
+        with self._lock:
+            return list(reversed(self._slow))
+
+
+    def report(self):
+        """
+        Returns the timings and slow traces as text.
+        """
+
+        lines = [f"Command timings (slow is {self.threshold:g} s or more):"]
+        for name, stats in sorted(self.stats().items()):
+            lines.append(f"  {name}: {stats['count']} runs, p50 {stats['p50'] * 1000:.0f} ms, "
+                         f"p95 {stats['p95'] * 1000:.0f} ms, max {stats['max'] * 1000:.0f} ms")
+
+        slow = self.slow_traces()
+        lines.append(f"{len(slow)} recent slow commands:")
+        for finished_at, seconds, text in slow:
+            lines.append(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(finished_at)))
+            lines.extend("  " + line for line in text.splitlines())
+
+        return "\n".join(lines)
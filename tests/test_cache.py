@@ -0,0 +1,86 @@
+"""
+Unit tests for the fault_api response cache.
+
+"""
+
+# Imports
+import unittest
+
+from fault_api.cache import (ResponseCache,
+                             MISSING,
+                             FOREVER,
+                             endpoint_name)
+from fault_api.models import MatchDetail
+
+
+class FakeClock:
+    """
+    Clock that only moves when told to.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# Test case
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = ResponseCache(maxsize=2,
+                                   policies={"getEloData": 30, "items": FOREVER, "searchUsers": 0},
+                                   clock=self.clock)
+
+
+    def test_endpoint_name(self):
+        self.assertEqual(endpoint_name("https://api.playfault.com/getMatchData/123"), "getMatchData")
+        self.assertEqual(endpoint_name("https://api.playfault.com/items"), "items")
+
+
+    def test_ttl_expiry(self):
+        url = "https://api.playfault.com/getEloData/29016"
+        self.cache.put(url, {"MMR": 1200})
+        self.clock.now = 29
+        self.assertEqual(self.cache.get(url), {"MMR": 1200})
+        self.clock.now = 31
+        self.assertIs(self.cache.get(url), MISSING)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+
+    def test_zero_ttl_not_stored(self):
+        url = "https://api.playfault.com/searchUsers/qchrisd"
+        self.cache.put(url, [{"id": 29016}])
+        self.assertIs(self.cache.get(url), MISSING)
+
+
+    def test_lru_eviction(self):
+        self.cache.put("https://api.playfault.com/items", {"1": {}})
+        self.cache.put("https://api.playfault.com/getEloData/1", {"MMR": 1})
+        # Touch items so the elo entry is the least recently used
+        self.cache.get("https://api.playfault.com/items")
+        self.cache.put("https://api.playfault.com/getEloData/2", {"MMR": 2})
+
+        self.assertIs(self.cache.get("https://api.playfault.com/getEloData/1"), MISSING)
+        self.assertEqual(self.cache.get("https://api.playfault.com/items"), {"1": {}})
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+        self.assertEqual(len(self.cache), 2)
+
+
+    def test_finished_match_policy(self):
+        cache = ResponseCache(clock=self.clock)
+        finished = {"ID": 1, "Status": 2}
+        in_progress = {"ID": 2, "Status": 1}
+        self.assertEqual(cache.ttl_for("https://api.playfault.com/getMatchData/1", finished), FOREVER)
+        self.assertEqual(cache.ttl_for("https://api.playfault.com/getMatchData/2", in_progress), 30)
+        # Matches are cached as MatchDetail records
+        self.assertEqual(cache.ttl_for("https://api.playfault.com/getMatchData/1", MatchDetail.from_api(finished)), FOREVER)
+        self.assertEqual(cache.ttl_for("https://api.playfault.com/getMatchData/2", MatchDetail.from_api(in_progress)), 30)
+
+
+# Run testing
+if __name__ == '__main__':
+    unittest.main()
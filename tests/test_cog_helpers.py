@@ -2,6 +2,7 @@
 Contains unit tests for the CommandFunctions module.
 """
 
+import asyncio
 import unittest
 import unittest.mock as mock
 import discord
@@ -10,7 +11,20 @@ from bot.cog_helpers import (read_file,
                              remove_from_dict,
                              get_from_dict,
                              embed_elo,
-                             embed_match)
+                             embed_match,
+                             embed_match_header,
+                             embed_team,
+                             start_team_embeds,
+                             get_avatar_links,
+                             MatchPages,
+                             parse_match_id,
+                             lookup_user,
+                             register_user,
+                             unregister_user)
+import bot.cog_helpers
+from bot.user_store import SQLiteUserStore
+from fault_api.models import User, MatchDetail, PlayerLine, build
+from fault_api.ratelimit import current_priority, INTERACTIVE, BACKGROUND
 
 
 class TestCogHelpers(unittest.TestCase):
@@ -52,6 +66,27 @@ class TestCogHelpers(unittest.TestCase):
         self.assertEqual(actual, {"id":29016, "username":"qchrisd"})
 
 
+    @mock.patch("bot.cog_helpers.read_file", return_value='{"guild":{"123":{"qchrisd#1644":{"id":29016, "username":"qchrisd"}}}}')
+    @mock.patch("bot.cog_helpers.SQLiteUserStore", side_effect=lambda path: SQLiteUserStore(":memory:"))
+    @mock.patch("bot.cog_helpers._user_store", None)
+    def test_user_store(self, mock_user_store, mock_read_file):
+        # Registrations in users.json are imported the first time the store is opened
+        self.assertEqual(lookup_user("123", "qchrisd#1644"), User(29016, "qchrisd"))
+        register_user("123", "saxy#0001", User(6969, "saxy_beast"))
+        self.assertEqual(lookup_user("123", "saxy#0001"), User(6969, "saxy_beast"))
+        self.assertEqual(unregister_user("123", "saxy#0001"), User(6969, "saxy_beast"))
+        self.assertEqual(lookup_user("123", "saxy#0001"), None)
+        mock_read_file.assert_called_once_with(bot.cog_helpers.USERS_JSON_PATH)
+
+
+    def test_parse_match_id(self):
+        self.assertEqual(parse_match_id("798209"), 798209)
+        self.assertEqual(parse_match_id(" id:798209 "), 798209)
+        self.assertEqual(parse_match_id("ID: 798209"), 798209)
+        self.assertEqual(parse_match_id("qchrisd"), None)
+        self.assertEqual(parse_match_id("-1"), None)
+
+
     def test_embed_elo(self):
         fault_name = "qchrisd"
         elo_title = "Silver"
@@ -77,9 +112,8 @@ class TestCogHelpers(unittest.TestCase):
         self.assertEqual(actual.to_dict(), expected)
 
     
-    @mock.patch("fault_api.get_player_avatar", return_value="https://api.playfault.com/imagecdn/avatars/21034.jpg")
-    @mock.patch("fault_api.get_image_hero_portrait", return_value = "https://api.playfault.com/imagecdn/portraits/6.jpg")
-    def test_embed_match(self, mock_get_player_avatar, mock_hero_avatar):
+    @mock.patch("fault_api.image_link_hero_portrait", return_value = "https://api.playfault.com/imagecdn/portraits/6.jpg")
+    def test_embed_match(self, mock_hero_avatar):
         match_details = {
                             "ID": 123,
                             "Winner": 1,
@@ -137,7 +171,7 @@ class TestCogHelpers(unittest.TestCase):
 
         expected_loser = {
             "color": 0xef0000,
-            "author":{"name":"qchrisd", "icon_url":"https://api.playfault.com/imagecdn/avatars/21034.jpg"},
+            "author":{"name":"qchrisd"},
             "title": "Twinblast - lvl 14",
             "thumbnail": {"url":"https://api.playfault.com/imagecdn/portraits/6.jpg"},
             "fields":[
@@ -151,11 +185,124 @@ class TestCogHelpers(unittest.TestCase):
 
         expected_embeds = [expected_winner, expected_loser]
         
-        actual_embeds = embed_match(match_details, id_to_hero)
+        avatar_links = [None, "https://api.playfault.com/imagecdn/avatars/21034.jpg"]
+        
+        actual_embeds = embed_match(MatchDetail.from_api(match_details), id_to_hero, avatar_links=avatar_links)
         actual_embeds = [discord.Embed.to_dict(x) for x in actual_embeds]
 
         self.assertEqual(actual_embeds, expected_embeds)
 
 
+    def test_embed_match_header(self):
+        players = [{"PlayerID": 1, "Username": "qchrisd", "Team": 0, "HeroID": 4, "MMR": 1200, "Kills": 3, "Deaths": 10, "Assists": 2},
+                   {"PlayerID": 2, "Username": "saxy_beast", "Team": 1, "HeroID": 6, "MMR": 1100, "Kills": 7, "Deaths": 2, "Assists": 3},
+                   {"PlayerID": 3, "Username": "other", "Team": 1, "HeroID": 7, "MMR": 1300, "Kills": 1, "Deaths": 1, "Assists": 1}]
+        match = MatchDetail.from_api({"ID": 123, "Winner": 1, "TimeLength": "1:00:20", "Players": players})
+
+        header = embed_match_header(match, {4: "Twinblast", 6: "Narbash"}, fault_name="qchrisd").to_dict()
+
+        self.assertEqual(header["title"], "Team 2 won")
+        self.assertEqual(header["footer"]["text"], "1:00:20 - id:123")
+        # Winners first, with the team's average MMR
+        self.assertEqual([field["name"] for field in header["fields"]], ["Team 2 won (MMR 1200)", "Team 1 lost (MMR 1200)"])
+        self.assertEqual(header["fields"][0]["value"], "Narbash - saxy_beast 7/2/3\nUnknown hero - other 1/1/1")
+        self.assertEqual(header["fields"][1]["value"], "Twinblast - **qchrisd** 3/10/2")
+
+
+    @mock.patch("fault_api.image_link_hero_portrait", return_value="portrait.jpg")
+    def test_embed_team(self, mock_hero_portrait):
+        players = [{"PlayerID": 1, "Username": "a", "Team": 0, "HeroID": 4, "MMR": 1200},
+                   {"PlayerID": 2, "Username": "b", "Team": 1, "HeroID": 6, "MMR": 1100},
+                   {"PlayerID": 3, "Username": "c", "Team": 0, "HeroID": 6, "MMR": 1000}]
+        match = MatchDetail.from_api({"ID": 123, "Winner": 1, "TimeLength": "00:30:00", "Players": players})
+
+        embeds = embed_team(match, 0, {4: "Twinblast", 6: "Narbash"}, avatar_links=["a.jpg", None])
+
+        self.assertEqual([embed.author.name for embed in embeds], ["a", "c"])
+        self.assertEqual([embed.author.icon_url for embed in embeds], ["a.jpg", None])
+        # Embeds match those of the whole match
+        self.assertEqual([embed.to_dict() for embed in embeds],
+                         [embed.to_dict() for embed in embed_match(match, {4: "Twinblast", 6: "Narbash"}, avatar_links=["a.jpg", None, None])[1:]])
+        # Heroes missing from the hero stats don't stop the embeds
+        self.assertEqual([embed.title for embed in embed_team(match, 0, {4: "Twinblast"})], ["Twinblast - lvl None", "Unknown hero - lvl None"])
+
+
+
+class TestCogHelpersAsync(unittest.IsolatedAsyncioTestCase):
+
+
+    @mock.patch("fault_api.aio.get_user", new_callable=mock.AsyncMock)
+    @mock.patch("fault_api.aio.get_player_avatar", new_callable=mock.AsyncMock)
+    async def test_get_avatar_links(self, mock_get_player_avatar, mock_get_user):
+        players = [PlayerLine.from_api(player) for player in
+                   [{"PlayerID":29016, "Username":"qchrisd"}, {"PlayerID":1, "Username":"missing"}, {"PlayerID":6969, "Username":"saxy_beast"}]]
+
+        async def get_player_avatar(player_id):
+            if player_id == 1:
+                raise KeyError(player_id)
+            return {"avatarURI":f"{player_id}.jpg"}
+        mock_get_player_avatar.side_effect = get_player_avatar
+
+        actual = await get_avatar_links(players, limit=2)
+
+        # Order is kept and the failed player falls back to None
+        self.assertEqual(actual, ["29016.jpg", None, "6969.jpg"])
+        # Avatars are looked up by id without searching for the user
+        mock_get_user.assert_not_awaited()
+
+
+    @mock.patch("fault_api.image_link_hero_portrait", return_value="portrait.jpg")
+    @mock.patch("fault_api.aio.get_player_avatar", new_callable=mock.AsyncMock)
+    async def test_start_team_embeds(self, mock_get_player_avatar, mock_hero_portrait):
+        players = [{"PlayerID": 1, "Username": "slow", "Team": 0, "HeroID": 4, "MMR": 1200},
+                   {"PlayerID": 2, "Username": "fast", "Team": 1, "HeroID": 6, "MMR": 1100}]
+        match = MatchDetail.from_api({"ID": 123, "Winner": 0, "TimeLength": "00:30:00", "Players": players})
+        release = asyncio.Event()
+
+        async def get_player_avatar(player_id):
+            if player_id == 1:
+                await release.wait()
+            return {"avatarURI": f"{player_id}.jpg"}
+        mock_get_player_avatar.side_effect = get_player_avatar
+
+        winners, losers = start_team_embeds(match, {4: "Twinblast", 6: "Narbash"})
+
+        # Each team is ready as soon as its own avatars are in
+        done, pending = await asyncio.wait({winners, losers}, return_when=asyncio.FIRST_COMPLETED)
+        self.assertEqual(done, {losers})
+        self.assertEqual([embed.author.icon_url for embed in losers.result()], ["2.jpg"])
+        release.set()
+        self.assertEqual([embed.author.name for embed in await winners], ["slow"])
+        self.assertEqual(winners.result()[0].author.icon_url, "1.jpg")
+
+
+    @mock.patch("bot.cog_helpers.get_avatar_links", new_callable=mock.AsyncMock, return_value=[None, None])
+    @mock.patch("fault_api.aio.get_match_data", new_callable=mock.AsyncMock)
+    async def test_match_pages(self, mock_get_match_data, mock_get_avatar_links):
+        players = [{"PlayerID": 1, "Username": "a", "Team": 0, "HeroID": 4, "MMR": 1200}, {"PlayerID": 2, "Username": "b", "Team": 1, "HeroID": 6, "MMR": 1100}]
+        priorities = {}
+
+        def get_match_data(match_id):
+            priorities[match_id] = current_priority()
+            return MatchDetail.from_api({"ID": match_id, "Winner": 1, "TimeLength": "00:30:00", "Players": players})
+
+        mock_get_match_data.side_effect = get_match_data
+        matches = build("https://api.playfault.com/getMatches/1/3", {"success": True, "matches": [{"id": 3}, {"id": 2}, {"id": 1}]})
+
+        pages = MatchPages(matches, {4: "Twinblast", 6: "Narbash"})
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(pages.label(1), "Match 2 of 3")
+
+        # The match data for every page is requested up front
+        embeds = await pages.page(1)
+        self.assertEqual([call.args for call in mock_get_match_data.await_args_list], [(3,), (2,), (1,)])
+        # Only the first page is requested as part of the command, the rest are background prefetches
+        self.assertEqual(priorities, {3: INTERACTIVE, 2: BACKGROUND, 1: BACKGROUND})
+        self.assertEqual(embeds[0].footer.text, "00:30:00 - id:2")
+        # but a page is only built once
+        self.assertIs(await pages.page(1), embeds)
+        self.assertEqual(mock_get_avatar_links.await_count, 1)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -11,12 +11,25 @@ import unittest
 import unittest.mock as mock
 
 # Import methods
+import urllib3
 import fault_api
-from fault_api import (_decode_json,
+from fault_api.resilience import APIError, CircuitOpenError
+from fault_api.models import User, build
+from fault_api import (API_URL,
+                       _decode_json,
                        _create_pool_manager,
+                       _get_pool_manager,
+                       configure_pool,
+                       _query_website,
+                       set_cache,
+                       set_static_store,
+                       _refresh_static,
                        _check_user_request_response,
                        get_hero_play_stats,
                        get_hero_dicts,
+                       get_registry,
+                       refresh_registry,
+                       set_registry,
                        get_user,
                        get_user_id,
                        get_hero_info,
@@ -25,21 +38,240 @@ from fault_api import (_decode_json,
                        get_matches,
                        get_match_data,
                        get_player_hero_stats,
-                       get_elo)
+                       get_elo,
+                       get_player_avatar)
 
 # Test case
 class FaultAPIRequestTest(unittest.TestCase):
-    
+
+    def setUp(self):
+        # Tests swap in their own decoder, caches, limiter and so on, which are all put back afterwards
+        self.settings = {
+            fault_api.set_json_decoder: fault_api._json_decoder,
+            set_cache: fault_api.get_cache(),
+            set_static_store: fault_api._static_store,
+            fault_api.set_image_cache: fault_api._image_cache,
+            fault_api.set_circuit_breaker: fault_api.get_circuit_breaker(),
+            fault_api.set_rate_limiter: fault_api.get_rate_limiter(),
+            fault_api.set_metrics: fault_api.get_metrics(),
+            set_registry: fault_api.loaded_registry(),
+        }
+
+
+    def tearDown(self):
+        for set_setting, value in self.settings.items():
+            set_setting(value)
+
+
     def test_decode_json(self):
         actual = _decode_json(b'{"id":"29016","username":"qchrisd","eloTitle":"Silver","MMR":1223.1,"ranking":1129,"placementGamesRemain":0}')
         self.assertEqual(actual['id'], "29016")
-    
+
+
+    def test_json_decoders(self):
+        data = b'{"id":"29016","MMR":1223.1}'
+        for name in fault_api.JSON_DECODERS:
+            fault_api.set_json_decoder(name)
+            # Every decoder reads the response buffer without a copy first
+            self.assertEqual(_decode_json(memoryview(data)), {"id": "29016", "MMR": 1223.1})
+            self.assertEqual(_decode_json(bytearray(data)), {"id": "29016", "MMR": 1223.1})
+            # and raises a ValueError for data that isn't JSON
+            self.assertRaises(ValueError, _decode_json, b'<html>502 Bad Gateway</html>')
+
+        fault_api.set_json_decoder(lambda json_data: "decoded")
+        self.assertEqual(_decode_json(data), "decoded")
+
 
     def test_create_pool_manager(self):
         import urllib3
         self.assertIsInstance(_create_pool_manager(), urllib3.PoolManager)
 
 
+    def test_get_pool_manager(self):
+        # The same pool is reused between calls
+        self.assertIs(_get_pool_manager(), _get_pool_manager())
+        # Reconfiguring replaces the shared pool
+        old_http = _get_pool_manager()
+        new_http = configure_pool(maxsize=4)
+        self.assertIsNot(old_http, new_http)
+        self.assertIs(_get_pool_manager(), new_http)
+        self.assertEqual(new_http.connection_pool_kw["maxsize"], 4)
+
+
+    @mock.patch("fault_api._fetch_json")
+    def test_query_website_cache(self, mock_fetch_json):
+        from fault_api.cache import ResponseCache
+        cache = set_cache(ResponseCache())
+        mock_fetch_json.return_value = {"heroes": {}}
+        # Second call is served from the cache
+        _query_website("https://api.playfault.com/getPlayerHeroStats/29016")
+        actual = _query_website("https://api.playfault.com/getPlayerHeroStats/29016")
+        self.assertEqual(actual, {"heroes": {}})
+        self.assertEqual(mock_fetch_json.call_count, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+        # Disabled cache always fetches
+        set_cache(None)
+        _query_website("https://api.playfault.com/getPlayerHeroStats/29016")
+        self.assertEqual(mock_fetch_json.call_count, 2)
+
+
+    @mock.patch("fault_api._schedule_refresh")
+    @mock.patch("fault_api._fetch_response")
+    def test_query_website_static_store(self, mock_fetch_response, mock_schedule_refresh):
+        from fault_api.store import StaticStore
+        set_cache(None)
+        store = set_static_store(StaticStore(":memory:", max_age=60))
+        url = "https://api.playfault.com/items"
+        mock_fetch_response.return_value = mock.Mock(status=200, data=b'{"1": {"id": 1}}', headers={"ETag": "v1"})
+        # First call fetches and stores the response
+        self.assertEqual(_query_website(url), {"1": {"id": 1}})
+        self.assertEqual(store.get(url).etag, "v1")
+        # Later calls are served from disk
+        self.assertEqual(_query_website(url), {"1": {"id": 1}})
+        self.assertEqual(mock_fetch_response.call_count, 1)
+        mock_schedule_refresh.assert_not_called()
+        # Stale entries are still served but refreshed in the background
+        store.max_age = -1
+        self.assertEqual(_query_website(url), {"1": {"id": 1}})
+        mock_schedule_refresh.assert_called_once_with(url)
+
+
+    @mock.patch("fault_api._fetch_response")
+    def test_refresh_static(self, mock_fetch_response):
+        from fault_api.store import StaticStore
+        store = set_static_store(StaticStore(":memory:"))
+        url = "https://api.playfault.com/aspects"
+        store.put(url, b'[]', etag="v1")
+        # Not modified only touches the stored copy
+        mock_fetch_response.return_value = mock.Mock(status=304, data=b'', headers={})
+        _refresh_static(url)
+        mock_fetch_response.assert_called_with(url, headers={"If-None-Match": "v1"})
+        self.assertEqual(store.get(url).body, b'[]')
+        # New data replaces it
+        mock_fetch_response.return_value = mock.Mock(status=200, data=b'[{"name": "King"}]', headers={"ETag": "v2"})
+        _refresh_static(url)
+        self.assertEqual(store.get(url).etag, "v2")
+
+
+    @mock.patch("fault_api.time.sleep")
+    @mock.patch("fault_api._get_pool_manager")
+    def test_fetch_response_retries(self, mock_get_pool_manager, mock_sleep):
+        from fault_api.resilience import CircuitBreaker
+        http = mock_get_pool_manager.return_value
+        breaker = fault_api.set_circuit_breaker(CircuitBreaker(failure_threshold=2, cooldown=60))
+        fault_api.set_rate_limiter(None)
+        url = "https://api.playfault.com/getEloData/29016"
+        # Retried after a 503 and then succeeds
+        http.request.side_effect = [mock.Mock(status=503), mock.Mock(status=200, data=b'{"MMR": 1}')]
+        self.assertEqual(fault_api._fetch_json(url), {"MMR": 1})
+        self.assertEqual(http.request.call_count, 2)
+        self.assertEqual(mock_sleep.call_count, 1)
+        # Connection errors give up after RETRIES and count as one failure
+        http.request.reset_mock()
+        http.request.side_effect = urllib3.exceptions.NewConnectionError(None, "down")
+        with self.assertRaises(APIError):
+            fault_api._fetch_json(url)
+        self.assertEqual(http.request.call_count, fault_api.RETRIES + 1)
+        # The second failure opens the breaker and later requests fail fast
+        with self.assertRaises(APIError):
+            fault_api._fetch_json(url)
+        http.request.reset_mock()
+        with self.assertRaises(CircuitOpenError):
+            fault_api._fetch_json(url)
+        http.request.assert_not_called()
+
+
+    @mock.patch("fault_api._get_pool_manager")
+    def test_unexpected_error_releases_trial(self, mock_get_pool_manager):
+        from fault_api.resilience import CircuitBreaker
+        http = mock_get_pool_manager.return_value
+        breaker = fault_api.set_circuit_breaker(CircuitBreaker(failure_threshold=1, cooldown=0))
+        fault_api.set_rate_limiter(None)
+        url = "https://api.playfault.com/getEloData/29016"
+        # Half open straight away, so every request is the trial
+        breaker.record_failure("getEloData")
+        http.request.side_effect = RuntimeError("not an HTTP error")
+        with self.assertRaises(RuntimeError):
+            fault_api._fetch_json(url)
+        # The trial was given back, so the next request is still made
+        http.request.side_effect = None
+        http.request.return_value = mock.Mock(status=200, data=b'{"MMR": 1}')
+        self.assertEqual(fault_api._fetch_json(url), {"MMR": 1})
+
+
+    @mock.patch("fault_api.time.sleep")
+    @mock.patch("fault_api._get_pool_manager")
+    def test_metrics(self, mock_get_pool_manager, mock_sleep):
+        from fault_api.cache import ResponseCache
+        from fault_api.metrics import Metrics
+        http = mock_get_pool_manager.return_value
+        set_cache(ResponseCache())
+        metrics = fault_api.set_metrics(Metrics())
+        fault_api.set_rate_limiter(None)
+        url = "https://api.playfault.com/getPlayerHeroStats/29016"
+        http.request.side_effect = [mock.Mock(status=503), mock.Mock(status=200, data=b'{"heroes": {}}')]
+        _query_website(url)
+        _query_website(url)
+        self.assertEqual(metrics.value("fault_api_requests_total", endpoint="getPlayerHeroStats", status=503), 1)
+        self.assertEqual(metrics.value("fault_api_requests_total", endpoint="getPlayerHeroStats", status=200), 1)
+        self.assertEqual(metrics.value("fault_api_request_duration_seconds", endpoint="getPlayerHeroStats"), 2)
+        self.assertEqual(metrics.value("fault_api_response_bytes_total", endpoint="getPlayerHeroStats"), 14)
+        self.assertEqual(metrics.value("fault_api_errors_total", endpoint="getPlayerHeroStats", kind="status"), 1)
+        self.assertEqual(metrics.value("fault_api_cache_requests_total", endpoint="getPlayerHeroStats", result="miss"), 1)
+        self.assertEqual(metrics.value("fault_api_cache_requests_total", endpoint="getPlayerHeroStats", result="hit"), 1)
+        # Disabled metrics record nothing
+        fault_api.set_metrics(None)
+        _query_website(url)
+
+
+    @mock.patch("fault_api._fetch_response")
+    def test_fetch_json_error_page(self, mock_fetch_response):
+        mock_fetch_response.return_value = mock.Mock(status=502, data=b"<html>Bad Gateway</html>")
+        with self.assertRaises(APIError):
+            fault_api._fetch_json("https://api.playfault.com/getEloData/29016")
+        mock_fetch_response.return_value = mock.Mock(status=404, data=b"<html>Not Found</html>")
+        with self.assertRaises(APIError):
+            fault_api._fetch_json("https://api.playfault.com/getEloData/29016")
+
+
+    @mock.patch("fault_api._fetch_json")
+    def test_query_website_serves_stale(self, mock_fetch_json):
+        from fault_api.cache import ResponseCache
+        now = [0.0]
+        set_cache(ResponseCache(policies={"getEloData": 30}, clock=lambda: now[0]))
+        url = "https://api.playfault.com/getEloData/29016"
+        mock_fetch_json.return_value = {"MMR": 1200}
+        _query_website(url)
+        # Expired, and the website is down
+        now[0] = 60
+        mock_fetch_json.side_effect = CircuitOpenError("getEloData is failing")
+        self.assertEqual(_query_website(url).mmr, 1200)
+        # Nothing cached to fall back on
+        with self.assertRaises(CircuitOpenError):
+            _query_website("https://api.playfault.com/getEloData/1")
+
+
+    @mock.patch("fault_api._fetch_response")
+    def test_get_images(self, mock_fetch_response):
+        import tempfile
+        from fault_api.images import ImageCache
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        image_cache = fault_api.set_image_cache(ImageCache(directory.name))
+        self.addCleanup(image_cache.close)
+        mock_fetch_response.return_value = mock.Mock(status=200, data=b"jpg")
+        # Downloaded once and then served from disk
+        self.assertEqual(fault_api.get_image_item(5), b"jpg")
+        self.assertEqual(fault_api.get_image_item(5), b"jpg")
+        mock_fetch_response.assert_called_once_with("https://api.playfault.com/imagecdn/items/5.jpg")
+        # Missing images
+        mock_fetch_response.return_value = mock.Mock(status=404, data=b"")
+        self.assertEqual(fault_api.get_image_hero_ability("Twinblast", "Q"), None)
+        mock_fetch_response.assert_called_with("https://api.playfault.com/imagecdn/abilities/Twinblast/Q.png")
+        # Links for embeds don't download anything
+        self.assertEqual(fault_api.image_link_hero_portrait(6), "https://api.playfault.com/imagecdn/portraits/6.jpg")
+
+
     def test_check_user_request_response(self):
         # Success case
         actual_success = _check_user_request_response({"success":True, "players":{0:{"id":29016}}})
@@ -62,14 +294,50 @@ class FaultAPIRequestTest(unittest.TestCase):
         self.assertEqual(actual_id_to_hero, {2:"Twinblast"})
 
 
+    @mock.patch("fault_api.get_aspects", return_value=[])
+    @mock.patch("fault_api.get_items", return_value={})
+    @mock.patch("fault_api.get_hero_play_stats")
+    def test_get_registry(self, mock_get_hero_play_stats, mock_get_items, mock_get_aspects):
+        mock_get_hero_play_stats.return_value = {"Twinblast":{"Id":2}}
+        set_registry(None)
+        self.assertIsNone(fault_api.loaded_registry())
+        # Loaded once on first use
+        registry = get_registry()
+        self.assertIs(fault_api.loaded_registry(), registry)
+        _, actual_id_to_hero = get_hero_dicts()
+        self.assertIs(get_registry(), registry)
+        self.assertEqual(actual_id_to_hero, {2:"Twinblast"})
+        self.assertEqual(mock_get_hero_play_stats.call_count, 1)
+        # Refreshing swaps in a new registry and leaves the old one untouched
+        mock_get_hero_play_stats.return_value = {"Twinblast":{"Id":2}, "Narbash":{"Id":6}}
+        new_registry = refresh_registry()
+        _, actual_id_to_hero = get_hero_dicts()
+        self.assertEqual(actual_id_to_hero, {2:"Twinblast", 6:"Narbash"})
+        self.assertIs(get_registry(), new_registry)
+        self.assertEqual(registry.hero_name(6), None)
+
+
+    def test_import_does_no_io(self):
+        import subprocess
+        import sys
+        # Importing with networking and sqlite broken must still work
+        code = ("import socket, sqlite3\n"
+                "def fail(*args, **kwargs): raise AssertionError('I/O at import')\n"
+                "socket.socket.connect = fail\n"
+                "sqlite3.connect = fail\n"
+                "import fault_api, fault_api.aio\n")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
     @mock.patch("fault_api._query_website")
     def test_get_user(self, mock_query_website):
         # Success case
-        mock_query_website.return_value = [{"id": 29016,"username": "qchrisd"}]
+        mock_query_website.return_value = build(f"{API_URL}/searchUsers/qchrisd", [{"id": 29016,"username": "qchrisd"}])
         actual = get_user("qchrisd")
-        self.assertEqual(actual, {"id": 29016,"username": "qchrisd"})
+        self.assertEqual(actual, User(29016, "qchrisd"))
         # Fail case
-        mock_query_website.return_value = []
+        mock_query_website.return_value = ()
         actual = get_user("qchrisd")
         self.assertEqual(actual, None)
 
@@ -122,9 +390,9 @@ class FaultAPIRequestTest(unittest.TestCase):
     @mock.patch("fault_api._query_website")
     def test_get_matches(self, mock_query_website):
         # Successfully found user
-        mock_query_website.return_value = {"success": True,"matches": [{"id": 766814}]}
+        mock_query_website.return_value = build(f"{API_URL}/getMatches/29016/1", {"success": True,"matches": [{"id": 766814}]})
         actual = get_matches({"ID":29016, "username":"qchrisd"})
-        self.assertEqual(actual, {"id": 766814})
+        self.assertEqual(actual.id, 766814)
         # Failed to find user
         mock_query_website.return_value = {"success":False}
         actual = get_matches(None)
@@ -133,9 +401,9 @@ class FaultAPIRequestTest(unittest.TestCase):
 
     @mock.patch("fault_api._query_website")
     def test_get_match_data(self, mock_query_website):
-        mock_query_website.return_value = {"ID": 766814,"Winner": 0,"StartDateTime": "2022-02-17T03:20:48.000Z"}
+        mock_query_website.return_value = build(f"{API_URL}/getMatchData/766814", {"ID": 766814,"Winner": 0,"StartDateTime": "2022-02-17T03:20:48.000Z"})
         actual = get_match_data(766814)
-        self.assertEqual(actual["ID"], 766814)
+        self.assertEqual(actual.id, 766814)
 
     
     @mock.patch("fault_api._query_website")
@@ -155,12 +423,32 @@ class FaultAPIRequestTest(unittest.TestCase):
     def test_get_elo(self, mock_query_website):
         user = {"ID":29016, "username":"qchrisd"}
         # successfully found user
-        mock_query_website.return_value = {"id":"29016","username":"qchrisd","eloTitle":"Silver","MMR":1223.1,"ranking":1136,"placementGamesRemain":0}
+        mock_query_website.return_value = build(f"{API_URL}/getEloData/29016", {"id":"29016","username":"qchrisd","eloTitle":"Silver","MMR":1223.1,"ranking":1136,"placementGamesRemain":0})
         actual = get_elo(user)
-        self.assertEqual(actual["id"], "29016")
+        self.assertEqual(actual.id, "29016")
         # Failed to find user
         actual = get_elo(None)
         self.assertEqual(actual, None)
+
+
+
+    @mock.patch("fault_api._query_website")
+    def test_get_player_avatar(self, mock_query_website):
+        mock_query_website.return_value = {"avatarId": 21034, "avatarURI": "avatar.link"}
+        # User
+        actual = get_player_avatar(User(29016, "qchrisd"))
+        self.assertEqual(actual["avatarURI"], "avatar.link")
+        mock_query_website.assert_called_with("https://api.playfault.com/userAvatar/29016")
+        # User dict
+        actual = get_player_avatar({"id":29016, "username":"qchrisd"})
+        self.assertEqual(actual["avatarURI"], "avatar.link")
+        mock_query_website.assert_called_with("https://api.playfault.com/userAvatar/29016")
+        # Bare player id
+        actual = get_player_avatar(29016)
+        self.assertEqual(actual["avatarURI"], "avatar.link")
+        mock_query_website.assert_called_with("https://api.playfault.com/userAvatar/29016")
+        # No user
+        self.assertEqual(get_player_avatar(None), None)
     
 
 # Run testing
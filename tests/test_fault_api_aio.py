@@ -0,0 +1,164 @@
+"""
+Unit tests for the asyncio FaultAPI module.
+
+"""
+
+# Imports
+import asyncio
+import unittest
+import unittest.mock as mock
+
+# Import methods
+import fault_api
+import fault_api.aio
+from fault_api import API_URL
+from fault_api.models import User, build
+from fault_api.aio import (_get_session,
+                           close,
+                           get_hero_dicts,
+                           get_registry,
+                           get_user,
+                           get_matches,
+                           get_recent_matches,
+                           get_match_data,
+                           get_elo,
+                           get_player_avatar)
+
+# Test case
+class FaultAPIAioRequestTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        # Tests swap in their own caches, limiter and so on, which are all put back afterwards
+        self.settings = {
+            fault_api.set_cache: fault_api.get_cache(),
+            fault_api.set_static_store: fault_api._static_store,
+            fault_api.set_circuit_breaker: fault_api.get_circuit_breaker(),
+            fault_api.set_rate_limiter: fault_api.get_rate_limiter(),
+            fault_api.set_registry: fault_api.loaded_registry(),
+        }
+
+
+    def tearDown(self):
+        for set_setting, value in self.settings.items():
+            set_setting(value)
+
+
+    async def test_get_session(self):
+        # The same session is shared between calls
+        session = _get_session()
+        self.assertIs(session, _get_session())
+        # Closing makes a new session on the next call
+        await close()
+        self.assertTrue(session.closed)
+        new_session = _get_session()
+        self.assertIsNot(session, new_session)
+        await close()
+
+
+    @mock.patch("fault_api.aio._get_session")
+    async def test_cancelled_request_releases_trial(self, mock_get_session):
+        from fault_api.resilience import CircuitBreaker
+        breaker = fault_api.set_circuit_breaker(CircuitBreaker(failure_threshold=1, cooldown=0))
+        fault_api.set_rate_limiter(None)
+        breaker.record_failure("getEloData")
+        mock_get_session.return_value.get.side_effect = asyncio.CancelledError
+        with self.assertRaises(asyncio.CancelledError):
+            await fault_api.aio._fetch_json("https://api.playfault.com/getEloData/29016")
+        # The half open trial was given back
+        self.assertTrue(breaker.allow("getEloData"))
+
+
+    @mock.patch("fault_api._query_static", return_value={"heroes": {}})
+    async def test_static_lookup_is_traced_once(self, mock_query_static):
+        from fault_api import tracing
+        from fault_api.cache import ResponseCache
+        fault_api.set_cache(ResponseCache())
+        fault_api.set_static_store(mock.Mock())
+        url = f"{API_URL}/getStatsPerHero"
+        with tracing.trace("/stats") as root:
+            self.assertEqual(await fault_api.aio._query_website(url), {"heroes": {}})
+        # One span and one cache lookup, not a second one from the blocking _query_website
+        self.assertEqual([(child.name, child.attributes) for child in root.children], [("getStatsPerHero", {"cache": "miss"})])
+        self.assertEqual(root.children[0].children, [])
+        mock_query_static.assert_called_once_with(url)
+
+
+    @mock.patch("fault_api.aio._query_website", new_callable=mock.AsyncMock)
+    async def test_get_hero_dicts(self, mock_query_website):
+        responses = {
+            "https://api.playfault.com/getStatsPerHero": {"heroes": {"Twinblast": {"Id": 2}}},
+            "https://api.playfault.com/items": {"5": {"id": 5, "name": "S.I. Boots"}},
+            "https://api.playfault.com/aspects": [{"name": "King"}]
+        }
+        mock_query_website.side_effect = lambda url: responses[url]
+        fault_api.set_registry(None)
+        actual_hero_to_id, actual_id_to_hero = await get_hero_dicts()
+        self.assertEqual(actual_hero_to_id, {"Twinblast": 2})
+        self.assertEqual(actual_id_to_hero, {2: "Twinblast"})
+        # The registry is loaded once and shared with fault_api
+        registry = await get_registry()
+        self.assertIs(registry, fault_api.get_registry())
+        self.assertEqual(registry.item(5).name, "S.I. Boots")
+        self.assertEqual(mock_query_website.await_count, 3)
+
+
+    @mock.patch("fault_api.aio._query_website", new_callable=mock.AsyncMock)
+    async def test_get_user(self, mock_query_website):
+        # Success case
+        mock_query_website.return_value = build(f"{API_URL}/searchUsers/qchrisd", [{"id": 29016,"username": "qchrisd"}])
+        actual = await get_user("qchrisd")
+        self.assertEqual(actual, User(29016, "qchrisd"))
+        # Fail case
+        mock_query_website.return_value = ()
+        actual = await get_user("qchrisd")
+        self.assertEqual(actual, None)
+
+
+    @mock.patch("fault_api.aio._query_website", new_callable=mock.AsyncMock)
+    async def test_get_matches(self, mock_query_website):
+        mock_query_website.return_value = build(f"{API_URL}/getMatches/29016/1", {"success": True,"matches": [{"id": 766814}]})
+        actual = await get_matches(User(29016, "qchrisd"))
+        self.assertEqual(actual.id, 766814)
+        mock_query_website.assert_awaited_with("https://api.playfault.com/getMatches/29016/1")
+        # Failed to find user
+        actual = await get_matches(None)
+        self.assertEqual(actual, None)
+
+
+    @mock.patch("fault_api.aio._query_website", new_callable=mock.AsyncMock)
+    async def test_get_recent_matches(self, mock_query_website):
+        mock_query_website.return_value = build(f"{API_URL}/getMatches/29016/3", {"success": True,"matches": [{"id": 3}, {"id": 2}, {"id": 1}]})
+        actual = await get_recent_matches(29016, 3)
+        self.assertEqual([match.id for match in actual], [3, 2, 1])
+        mock_query_website.assert_awaited_once_with("https://api.playfault.com/getMatches/29016/3")
+
+
+    @mock.patch("fault_api.aio._query_website", new_callable=mock.AsyncMock)
+    async def test_get_match_data(self, mock_query_website):
+        mock_query_website.return_value = build(f"{API_URL}/getMatchData/766814", {"ID": 766814,"Winner": 0})
+        actual = await get_match_data(766814)
+        self.assertEqual(actual.id, 766814)
+
+
+    @mock.patch("fault_api.aio._query_website", new_callable=mock.AsyncMock)
+    async def test_get_elo(self, mock_query_website):
+        mock_query_website.return_value = build(f"{API_URL}/getEloData/29016", {"id":"29016","username":"qchrisd","eloTitle":"Silver"})
+        actual = await get_elo(User(29016, "qchrisd"))
+        self.assertEqual(actual.elo_title, "Silver")
+        mock_query_website.assert_awaited_with("https://api.playfault.com/getEloData/29016")
+        # Failed to find user
+        actual = await get_elo(None)
+        self.assertEqual(actual, None)
+
+
+    @mock.patch("fault_api.aio._query_website", new_callable=mock.AsyncMock)
+    async def test_get_player_avatar(self, mock_query_website):
+        mock_query_website.return_value = {"avatarId": 1, "avatarURI": "avatar.link"}
+        actual = await get_player_avatar({"id":29016, "username":"qchrisd"})
+        self.assertEqual(actual["avatarURI"], "avatar.link")
+        self.assertEqual(await get_player_avatar(None), None)
+
+
+# Run testing
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Unit tests for fault_api atomic file writes.
+
+"""
+
+# Imports
+import os
+import tempfile
+import unittest
+import unittest.mock as mock
+
+from fault_api.files import atomic_write
+
+
+class AtomicWriteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "users.json")
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def test_write(self):
+        atomic_write(self.path, '{"guild": {}}')
+        with open(self.path, "r") as file:
+            self.assertEqual(file.read(), '{"guild": {}}')
+        # Bytes replace the old file
+        atomic_write(self.path, b"\x89PNG", fsync=True)
+        with open(self.path, "rb") as file:
+            self.assertEqual(file.read(), b"\x89PNG")
+        self.assertEqual(os.listdir(self.directory.name), ["users.json"])
+
+
+    def test_failed_write_leaves_the_old_file(self):
+        atomic_write(self.path, "old")
+        with mock.patch("fault_api.files.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                atomic_write(self.path, "new")
+        with open(self.path, "r") as file:
+            self.assertEqual(file.read(), "old")
+        # No temporary files are left behind
+        self.assertEqual(os.listdir(self.directory.name), ["users.json"])
+
+
+# Run testing
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Unit tests for the fault_api image cache.
+
+"""
+
+# Imports
+import os
+import tempfile
+import unittest
+
+from fault_api.images import ImageCache, content_hash, INDEX_FILE, TOUCH_INTERVAL
+
+
+class ImageCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.now = [0.0]
+        self.cache = ImageCache(self.directory.name, max_bytes=10, clock=lambda: self.now[0])
+
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+
+    def tick(self, seconds=TOUCH_INTERVAL):
+        self.now[0] += seconds
+
+
+    def files(self):
+        return sorted(name for name in os.listdir(self.directory.name) if name != INDEX_FILE)
+
+
+    def test_put_get(self):
+        self.assertEqual(self.cache.get("https://api.playfault.com/imagecdn/items/1.jpg"), None)
+        digest = self.cache.put("https://api.playfault.com/imagecdn/items/1.jpg", b"jpg1")
+        self.assertEqual(digest, content_hash(b"jpg1"))
+        self.assertEqual(self.cache.get("https://api.playfault.com/imagecdn/items/1.jpg"), b"jpg1")
+        # Files are named by their content
+        self.assertEqual(self.files(), [digest])
+
+
+    def test_identical_images_share_a_file(self):
+        self.cache.put("https://api.playfault.com/imagecdn/items/1.jpg", b"same")
+        self.cache.put("https://api.playfault.com/imagecdn/items/2.jpg", b"same")
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.size(), 4)
+        self.assertEqual(len(self.files()), 1)
+        # The file stays while another URL uses it
+        self.cache.invalidate("https://api.playfault.com/imagecdn/items/1.jpg")
+        self.assertEqual(self.cache.get("https://api.playfault.com/imagecdn/items/2.jpg"), b"same")
+        self.cache.invalidate("https://api.playfault.com/imagecdn/items/2.jpg")
+        self.assertEqual(self.files(), [])
+
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.put("a", b"aaaa")
+        self.tick()
+        self.cache.put("b", b"bbbb")
+        self.tick()
+        # Using a makes b the least recently used
+        self.cache.get("a")
+        self.tick()
+        self.cache.put("c", b"cccc")
+        self.assertEqual(self.cache.get("b"), None)
+        self.assertEqual(self.cache.get("a"), b"aaaa")
+        self.assertEqual(self.cache.get("c"), b"cccc")
+        self.assertLessEqual(self.cache.size(), 10)
+        self.assertEqual(len(self.files()), 2)
+
+
+    def test_hits_are_touched_once_per_interval(self):
+        self.cache.put("a", b"aaaa")
+        self.tick(1)
+        self.cache.put("b", b"bbbb")
+        self.tick(1)
+        # a was used too recently to be touched again, so it is still the least recently used
+        self.cache.get("a")
+        self.cache.put("c", b"cccc")
+        self.assertEqual(self.cache.get("a"), None)
+        self.assertEqual(self.cache.get("b"), b"bbbb")
+
+
+    def test_eviction_of_shared_files(self):
+        self.cache.put("a", b"same")
+        self.cache.put("b", b"same")
+        self.tick()
+        self.cache.put("c", b"cccc")
+        self.tick()
+        # Dropping a frees nothing while b still uses the file, so b goes too
+        self.cache.put("d", b"dddd")
+        self.assertEqual(self.cache.get("a"), None)
+        self.assertEqual(self.cache.get("b"), None)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.size(), 8)
+        self.assertEqual(len(self.files()), 2)
+
+
+    def test_missing_file(self):
+        digest = self.cache.put("a", b"aaaa")
+        os.remove(os.path.join(self.directory.name, digest))
+        self.assertEqual(self.cache.get("a"), None)
+        self.assertEqual(len(self.cache), 0)
+
+
+    def test_survives_restart(self):
+        self.cache.put("a", b"aaaa")
+        restarted = ImageCache(self.directory.name, max_bytes=10)
+        try:
+            self.assertEqual(restarted.get("a"), b"aaaa")
+        finally:
+            restarted.close()
+
+
+# Run testing
+if __name__ == '__main__':
+    unittest.main()
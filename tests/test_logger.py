@@ -0,0 +1,134 @@
+"""
+Unit tests for the bot's queue based logging.
+
+"""
+
+# Imports
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+import bot.logger
+from bot.logger import setup_logger, setup_root_logger, stop_logging
+
+
+class LoggerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+
+    def tearDown(self):
+        stop_logging()
+        for path in list(bot.logger._file_handlers):
+            if path.startswith(self.directory.name):
+                bot.logger._file_handlers.pop(path).close()
+        self.directory.cleanup()
+
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+
+    def read(self, name):
+        with open(self.path(name), "r") as file:
+            return file.read().splitlines()
+
+
+    def test_each_logger_writes_to_its_own_file(self):
+        cogs = setup_logger(self.path("fault_bot.log"), "test_cogs")
+        views = setup_logger(self.path("fault_bot.log"), "test_views")
+        helpers = setup_logger(self.path("cog_helpers.log"), "test_cog_helpers")
+        cogs.info("Getting elo for qchrisd#1234.")
+        views.info("Showing page 2.")
+        helpers.error("No file found.")
+        logging.getLogger("test_cogs.match").info("From a child logger.")
+        # Records are written by the logging thread
+        stop_logging()
+
+        bot_log = self.read("fault_bot.log")
+        self.assertEqual(len(bot_log), 3)
+        self.assertTrue(bot_log[0].endswith("[INFO] - test_cogs - Getting elo for qchrisd#1234."))
+        self.assertTrue(bot_log[1].endswith("[INFO] - test_views - Showing page 2."))
+        self.assertTrue(bot_log[2].endswith("[INFO] - test_cogs.match - From a child logger."))
+        helpers_log = self.read("cog_helpers.log")
+        self.assertEqual(len(helpers_log), 1)
+        self.assertTrue(helpers_log[0].endswith("[ERROR] - test_cog_helpers - No file found."))
+
+
+    def test_setup_twice_adds_one_handler(self):
+        first = setup_logger(self.path("fault_bot.log"), "test_twice")
+        second = setup_logger(self.path("fault_bot.log"), "test_twice")
+        self.assertIs(first, second)
+        self.assertEqual(len(first.handlers), 1)
+        self.assertFalse(first.propagate)
+        first.info("Once.")
+        stop_logging()
+        self.assertEqual(len(self.read("fault_bot.log")), 1)
+
+
+    def test_other_loggers_write_to_the_root_file(self):
+        setup_logger(self.path("fault_bot.log"), "test_root_cogs")
+        setup_logger(self.path("cog_helpers.log"), "test_root_helpers")
+        setup_root_logger(self.path("fault_bot.log"))
+        try:
+            logging.getLogger("discord.client").info("Logging in using static token.")
+            logging.getLogger("test_root_helpers").info("Not in the root file.")
+            stop_logging()
+        finally:
+            setup_root_logger(bot.logger.ROOT_LOG_FILE)
+
+        bot_log = self.read("fault_bot.log")
+        self.assertEqual(len(bot_log), 1)
+        self.assertTrue(bot_log[0].endswith("[INFO] - discord.client - Logging in using static token."))
+        self.assertEqual(len(self.read("cog_helpers.log")), 1)
+
+
+    def test_json_lines(self):
+        log = setup_logger(self.path("fault_bot.jsonl"), "test_json", json_lines=True)
+        log.warning("Slow command: %s", "/match")
+        try:
+            raise KeyError("MMR")
+        except KeyError as e:
+            log.exception("Failed")
+        stop_logging()
+
+        lines = [json.loads(line) for line in self.read("fault_bot.jsonl")]
+        self.assertEqual(lines[0]["level"], "WARNING")
+        self.assertEqual(lines[0]["logger"], "test_json")
+        self.assertEqual(lines[0]["message"], "Slow command: /match")
+        self.assertEqual(lines[1]["message"], "Failed")
+        self.assertIn("KeyError: 'MMR'", lines[1]["exception"])
+
+
+    def test_text_tracebacks(self):
+        log = setup_logger(self.path("traceback.log"), "test_traceback")
+        try:
+            raise KeyError("MMR")
+        except KeyError as e:
+            log.exception("Failed")
+        stop_logging()
+
+        lines = self.read("traceback.log")
+        self.assertTrue(lines[0].endswith("[ERROR] - test_traceback - Failed"))
+        self.assertEqual(lines[1], "Traceback (most recent call last):")
+        self.assertEqual(lines[-1], "KeyError: 'MMR'")
+
+
+    def test_rotation(self):
+        old_max_bytes = bot.logger.LOG_MAX_BYTES
+        bot.logger.LOG_MAX_BYTES = 200
+        try:
+            log = setup_logger(self.path("rotating.log"), "test_rotation")
+        finally:
+            bot.logger.LOG_MAX_BYTES = old_max_bytes
+        for i in range(10):
+            log.info(f"Line {i} " + "x" * 50)
+        stop_logging()
+        self.assertTrue(os.path.exists(self.path("rotating.log.1")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Unit tests for the fault_api request metrics.
+
+"""
+
+# Imports
+import os
+import tempfile
+import unittest
+import urllib.request
+
+from fault_api.metrics import Metrics, Histogram, dump, start_http_server
+
+
+# Test case
+class MetricsTest(unittest.TestCase):
+
+    def test_histogram_buckets(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(0.1, 2), (1.0, 3), (float("inf"), 4)])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 3.65)
+
+
+    def test_record(self):
+        metrics = Metrics()
+        metrics.record_request("getMatchData", 200, 0.2)
+        metrics.record_request("getMatchData", 200, 0.4)
+        metrics.record_bytes("getMatchData", 1500)
+        metrics.record_error("getEloData", "connection")
+        metrics.record_cache("getMatchData", "hit")
+        metrics.record_connection("aiohttp", reused=True)
+        self.assertEqual(metrics.value("fault_api_requests_total", endpoint="getMatchData", status=200), 2)
+        self.assertEqual(metrics.value("fault_api_request_duration_seconds", endpoint="getMatchData"), 2)
+        self.assertEqual(metrics.value("fault_api_response_bytes_total", endpoint="getMatchData"), 1500)
+        # A connection error is a request without a status
+        self.assertEqual(metrics.value("fault_api_requests_total", endpoint="getEloData", status="error"), 1)
+        self.assertEqual(metrics.value("fault_api_errors_total", endpoint="getEloData", kind="connection"), 1)
+        self.assertEqual(metrics.value("fault_api_cache_requests_total", endpoint="getMatchData", result="hit"), 1)
+        self.assertEqual(metrics.value("fault_api_connections_total", client="aiohttp", event="reused"), 1)
+        self.assertEqual(metrics.value("fault_api_cache_requests_total", endpoint="getMatchData", result="miss"), 0)
+        metrics.reset()
+        self.assertEqual(metrics.value("fault_api_requests_total", endpoint="getMatchData", status=200), 0)
+
+
+    def test_collectors(self):
+        metrics = Metrics()
+        metrics.add_collector(lambda: [("fault_api_connections_total", {"client": "urllib3", "event": "created"}, 3)])
+        self.assertEqual(metrics.value("fault_api_connections_total", client="urllib3", event="created"), 3)
+        self.assertIn('fault_api_connections_total{client="urllib3",event="created"} 3', metrics.to_prometheus())
+
+
+    def test_to_prometheus(self):
+        metrics = Metrics(buckets=(0.1, 1.0))
+        metrics.record_request("getMatchData", 200, 0.5)
+        metrics.record_error("getMatchData", "connection")
+        metrics.record_cache('say "hi"', "miss")
+        text = metrics.to_prometheus()
+        self.assertIn("# TYPE fault_api_requests_total counter", text)
+        self.assertIn('fault_api_requests_total{endpoint="getMatchData",status="200"} 1', text)
+        self.assertIn('fault_api_requests_total{endpoint="getMatchData",status="error"} 1', text)
+        self.assertIn("# TYPE fault_api_request_duration_seconds histogram", text)
+        self.assertIn('fault_api_request_duration_seconds_bucket{endpoint="getMatchData",le="0.1"} 0', text)
+        self.assertIn('fault_api_request_duration_seconds_bucket{endpoint="getMatchData",le="1"} 1', text)
+        self.assertIn('fault_api_request_duration_seconds_bucket{endpoint="getMatchData",le="+Inf"} 1', text)
+        self.assertIn('fault_api_request_duration_seconds_sum{endpoint="getMatchData"} 0.5', text)
+        self.assertIn('fault_api_request_duration_seconds_count{endpoint="getMatchData"} 1', text)
+        self.assertIn('endpoint="say \\"hi\\""', text)
+        # Metrics with nothing recorded are left out
+        self.assertNotIn("fault_api_response_bytes_total", text)
+
+
+    def test_dump(self):
+        metrics = Metrics()
+        metrics.record_cache("items", "hit")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "fault_api.prom")
+            dump(metrics, path)
+            with open(path, "r") as file:
+                self.assertEqual(file.read(), metrics.to_prometheus())
+
+
+    def test_http_server(self):
+        metrics = Metrics()
+        metrics.record_cache("items", "hit")
+        server = start_http_server(metrics, 0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(f"{url}/metrics") as response:
+                self.assertEqual(response.status, 200)
+                self.assertIn("text/plain", response.headers["Content-Type"])
+                self.assertEqual(response.read().decode("utf-8"), metrics.to_prometheus())
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{url}/other")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
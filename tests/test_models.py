@@ -0,0 +1,88 @@
+"""
+Unit tests for the fault_api records.
+
+"""
+
+# Imports
+import unittest
+
+from fault_api.models import (User,
+                              EloData,
+                              PlayerLine,
+                              MatchSummary,
+                              MatchDetail,
+                              build)
+from fault_api.resilience import APIError
+
+
+class ModelsTest(unittest.TestCase):
+
+    def test_player_line_key_casing(self):
+        # getMatchData and getMatches spell the same fields differently
+        detail = PlayerLine.from_api({"PlayerID": 29016, "HeroID": 25, "MMRChange": -32, "Item1": -1, "Item2": 74, "Card1": 6})
+        summary = PlayerLine.from_api({"playerId": 29016, "heroId": 25, "mmrChange": -32, "item1": -1, "item2": 74, "card1": 6})
+        self.assertEqual(detail, summary)
+        self.assertEqual(detail.player_id, 29016)
+        self.assertEqual(detail.mmr_change, -32)
+        self.assertEqual(detail.items, (-1, 74, None, None, None, None))
+        self.assertEqual(detail.cards, (6, None))
+
+
+    def test_player_line_kda(self):
+        self.assertEqual(PlayerLine.from_api({"Kills": 7, "Deaths": 2, "Assists": 3}).kda, 5.0)
+        # Never died
+        self.assertEqual(PlayerLine.from_api({"Kills": 7, "Deaths": 0, "Assists": 3}).kda, 10)
+
+
+    def test_records_are_slotted(self):
+        player = PlayerLine.from_api({"PlayerID": 1})
+        self.assertFalse(hasattr(player, "__dict__"))
+        with self.assertRaises(AttributeError):
+            player.kills = 3
+
+
+    def test_build(self):
+        # Each endpoint gets its own record
+        users = build("https://api.playfault.com/searchUsers/qchrisd", [{"id": 29016, "username": "qchrisd"}])
+        self.assertEqual(users, (User(29016, "qchrisd"),))
+        self.assertEqual(build("https://api.playfault.com/searchUsers/nobody", {"error": "not found"}), ())
+
+        elo = build("https://api.playfault.com/getEloData/29016", {"id": "29016", "eloTitle": "Silver", "MMR": 1223.1})
+        self.assertIsInstance(elo, EloData)
+        self.assertEqual((elo.elo_title, elo.mmr), ("Silver", 1223.1))
+
+        matches = build("https://api.playfault.com/getMatches/29016/2",
+                        {"success": True, "matches": [{"id": 2, "timeLength": "00:32:37", "players": [{"playerId": 29016}]}, {"id": 1}]})
+        self.assertEqual([match.id for match in matches], [2, 1])
+        self.assertIsInstance(matches[0], MatchSummary)
+        self.assertEqual(matches[0].time_length, "00:32:37")
+        self.assertEqual(matches[0].players[0].player_id, 29016)
+        self.assertEqual(build("https://api.playfault.com/getMatches/1/1", {"success": False}), ())
+
+        match = build("https://api.playfault.com/getMatchData/798209", {"ID": 798209, "Status": 2, "TimeLength": "00:32:37", "Players": [{"PlayerID": 29016}]})
+        self.assertIsInstance(match, MatchDetail)
+        self.assertEqual((match.id, match.status, match.time_length), (798209, 2, "00:32:37"))
+
+        # Other endpoints are left alone
+        self.assertEqual(build("https://api.playfault.com/userAvatar/29016", {"avatarId": 1}), {"avatarId": 1})
+
+
+    def test_build_broken_responses(self):
+        # null, a list or an error string instead of an object
+        for page_json in (None, [], "Internal error"):
+            for url in ("https://api.playfault.com/getMatchData/798209",
+                        "https://api.playfault.com/getMatches/29016/1",
+                        "https://api.playfault.com/getEloData/29016"):
+                with self.assertRaises(APIError):
+                    build(url, page_json)
+        self.assertEqual(build("https://api.playfault.com/searchUsers/qchrisd", None), ())
+
+
+    def test_user_to_dict(self):
+        user = User.from_api({"id": 29016, "username": "qchrisd"})
+        self.assertEqual(User.from_api(user.to_dict()), user)
+
+
+# Run testing
+if __name__ == '__main__':
+    unittest.main()
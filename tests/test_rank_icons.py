@@ -0,0 +1,65 @@
+"""
+Contains unit tests for the rank_icons module.
+"""
+
+import os
+import tempfile
+import unittest
+import unittest.mock as mock
+from bot.rank_icons import RankIconCache, RANK_TITLES, icon_path, uploaded_url
+
+
+class TestRankIconCache(unittest.TestCase):
+
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "rank_icons.json")
+        self.now = [1000.0]
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def test_put_get(self):
+        icons = RankIconCache(self.path, max_age=60, clock=lambda: self.now[0])
+        self.assertEqual(icons.get("Silver"), None)
+        icons.put("Silver", "https://cdn.discordapp.com/Silver.png")
+        self.assertEqual(icons.get("Silver"), "https://cdn.discordapp.com/Silver.png")
+        # Saved links survive a restart
+        restarted = RankIconCache(self.path, max_age=60, clock=lambda: self.now[0])
+        self.assertEqual(restarted.get("Silver"), "https://cdn.discordapp.com/Silver.png")
+        # Old links are uploaded again
+        self.now[0] += 61
+        self.assertEqual(restarted.get("Silver"), None)
+
+
+    def test_broken_file(self):
+        with open(self.path, "w") as file:
+            file.write("{not json")
+        self.assertEqual(RankIconCache(self.path).get("Gold"), None)
+
+
+    def test_base_url(self):
+        icons = RankIconCache(self.path, base_url="https://example.com/icons_rank/")
+        self.assertEqual(icons.get("Gold"), "https://example.com/icons_rank/Gold.png")
+        self.assertFalse(os.path.exists(self.path))
+
+
+    def test_icon_files(self):
+        for elo_title in RANK_TITLES:
+            self.assertTrue(os.path.exists(icon_path(elo_title)), elo_title)
+
+
+    def test_uploaded_url(self):
+        message = mock.Mock(attachments=[mock.Mock(url="https://cdn.discordapp.com/a/Gold.png")], embeds=[])
+        self.assertEqual(uploaded_url(message), "https://cdn.discordapp.com/a/Gold.png")
+        thumbnail = mock.Mock(url="https://media.discordapp.net/a/Gold.png")
+        message = mock.Mock(attachments=[], embeds=[mock.Mock(thumbnail=thumbnail)])
+        self.assertEqual(uploaded_url(message), "https://media.discordapp.net/a/Gold.png")
+        self.assertEqual(uploaded_url(mock.Mock(attachments=[], embeds=[])), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
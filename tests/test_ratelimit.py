@@ -0,0 +1,66 @@
+"""
+Unit tests for the fault_api rate limiter.
+
+"""
+
+# Imports
+import asyncio
+import unittest
+
+from fault_api.ratelimit import (RateLimiter,
+                                 INTERACTIVE,
+                                 BACKGROUND,
+                                 request_priority,
+                                 current_priority)
+
+
+# Test case
+class RateLimiterTest(unittest.TestCase):
+
+    def test_burst_then_wait(self):
+        limiter = RateLimiter(rate=200, burst=2)
+        limiter.acquire()
+        limiter.acquire()
+        # The bucket is empty so the third request is queued, not rejected
+        limiter.acquire()
+        stats = limiter.stats()["interactive"]
+        self.assertEqual(stats["acquired"], 3)
+        self.assertEqual(stats["delayed"], 1)
+        self.assertGreater(stats["wait_max"], 0)
+        self.assertEqual(limiter.queue_depth(), 0)
+
+
+    def test_interactive_goes_first(self):
+        limiter = RateLimiter(rate=200, burst=5)
+        # An interactive request is waiting so background requests hold back
+        limiter._enter(INTERACTIVE)
+        self.assertGreater(limiter._try_take(BACKGROUND), 0)
+        self.assertEqual(limiter._try_take(INTERACTIVE), 0)
+        self.assertEqual(limiter.queue_depth(INTERACTIVE), 1)
+        limiter._leave(INTERACTIVE, 0.0, False)
+        self.assertEqual(limiter._try_take(BACKGROUND), 0)
+
+
+    def test_request_priority(self):
+        self.assertEqual(current_priority(), INTERACTIVE)
+        with request_priority(BACKGROUND):
+            self.assertEqual(current_priority(), BACKGROUND)
+        self.assertEqual(current_priority(), INTERACTIVE)
+
+
+    def test_acquire_async(self):
+        limiter = RateLimiter(rate=200, burst=1)
+
+        async def acquire_all():
+            with request_priority(BACKGROUND):
+                await asyncio.gather(*[limiter.acquire_async() for _ in range(3)])
+
+        asyncio.run(acquire_all())
+        stats = limiter.stats()["background"]
+        self.assertEqual(stats["acquired"], 3)
+        self.assertEqual(stats["max_queued"], 2)
+
+
+# Run testing
+if __name__ == '__main__':
+    unittest.main()
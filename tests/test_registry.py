@@ -0,0 +1,53 @@
+"""
+Unit tests for the fault_api game registry.
+
+"""
+
+# Imports
+import unittest
+
+from fault_api.registry import (GameRegistry,
+                                HeroRecord,
+                                ItemRecord,
+                                AspectRecord)
+from fault_api.models import PlayerLine
+
+
+# Test case
+class GameRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        hero_stats = {"Twinblast": {"Id": 2, "wins": 10}, "Narbash": {"Id": 6, "wins": 4}}
+        items = {"5": {"id": 5, "name": "S.I. Boots", "cost": "300", "color": "White", "treeId": 1}}
+        aspects = [{"name": "King", "color": "Red", "effect1": "a", "effect2": "b"},
+                   {"name": "Queen", "color": "Blue", "effect1": "c", "effect2": "d"}]
+        self.registry = GameRegistry.from_api(hero_stats, items, aspects)
+
+
+    def test_heroes(self):
+        self.assertEqual(self.registry.hero(2), HeroRecord(2, "Twinblast"))
+        self.assertEqual(self.registry.hero_name(6), "Narbash")
+        self.assertEqual(self.registry.hero_name(99, "Unknown"), "Unknown")
+        self.assertEqual(self.registry.id_to_hero, {2: "Twinblast", 6: "Narbash"})
+        self.assertEqual(self.registry.hero_to_id, {"Twinblast": 2, "Narbash": 6})
+
+
+    def test_items(self):
+        self.assertEqual(self.registry.item(5), ItemRecord(5, "S.I. Boots", "300", "White", 1))
+        self.assertEqual(self.registry.item(-1), None)
+        player = PlayerLine.from_api({"Item1": -1, "Item2": 5, "Item3": 77, "Item4": -1, "Item5": -1, "Item6": -1})
+        self.assertEqual(self.registry.player_items(player), [None, self.registry.item(5), None, None, None, None])
+
+
+    def test_aspects_and_cards(self):
+        self.assertEqual(self.registry.aspect(1), AspectRecord(1, "Queen", "Blue", "c", "d"))
+        self.assertEqual(self.registry.card(0).name, "King")
+        self.assertEqual(self.registry.player_cards(PlayerLine.from_api({"Card1": 1, "Card2": -1})), [self.registry.aspect(1), None])
+        # Aspects keyed by ID also work
+        registry = GameRegistry.from_api({}, {}, {"3": {"id": 3, "name": "Jack"}})
+        self.assertEqual(registry.aspect(3).name, "Jack")
+
+
+# Run testing
+if __name__ == '__main__':
+    unittest.main()
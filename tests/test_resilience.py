@@ -0,0 +1,92 @@
+"""
+Unit tests for fault_api failure handling.
+
+"""
+
+# Imports
+import unittest
+
+from fault_api.resilience import (CircuitBreaker,
+                                  Deadline,
+                                  backoff_delay,
+                                  CLOSED,
+                                  OPEN,
+                                  HALF_OPEN)
+
+
+class FakeClock:
+    """
+    Clock that only moves when told to.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# Test case
+class ResilienceTest(unittest.TestCase):
+
+    def test_backoff_delay(self):
+        # Full jitter stays between 0 and the exponential step
+        self.assertEqual(backoff_delay(0, 0.5, 10, rng=lambda: 1.0), 0.5)
+        self.assertEqual(backoff_delay(3, 0.5, 10, rng=lambda: 1.0), 4.0)
+        self.assertEqual(backoff_delay(3, 0.5, 10, rng=lambda: 0.25), 1.0)
+        # Capped
+        self.assertEqual(backoff_delay(10, 0.5, 10, rng=lambda: 1.0), 10)
+
+
+    def test_deadline(self):
+        clock = FakeClock()
+        deadline = Deadline(5, clock=clock)
+        self.assertEqual(deadline.remaining(), 5)
+        clock.now = 7
+        self.assertEqual(deadline.remaining(), 0)
+        self.assertTrue(deadline.expired())
+
+
+    def test_circuit_breaker(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=30, clock=clock)
+        breaker.record_failure("getEloData")
+        self.assertTrue(breaker.allow("getEloData"))
+        breaker.record_failure("getEloData")
+        self.assertEqual(breaker.state("getEloData"), OPEN)
+        self.assertFalse(breaker.allow("getEloData"))
+        # Other endpoints are not affected
+        self.assertTrue(breaker.allow("items"))
+
+        # After the cooldown one trial request is let through
+        clock.now = 31
+        self.assertEqual(breaker.state("getEloData"), HALF_OPEN)
+        self.assertTrue(breaker.allow("getEloData"))
+        self.assertFalse(breaker.allow("getEloData"))
+        # A failed trial opens it again
+        breaker.record_failure("getEloData")
+        self.assertEqual(breaker.state("getEloData"), OPEN)
+
+        clock.now = 62
+        self.assertTrue(breaker.allow("getEloData"))
+        breaker.record_success("getEloData")
+        self.assertEqual(breaker.state("getEloData"), CLOSED)
+        self.assertEqual(breaker.states(), {})
+
+
+    def test_released_trial(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=30, clock=clock)
+        breaker.record_failure("getEloData")
+        clock.now = 31
+        self.assertTrue(breaker.allow("getEloData"))
+        # A trial that ended without an answer lets the next request be the trial
+        breaker.release("getEloData")
+        self.assertEqual(breaker.state("getEloData"), HALF_OPEN)
+        self.assertTrue(breaker.allow("getEloData"))
+        self.assertFalse(breaker.allow("getEloData"))
+
+
+# Run testing
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Contains unit tests for the scoreboard module.
+"""
+
+import io
+import tempfile
+import unittest
+import unittest.mock as mock
+import fault_api
+from fault_api.images import ImageCache
+from fault_api.models import MatchDetail
+from bot.scoreboard import Image, render_scoreboard, load_images, get_scoreboard, scoreboard_key, HEADER_HEIGHT, ROW_HEIGHT, WIDTH
+
+
+def make_match(status):
+    players = [{"PlayerID": player_id, "Username": f"player{player_id}", "Team": player_id % 2, "HeroID": 4,
+                "HeroLevel": 15, "Kills": 3, "Deaths": 0, "Assists": 2, "MMR": 1200, "MMRChange": -15,
+                "Item1": 5, "Item2": -1}
+               for player_id in range(10)]
+    return MatchDetail.from_api({"ID": 123, "Winner": 1, "Status": status, "TimeLength": "00:30:00", "Players": players})
+
+
+def png(color):
+    output = io.BytesIO()
+    Image.new("RGB", (8, 8), color).save(output, format="PNG")
+    return output.getvalue()
+
+
+@unittest.skipIf(Image == None, "Pillow is not installed")
+@mock.patch("fault_api.get_image_item", side_effect=lambda item_id: png((0, 0, 255)))
+@mock.patch("fault_api.get_image_hero_portrait", side_effect=lambda hero_id: None)
+class TestScoreboard(unittest.IsolatedAsyncioTestCase):
+
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.old_image_cache = fault_api._image_cache
+        self.image_cache = fault_api.set_image_cache(ImageCache(self.directory.name))
+
+
+    def tearDown(self):
+        self.image_cache.close()
+        fault_api.set_image_cache(self.old_image_cache)
+        self.directory.cleanup()
+
+
+    def test_render(self, mock_portrait, mock_item):
+        data = render_scoreboard(make_match(2), {4: "Twinblast"})
+        image = Image.open(io.BytesIO(data))
+        self.assertEqual(image.format, "PNG")
+        self.assertEqual(image.size, (WIDTH, 2 * HEADER_HEIGHT + 10 * ROW_HEIGHT))
+        # Each image is fetched once, empty item slots are not fetched and missing portraits get a placeholder
+        self.assertEqual(mock_item.call_count, 1)
+        self.assertEqual(mock_portrait.call_count, 1)
+
+
+    def test_render_loaded_images(self, mock_portrait, mock_item):
+        data = render_scoreboard(make_match(2), {4: "Twinblast"}, portraits={4: png((255, 0, 0))}, items={5: None})
+        self.assertEqual(Image.open(io.BytesIO(data)).format, "PNG")
+        mock_portrait.assert_not_called()
+        mock_item.assert_not_called()
+
+
+    async def test_load_images(self, mock_portrait, mock_item):
+        match = make_match(2)
+        portraits, items = await load_images(match)
+        self.assertEqual(portraits, {4: None})
+        self.assertEqual(items, {5: png((0, 0, 255))})
+        mock_item.assert_called_once_with(5)
+
+
+    async def test_failed_image_is_a_placeholder(self, mock_portrait, mock_item):
+        match = make_match(2)
+        mock_item.side_effect = fault_api.APIError("items/5.jpg returned status 503")
+        portraits, items = await load_images(match)
+        self.assertEqual(items, {5: None})
+        # The scoreboard is still drawn
+        data = await get_scoreboard(match, {4: "Twinblast"})
+        self.assertEqual(Image.open(io.BytesIO(data)).format, "PNG")
+
+
+    async def test_finished_matches_are_cached(self, mock_portrait, mock_item):
+        finished = make_match(2)
+        data = await get_scoreboard(finished, {4: "Twinblast"})
+        self.assertEqual(self.image_cache.get(scoreboard_key(123)), data)
+        # Served from the cache without loading the images or rendering again
+        self.assertEqual(await get_scoreboard(finished, {4: "Twinblast"}), data)
+        self.assertEqual(mock_portrait.call_count, 1)
+        self.assertEqual(mock_item.call_count, 1)
+
+
+    async def test_match_in_progress_is_not_cached(self, mock_portrait, mock_item):
+        await get_scoreboard(make_match(1), {4: "Twinblast"})
+        self.assertEqual(self.image_cache.get(scoreboard_key(123)), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Unit tests for fault_api request coalescing.
+
+"""
+
+# Imports
+import asyncio
+import threading
+import time
+import unittest
+
+from fault_api.singleflight import SingleFlight, AsyncSingleFlight
+
+
+# Test case
+class SingleFlightTest(unittest.TestCase):
+
+    def test_concurrent_calls_share_one_request(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return {"ID": 123}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flights.do("match/123", fetch)))
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=lambda: results.append(flights.do("match/123", fetch))) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        # Wait until every follower is waiting on the leader
+        while flights.shared < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"ID": 123}] * 4)
+        self.assertIs(results[0], results[3])
+        self.assertEqual(flights.in_flight(), 0)
+
+
+    def test_errors_are_not_remembered(self):
+        flights = SingleFlight()
+
+        def fail():
+            raise ValueError("down")
+
+        with self.assertRaises(ValueError):
+            flights.do("elo/1", fail)
+        self.assertEqual(flights.do("elo/1", lambda: 5), 5)
+
+
+class AsyncSingleFlightTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_calls_share_one_request(self):
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"ID": 123}
+
+        results = await asyncio.gather(*[flights.do("match/123", fetch) for _ in range(5)])
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"ID": 123}] * 5)
+        self.assertEqual(flights.shared, 4)
+        self.assertEqual(flights.in_flight(), 0)
+        # A later call makes a new request
+        await flights.do("match/123", fetch)
+        self.assertEqual(len(calls), 2)
+
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        flights = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return 7
+
+        first = asyncio.ensure_future(flights.do("elo/1", fetch))
+        second = asyncio.ensure_future(flights.do("elo/1", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual(await second, 7)
+
+
+# Run testing
+if __name__ == '__main__':
+    unittest.main()
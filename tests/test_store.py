@@ -0,0 +1,72 @@
+"""
+Unit tests for the fault_api static data store.
+
+"""
+
+# Imports
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from fault_api.store import StaticStore, SCHEMA_VERSION
+
+
+# Test case
+class StaticStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.store = StaticStore(":memory:", max_age=60, clock=lambda: self.now)
+
+
+    def test_put_get(self):
+        url = "https://api.playfault.com/items"
+        self.assertEqual(self.store.get(url), None)
+        self.store.put(url, b'{"1": {}}', etag='"abc"', last_modified="Sat, 19 Mar 2022 19:02:28 GMT")
+        actual = self.store.get(url)
+        self.assertEqual(actual.body, b'{"1": {}}')
+        self.assertEqual(actual.etag, '"abc"')
+        self.assertEqual(actual.fetched_at, 1000.0)
+        self.assertEqual(self.store.urls(), [url])
+
+
+    def test_staleness(self):
+        url = "https://api.playfault.com/aspects"
+        self.store.put(url, b'[]')
+        self.now += 61
+        self.assertTrue(self.store.is_stale(self.store.get(url)))
+        self.store.touch(url)
+        self.assertFalse(self.store.is_stale(self.store.get(url)))
+
+
+    def test_persists_between_restarts(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "static_data.db")
+            store = StaticStore(path)
+            store.put("https://api.playfault.com/items", b'{}')
+            store.close()
+
+            store = StaticStore(path)
+            self.assertEqual(store.get("https://api.playfault.com/items").body, b'{}')
+            store.close()
+
+
+    def test_old_schema_is_dropped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "static_data.db")
+            connection = sqlite3.connect(path)
+            connection.execute("CREATE TABLE responses (url TEXT)")
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+            connection.commit()
+            connection.close()
+
+            store = StaticStore(path)
+            store.put("https://api.playfault.com/items", b'{}')
+            self.assertEqual(store.urls(), ["https://api.playfault.com/items"])
+            store.close()
+
+
+# Run testing
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+"""
+Unit tests for fault_api tracing.
+
+"""
+
+# Imports
+import asyncio
+import inspect
+import unittest
+import unittest.mock as mock
+
+import fault_api
+from fault_api import tracing
+from fault_api.cache import ResponseCache
+
+
+class TracingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.traces = []
+        tracing.add_listener(self.traces.append)
+
+
+    def tearDown(self):
+        tracing.remove_listener(self.traces.append)
+
+
+    def test_spans_outside_a_trace_do_nothing(self):
+        with tracing.span("getMatchData") as span:
+            span.set(cache="hit")
+        self.assertIsNone(tracing.current_span())
+        self.assertEqual(self.traces, [])
+
+
+    def test_nested_spans(self):
+        with tracing.trace("/match", user="qchrisd") as root:
+            with tracing.span("getMatches"):
+                pass
+            with tracing.span("getMatchData") as span:
+                with tracing.span("GET", attempt=0):
+                    pass
+                span.set(cache="miss")
+            # A trace inside a trace is a span of it
+            with tracing.trace("embed_match"):
+                pass
+        self.assertEqual(self.traces, [root])
+        self.assertEqual([child.name for child in root.children], ["getMatches", "getMatchData", "embed_match"])
+        self.assertEqual(root.children[1].attributes, {"cache": "miss"})
+        self.assertEqual(root.children[1].children[0].name, "GET")
+        self.assertGreaterEqual(root.duration, root.children[1].duration)
+        self.assertIsNone(tracing.current_span())
+
+
+    def test_errors_are_recorded(self):
+        with self.assertRaises(KeyError):
+            with tracing.trace("/elo") as root:
+                with tracing.span("getEloData"):
+                    raise KeyError("MMR")
+        self.assertEqual(root.error, "KeyError")
+        self.assertEqual(root.children[0].error, "KeyError")
+        self.assertIn("(failed with KeyError)", tracing.format_breakdown(root))
+
+
+    def test_tasks_and_threads_join_the_trace(self):
+        async def lookup(name):
+            with tracing.span(name):
+                await asyncio.sleep(0)
+
+        def read_store():
+            with tracing.span("store"):
+                pass
+
+        async def command():
+            with tracing.trace("/match") as root:
+                await asyncio.gather(lookup("userAvatar"), lookup("userAvatar"))
+                await asyncio.to_thread(read_store)
+            return root
+
+        root = asyncio.run(command())
+        self.assertEqual([child.name for child in root.children], ["userAvatar", "userAvatar", "store"])
+
+
+    def test_traced(self):
+        @tracing.traced("/elo")
+        async def elo(self, ctx, fault_name: str = None):
+            with tracing.span("getEloData"):
+                return fault_name
+
+        # The signature is kept for slash_util
+        self.assertEqual(list(inspect.signature(elo).parameters), ["self", "ctx", "fault_name"])
+        self.assertEqual(asyncio.run(elo(None, None, "qchrisd")), "qchrisd")
+        self.assertEqual(self.traces[0].name, "/elo")
+        self.assertEqual(self.traces[0].children[0].name, "getEloData")
+
+        @tracing.spanned("embed_elo")
+        def embed_elo():
+            return tracing.current_span()
+
+        # Outside a trace a spanned function runs as is
+        self.assertIsNone(embed_elo())
+        with tracing.trace("/elo"):
+            self.assertEqual(embed_elo().name, "embed_elo")
+
+
+    def test_format(self):
+        with tracing.trace("/match") as root:
+            with tracing.span("getMatchData", cache="hit"):
+                pass
+            with tracing.span("userAvatar"):
+                pass
+            with tracing.span("userAvatar"):
+                pass
+        self.assertEqual(list(tracing.breakdown(root)), ["getMatchData", "userAvatar"])
+        self.assertTrue(tracing.format_breakdown(root).startswith("/match took "))
+        lines = tracing.format_trace(root).splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith("  getMatchData "))
+        self.assertTrue(lines[1].endswith(" cache=hit"))
+
+
+    def test_listener_errors_are_ignored(self):
+        def broken(trace):
+            raise ValueError("broken")
+        tracing.add_listener(broken)
+        try:
+            with tracing.trace("/elo"):
+                pass
+        finally:
+            tracing.remove_listener(broken)
+        self.assertEqual(len(self.traces), 1)
+
+
+    @mock.patch("fault_api._fetch_json")
+    def test_fault_api_spans(self, mock_fetch_json):
+        self.addCleanup(fault_api.set_cache, fault_api.get_cache())
+        fault_api.set_cache(ResponseCache())
+        mock_fetch_json.return_value = {"heroes": {}}
+        url = "https://api.playfault.com/getPlayerHeroStats/29016"
+        with tracing.trace("/stats") as root:
+            fault_api._query_website(url)
+            fault_api._query_website(url)
+        self.assertEqual([(child.name, child.attributes) for child in root.children],
+                         [("getPlayerHeroStats", {"cache": "miss"}), ("getPlayerHeroStats", {"cache": "hit"})])
+
+
+class SlowCommandReportTest(unittest.TestCase):
+
+    def make_trace(self, name, seconds):
+        trace = tracing.Trace(name)
+        trace.start = 0.0
+        trace.end = seconds
+        trace.finished_at = 0.0
+        return trace
+
+
+    def test_report(self):
+        report = tracing.SlowCommandReport(threshold=1.0, size=2, window=10)
+        self.assertFalse(report.add(self.make_trace("/elo", 0.2)))
+        for seconds in (0.5, 1.5, 2.5, 3.5):
+            report.add(self.make_trace("/match", seconds))
+
+        stats = report.stats()
+        self.assertEqual(stats["/elo"]["count"], 1)
+        self.assertEqual(stats["/match"]["count"], 4)
+        self.assertEqual(stats["/match"]["max"], 3.5)
+        # Only the last `size` slow traces are kept, newest first
+        self.assertEqual([seconds for _, seconds, _ in report.slow_traces()], [3.5, 2.5])
+        text = report.report()
+        self.assertIn("/match: 4 runs", text)
+        self.assertIn("2 recent slow commands:", text)
+
+
+    def test_window(self):
+        report = tracing.SlowCommandReport(threshold=10.0, window=3)
+        for seconds in (1.0, 2.0, 3.0, 4.0):
+            report.add(self.make_trace("/elo", seconds))
+        self.assertEqual(report.stats()["/elo"]["count"], 3)
+        self.assertEqual(report.stats()["/elo"]["p50"], 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
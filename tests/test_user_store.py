@@ -0,0 +1,144 @@
+"""
+Contains unit tests for the user_store module.
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+import unittest.mock as mock
+from bot.user_store import SQLiteUserStore, JSONUserStore
+
+
+class TestSQLiteUserStore(unittest.TestCase):
+
+
+    def setUp(self):
+        self.store = SQLiteUserStore(":memory:")
+
+
+    def tearDown(self):
+        self.store.close()
+
+
+    def test_set_get(self):
+        self.assertEqual(self.store.get(123, "qchrisd#1644"), None)
+        self.store.set(123, "qchrisd#1644", {"id":29016, "username":"qchrisd"})
+        self.assertEqual(self.store.get(123, "qchrisd#1644"), {"id":29016, "username":"qchrisd"})
+        # Guild ids are stored as strings so ints and strings find the same user
+        self.assertEqual(self.store.get("123", "qchrisd#1644"), {"id":29016, "username":"qchrisd"})
+        # Other guilds don't see the registration
+        self.assertEqual(self.store.get(456, "qchrisd#1644"), None)
+        # Registering again replaces the user
+        self.store.set(123, "qchrisd#1644", {"id":6969, "username":"saxy_beast"})
+        self.assertEqual(self.store.get(123, "qchrisd#1644"), {"id":6969, "username":"saxy_beast"})
+
+
+    def test_remove(self):
+        self.store.set(123, "qchrisd#1644", {"id":29016, "username":"qchrisd"})
+        self.assertEqual(self.store.remove(123, "qchrisd#1644"), {"id":29016, "username":"qchrisd"})
+        self.assertEqual(self.store.get(123, "qchrisd#1644"), None)
+        self.assertEqual(self.store.remove(123, "qchrisd#1644"), None)
+
+
+    def test_import_dict(self):
+        self.assertTrue(self.store.is_empty())
+        users_dict = {"guild":{"123":{"qchrisd#1644":{"id":29016, "username":"qchrisd"}},
+                               "456":{"saxy#0001":{"id":6969, "username":"saxy_beast"}}}}
+        self.assertEqual(self.store.import_dict(users_dict), 2)
+        self.assertFalse(self.store.is_empty())
+        self.assertEqual(self.store.get("456", "saxy#0001"), {"id":6969, "username":"saxy_beast"})
+
+
+    def test_lookups_stay_in_memory(self):
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, "users.db")
+        try:
+            store = SQLiteUserStore(path)
+            store.set(123, "qchrisd#1644", {"id":29016, "username":"qchrisd"})
+            store.close()
+            # Registrations are read back when the store is opened again
+            store = SQLiteUserStore(path)
+            store._connection = mock.Mock()
+            self.assertEqual(store.get(123, "qchrisd#1644"), {"id":29016, "username":"qchrisd"})
+            self.assertEqual(store.get(123, "nobody#0000"), None)
+            self.assertFalse(store.is_empty())
+            store._connection.execute.assert_not_called()
+        finally:
+            directory.cleanup()
+
+
+class TestJSONUserStore(unittest.TestCase):
+
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "users.json")
+        with open(self.path, "w") as file:
+            json.dump({"guild":{"123":{"qchrisd#1644":{"id":29016, "username":"qchrisd"}}}}, file)
+
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def test_lookups_stay_in_memory(self):
+        store = JSONUserStore(self.path, delay=60)
+        with mock.patch("builtins.open") as mock_open:
+            self.assertEqual(store.get(123, "qchrisd#1644"), {"id":29016, "username":"qchrisd"})
+            self.assertEqual(store.get(123, "nobody#0000"), None)
+            self.assertEqual(store.get(456, "qchrisd#1644"), None)
+        mock_open.assert_not_called()
+
+
+    def test_burst_is_one_write(self):
+        store = JSONUserStore(self.path, delay=60)
+        with mock.patch("fault_api.files.os.replace", wraps=os.replace) as mock_replace:
+            store.set(123, "saxy#0001", {"id":6969, "username":"saxy_beast"})
+            store.set(456, "a#0001", {"id":1, "username":"a"})
+            store.remove(123, "qchrisd#1644")
+            store.close()
+        self.assertEqual(mock_replace.call_count, 1)
+        with open(self.path) as file:
+            actual = json.load(file)
+        self.assertEqual(actual, {"guild":{"123":{"saxy#0001":{"id":6969, "username":"saxy_beast"}},
+                                           "456":{"a#0001":{"id":1, "username":"a"}}}})
+        # No temporary files are left behind
+        self.assertEqual(os.listdir(self.directory.name), ["users.json"])
+
+
+    def test_failed_write_stays_pending(self):
+        store = JSONUserStore(self.path, delay=60)
+        store.set(123, "saxy#0001", {"id":6969, "username":"saxy_beast"})
+        with mock.patch("fault_api.files.os.replace", side_effect=OSError("disk full")):
+            store.flush()
+        # The old file and no temporary files are left
+        self.assertEqual(os.listdir(self.directory.name), ["users.json"])
+        self.assertEqual(JSONUserStore(self.path).get("123", "saxy#0001"), None)
+        # The next write still has the change
+        store.close()
+        self.assertEqual(JSONUserStore(self.path).get("123", "saxy#0001"), {"id":6969, "username":"saxy_beast"})
+
+
+    def test_write_behind(self):
+        store = JSONUserStore(self.path, delay=0.05)
+        store.set(123, "saxy#0001", {"id":6969, "username":"saxy_beast"})
+        # Nothing is written straight away
+        self.assertEqual(JSONUserStore(self.path).get("123", "saxy#0001"), None)
+        for _ in range(200):
+            actual = JSONUserStore(self.path).get("123", "saxy#0001")
+            if actual != None:
+                break
+            time.sleep(0.01)
+        self.assertEqual(actual, {"id":6969, "username":"saxy_beast"})
+
+
+    def test_missing_file(self):
+        store = JSONUserStore(os.path.join(self.directory.name, "missing.json"))
+        self.assertTrue(store.is_empty())
+        self.assertEqual(store.remove(123, "qchrisd#1644"), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Unit tests for the bot's message components.
+
+"""
+
+import unittest
+import unittest.mock as mock
+import discord
+from bot.views import MatchPageView
+
+
+def make_interaction():
+    """
+    Returns a mock interaction with only the methods discord.py has, so calling a missing one fails the test.
+    """
+
+    interaction = mock.create_autospec(discord.Interaction, instance=True)
+    interaction.response = mock.create_autospec(discord.InteractionResponse, instance=True)
+    return interaction
+
+
+class TestMatchPageView(unittest.IsolatedAsyncioTestCase):
+
+    async def test_paging(self):
+        pages = mock.MagicMock()
+        pages.__len__.return_value = 3
+        pages.page = mock.AsyncMock(side_effect=lambda index: [f"embed {index}"])
+        pages.label.side_effect = lambda index: f"Match {index + 1} of 3"
+        interaction = make_interaction()
+
+        view = MatchPageView(pages, author_id=1)
+        # Starts on the first page
+        self.assertTrue(view.previous_button.disabled)
+        self.assertFalse(view.next_button.disabled)
+
+        await view.next(interaction)
+        await view.next(interaction)
+        interaction.response.edit_message.assert_awaited_with(content="Match 3 of 3", embeds=["embed 2"], view=view)
+        self.assertTrue(view.next_button.disabled)
+        # Can't page past the end
+        await view.next(interaction)
+        self.assertEqual(view.index, 2)
+        await view.previous(interaction)
+        self.assertEqual(view.index, 1)
+        self.assertFalse(view.previous_button.disabled)
+
+
+    async def test_failed_page(self):
+        pages = mock.MagicMock()
+        pages.__len__.return_value = 2
+        pages.page = mock.AsyncMock(side_effect=RuntimeError("getMatchData failed"))
+        interaction = make_interaction()
+
+        view = MatchPageView(pages, author_id=1)
+        await view.next(interaction)
+        self.assertIn("couldn't load match 2", interaction.response.edit_message.await_args.kwargs["content"])
+        # The buttons stay so the user can page back
+        self.assertIs(interaction.response.edit_message.await_args.kwargs["view"], view)
+
+
+    async def test_only_author_can_page(self):
+        view = MatchPageView(mock.MagicMock(), author_id=1)
+        self.assertTrue(await view.interaction_check(mock.Mock(user=mock.Mock(id=1))))
+        self.assertFalse(await view.interaction_check(mock.Mock(user=mock.Mock(id=2))))
+
+
+# Run testing
+if __name__ == '__main__':
+    unittest.main()